@@ -1,16 +1,67 @@
 import os
 import json
-import base64
+import time
 import requests
-import mimetypes
-from PIL import Image
-from io import BytesIO
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 
 # 假设utils.py中包含logger和其他辅助函数
-from utils import logger
+from utils import logger, sha256_text, sha256_file, estimate_tokens
 from config import AVAILABLE_MODELS,Config
+from table_extractor import extract_tables, save_tables, table_to_text, compact_tables_in_markdown
+from checkpoint import PaperCheckpoint
+from question_registry import question_registry, CompiledQuestion, QA_PROMPT_TEMPLATE, QA_PROMPT_VERSION
+from section_digest import (SectionDigestCache, DIGEST_CATEGORIES, DIGEST_PROMPT_TEMPLATE, DIGEST_PROMPT_VERSION,
+                            group_sections, render_digest_prompt)
+from local_extractors import extract_candidates, question_fields, format_candidate_hints, direct_answer, hints_version
+from token_budget import TokenBudget, STOP_SEQUENCES
+from structured_output import (DATASET_INFO_SCHEMA, repair_json, validate_object, build_fields_reask_prompt,
+                               parse_fields_answer)
+from telemetry import track_call, telemetry_context
+from tracing import traced
+from profiler import profiled
+from cost_estimator import estimate_analysis
+from image_pipeline import (ImagePreparePool, IMAGE_URL_PLACEHOLDER, build_vision_request_body,
+                            check_image_compatibility, prepare_image)
+
+# 提示词模板；模板内容的哈希作为提示词版本，写入结果指纹，模板修改后旧结果自动视为过期
+IMAGE_ANALYSIS_QUESTION = """请详细分析这张图片，包括：
+1. 图片类型（图表、流程图、架构图、实验结果等）
+2. 主要内容和关键信息
+3. 数据或结果的重要发现
+4. 与研究方法或结论的关系"""
+
+DATASET_INFO_PROMPT_TEMPLATE = """请从以下文献内容中提取数据集相关信息，以JSON格式返回：
+
+文献内容：
+{content}
+
+请提取以下信息（如果文献中没有相关信息，对应字段返回null）：
+{{
+    "datasets_used": ["数据集名称列表"],
+    "dataset_sources": ["数据集来源或链接"],
+    "dataset_sizes": ["数据集大小描述"],
+    "data_preprocessing": "数据预处理方法描述",
+    "evaluation_metrics": ["评估指标列表"],
+    "experimental_setup": "实验设置描述"
+}}
+
+只返回JSON格式的结果，不要其他解释。"""
+
+PROMPT_VERSIONS = {
+    "qa": QA_PROMPT_VERSION,
+    "image": sha256_text(IMAGE_ANALYSIS_QUESTION, 8),
+    "dataset_info": sha256_text(DATASET_INFO_PROMPT_TEMPLATE, 8)
+}
+
+# 默认问题配置名（对应QUESTION_FILE，结果保存在result目录下）
+DEFAULT_PROFILE = "default"
+
+# 增量分析预估中，没有历史回答可参考时使用的默认输出token数
+DEFAULT_OUTPUT_TOKENS = {"qa": 800, "image": 600, "dataset_info": 400}
+# 单张图片输入token的粗略估计
+IMAGE_INPUT_TOKENS = 1000
+
 
 class PaperAnalyzer:
     def __init__(self, config):
@@ -34,6 +85,11 @@ class PaperAnalyzer:
         # 最大图片大小 (MB)
         self.max_image_size_mb = 20
 
+        # 按问题自适应的输出token预算
+        self.token_budget = TokenBudget(self.config.DATA_DIR, margin=self.config.TOKEN_BUDGET_MARGIN,
+                                        min_tokens=self.config.TOKEN_BUDGET_MIN_TOKENS,
+                                        min_samples=self.config.TOKEN_BUDGET_MIN_SAMPLES)
+
     def _get_api_endpoint(self, model_name: str) -> str:
         """
         根据模型名称获取API端点
@@ -51,13 +107,14 @@ class PaperAnalyzer:
         # 默认使用DeepSeek的端点
         return "https://api.deepseek.com/v1/chat/completions"
 
-    def _make_api_call(self, model_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    def _make_api_call(self, model_name: str, data: Dict[str, Any], stage: str = "llm") -> Dict[str, Any]:
         """
         集中的API调用逻辑
 
         Args:
             model_name: 模型名称
             data: 请求数据
+            stage: 调用阶段（写入调用记录）
 
         Returns:
             Dict: API响应的JSON数据
@@ -73,19 +130,23 @@ class PaperAnalyzer:
                 raise Exception("DeepSeek API密钥未配置")
 
             # 尝试发起请求
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                json=data,
-                timeout=60
-            )
+            with track_call(stage, model_name, max_tokens=data.get("max_tokens")) as call:
+                response = requests.post(
+                    endpoint,
+                    headers=self.headers,
+                    json=data,
+                    timeout=60
+                )
+                call.set_response(response)
 
-            if response.status_code == 200:
-                return response.json()
-            else:
-                error_text = response.text if response.text else f"状态码: {response.status_code}"
-                logger.error(f"API调用失败 ({model_name}): {error_text}")
-                raise Exception(f"API调用失败: {response.status_code} - {error_text}")
+                if response.status_code == 200:
+                    result = response.json()
+                    call.set_usage(result)
+                    return result
+                else:
+                    error_text = response.text if response.text else f"状态码: {response.status_code}"
+                    logger.error(f"API调用失败 ({model_name}): {error_text}")
+                    raise Exception(f"API调用失败: {response.status_code} - {error_text}")
         except requests.exceptions.RequestException as e:
             logger.error(f"API请求异常 ({model_name}): {e}")
             raise Exception(f"API请求异常: {str(e)}")
@@ -106,41 +167,19 @@ class PaperAnalyzer:
         Returns:
             List[Dict]: 解析后的问题列表
         """
-        if not os.path.exists(file_path):
-            logger.error(f"问题文件 {file_path} 不存在")
-            return []
-
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # 按===分割问题
-            question_blocks = content.split('===')
-            parsed_questions = []
-
-            for block in question_blocks:
-                block = block.strip()
-                if not block:
-                    continue
-
-                # 提取问题标题（第一行）和内容（剩余行）
-                lines = block.split('\n')
-                title = lines[0].strip().rstrip('：:')
-
-                # 剩余行作为问题内容
-                content = '\n'.join(lines[1:]).strip() if len(lines) > 1 else ""
+        return question_registry.read_question_file(file_path)
 
-                parsed_questions.append({
-                    "title": title,
-                    "content": content
-                })
+    def load_questions(self, file_path: Optional[str] = None) -> List[CompiledQuestion]:
+        """
+        获取编译后的问题列表（问题文件只在修改后重新解析）
 
-            logger.info(f"解析了 {len(parsed_questions)} 个问题")
-            return parsed_questions
+        Args:
+            file_path: 问题文件路径，默认使用配置中的QUESTION_FILE
 
-        except Exception as e:
-            logger.error(f"读取问题文件时出错: {e}")
-            return []
+        Returns:
+            List[CompiledQuestion]: 编译后的问题列表
+        """
+        return question_registry.get_questions(file_path or self.config.QUESTION_FILE)
 
     def read_markdown_content(self, md_file_path: str) -> str:
         """
@@ -193,34 +232,7 @@ class PaperAnalyzer:
         Returns:
             Tuple[bool, str]: (是否兼容, 原因)
         """
-        try:
-            # 检查文件扩展名
-            ext = os.path.splitext(image_path)[1].lower()
-            if ext not in self.supported_image_formats:
-                return False, f"不支持的图片格式: {ext}，仅支持 {', '.join(self.supported_image_formats)}"
-
-            # 检查文件大小 (限制为20MB)
-            file_size = os.path.getsize(image_path) / (1024 * 1024)  # 转换为MB
-            if file_size > self.max_image_size_mb:
-                return False, f"图片过大 ({file_size:.2f}MB)，最大支持 {self.max_image_size_mb}MB"
-
-            # 尝试打开图片以验证完整性
-            try:
-                with Image.open(image_path) as img:
-                    # 检查图片是否过大
-                    width, height = img.size
-                    if width > 4096 or height > 4096:
-                        return False, f"图片尺寸过大 ({width}x{height})，建议裁剪至4096x4096以内"
-
-                    # 检查图片是否过小
-                    if width < 16 or height < 16:
-                        return False, f"图片尺寸过小 ({width}x{height})，应大于16x16"
-            except Exception as e:
-                return False, f"图片无法打开: {str(e)}"
-
-            return True, "兼容"
-        except Exception as e:
-            return False, f"图片验证失败: {str(e)}"
+        return check_image_compatibility(image_path, self.supported_image_formats, self.max_image_size_mb)
 
     def prepare_image_for_api(self, image_path: str) -> Tuple[bool, str, str]:
         """
@@ -232,50 +244,76 @@ class PaperAnalyzer:
         Returns:
             Tuple[bool, str, str]: (是否成功, 图片base64数据, 错误信息)
         """
-        try:
-            # 首先检查图片兼容性
-            is_compatible, reason = self.is_compatible_image(image_path)
-            if not is_compatible:
-                return False, "", reason
-
-            # 获取MIME类型
-            mime_type, _ = mimetypes.guess_type(image_path)
-            if not mime_type:
-                mime_type = "images/jpeg"  # 默认MIME类型
-
-            # 读取并编码图片
-            with open(image_path, "rb") as image_file:
-                image_data = image_file.read()
-
-            # 尝试压缩图片如果需要
-            img_size_mb = len(image_data) / (1024 * 1024)
-            if img_size_mb > 5:  # 如果大于5MB尝试压缩
-                try:
-                    with Image.open(BytesIO(image_data)) as img:
-                        output = BytesIO()
-                        # 转换为RGB模式（如果是RGBA）
-                        if img.mode == 'RGBA':
-                            img = img.convert('RGB')
-                        # 压缩质量
-                        img.save(output, format='JPEG', quality=85)
-                        image_data = output.getvalue()
-                except Exception as e:
-                    logger.warning(f"图片压缩失败: {str(e)}，使用原始图片")
+        prepared = prepare_image(image_path, self.supported_image_formats, self.max_image_size_mb)
+        if not prepared["success"]:
+            return False, "", prepared["error"]
+        return True, f"data:{prepared['mime_type']};base64,{prepared['image_base64'].decode('ascii')}", ""
+
+    def _call_with_budget(self, model_name: str, prompt: str, budget_key: Optional[str], cap: int,
+                          question: str = "", stop: Optional[List[str]] = None,
+                          json_mode: bool = False) -> Dict[str, Any]:
+        """
+        按自适应输出预算调用文本模型
 
-            # Base64编码
-            base64_image = base64.b64encode(image_data).decode('utf-8')
-            return True, f"data:{mime_type};base64,{base64_image}", ""
+        回答因达到max_tokens被截断时，以上限重新请求一次。
 
-        except Exception as e:
-            return False, "", f"准备图片数据失败: {str(e)}"
+        Args:
+            model_name: 模型名称
+            prompt: 提示词
+            budget_key: 输出预算统计键，为空时直接使用上限且不记录统计
+            cap: 输出token上限
+            question: 问题文本（历史不足时用于估算预算）
+            stop: 停止序列
+            json_mode: 是否要求JSON输出（仅对支持JSON模式的模型生效）
 
-    def call_text_model(self, content: str, question: str) -> str:
+        Returns:
+            Dict: API响应的JSON数据
+        """
+        adaptive = self.config.ADAPTIVE_MAX_TOKENS and budget_key
+        reasoning = self.available_models.get(model_name, {}).get("reasoning", False)
+        max_tokens = self.token_budget.budget(budget_key, cap, question, reasoning) if adaptive else cap
+
+        while True:
+            data = {
+                "model": model_name,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.1,
+                "max_tokens": max_tokens
+            }
+            if stop:
+                data["stop"] = stop
+            if json_mode and self.available_models.get(model_name, {}).get("supports_json_mode"):
+                data["response_format"] = {"type": "json_object"}
+
+            start = time.perf_counter()
+            result = self._make_api_call(model_name, data, stage=budget_key.split(':')[0] if budget_key else "llm")
+            latency = time.perf_counter() - start
+
+            choice = (result.get("choices") or [{}])[0]
+            truncated = choice.get("finish_reason") == "length"
+            if budget_key:
+                completion_tokens = result.get("usage", {}).get("completion_tokens") or \
+                    estimate_tokens(choice.get("message", {}).get("content", ""))
+                self.token_budget.record(budget_key, completion_tokens, max_tokens, latency, truncated, reasoning)
+
+            if truncated and max_tokens < cap:
+                logger.warning(f"回答达到输出预算 {max_tokens} 被截断，以上限 {cap} 重新请求")
+                max_tokens = cap
+                continue
+            return result
+
+    def call_text_model(self, content: str, question: str, prompt: Optional[str] = None,
+                        budget_key: Optional[str] = None) -> str:
         """
         调用文本模型进行问答
 
         Args:
             content: 文献内容
             question: 问题
+            prompt: 已渲染的完整提示词（CompiledQuestion.render），为空时按模板生成
+            budget_key: 输出预算统计键（qa:<问题哈希>），为空时使用输出上限
 
         Returns:
             str: 模型回答
@@ -285,26 +323,11 @@ class PaperAnalyzer:
             model_name = self.config.TEXT_MODEL
 
             # 设置提示词
-            prompt = f"""请基于以下文献内容回答问题：
-
-文献内容：
-{content}
-
-问题：{question}
-
-请提供详细和准确的回答。如果文献中没有相关信息，请明确说明。"""
+            if prompt is None:
+                prompt = QA_PROMPT_TEMPLATE.format(content=content, question=question)
 
-            data = {
-                "model": model_name,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.1,
-                "max_tokens": 2000
-            }
-
-            # 使用集中的API调用方法
-            result = self._make_api_call(model_name, data)
+            # 使用集中的API调用方法，输出预算按问题历史回答长度自适应
+            result = self._call_with_budget(model_name, prompt, budget_key, self.config.QA_MAX_TOKENS_CAP, question)
 
             # 处理DeepSeek Reasoner模型的特殊返回
             if "choices" in result and "message" in result["choices"][0]:
@@ -322,21 +345,26 @@ class PaperAnalyzer:
             logger.error(f"调用文本模型时出错: {e}")
             return f"调用出错: {str(e)}"
 
-    def call_vision_model(self, image_path: str) -> str:
+    def call_vision_model(self, image_path: str, question: Optional[str] = None,
+                          prepared: Optional[Dict[str, Any]] = None) -> str:
         """
         调用视觉模型分析图片
 
         Args:
             image_path: 图片文件路径
+            question: 自定义提问，为空时使用默认的图片分析提示词
+            prepared: 已完成预处理的图片数据（prepare_image的返回值），为空时在当前线程准备。
+                      请求体构造完成后其中的Base64数据会被释放
 
         Returns:
             str: 图片分析结果
         """
         try:
             # 准备图片数据
-            success, image_data, error_msg = self.prepare_image_for_api(image_path)
-            if not success:
-                return f"图片处理失败: {error_msg}"
+            if prepared is None:
+                prepared = prepare_image(image_path, self.supported_image_formats, self.max_image_size_mb)
+            if not prepared["success"]:
+                return f"图片处理失败: {prepared['error']}"
 
             # 使用配置中的图像模型
             model_name = self.config.IMAGE_MODEL
@@ -349,11 +377,8 @@ class PaperAnalyzer:
             if not model_supports_vision:
                 return f"模型 {model_name} 不支持图像分析"
 
-            question = """请详细分析这张图片，包括：
-1. 图片类型（图表、流程图、架构图、实验结果等）
-2. 主要内容和关键信息
-3. 数据或结果的重要发现
-4. 与研究方法或结论的关系"""
+            if not question:
+                question = IMAGE_ANALYSIS_QUESTION
 
             # 使用正确的多模态格式
             data = {
@@ -366,7 +391,7 @@ class PaperAnalyzer:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": image_data
+                                    "url": IMAGE_URL_PLACEHOLDER
                                 }
                             }
                         ]
@@ -379,17 +404,27 @@ class PaperAnalyzer:
             # 日志记录请求（不包含图片数据）
             logger.info(f"发送图片分析请求: 模型={model_name}, 文件={os.path.basename(image_path)}")
 
+            # 一次性拼接请求体，随后释放Base64数据，每个请求只保留一份图片副本
+            body = build_vision_request_body(data, prepared["mime_type"], prepared["image_base64"])
+            prepared["image_base64"] = b""
+
             try:
                 # 直接使用请求而不是_make_api_call，以便更好地处理错误
-                response = requests.post(
-                    self._get_api_endpoint(model_name),
-                    headers=self.headers,
-                    json=data,
-                    timeout=90  # 增加超时时间，图片分析可能需要更长时间
-                )
+                with track_call("image", model_name, image=os.path.basename(image_path),
+                                request_bytes=len(body)) as call:
+                    response = requests.post(
+                        self._get_api_endpoint(model_name),
+                        headers=self.headers,
+                        data=body,
+                        timeout=90  # 增加超时时间，图片分析可能需要更长时间
+                    )
+                    call.set_response(response)
+                    if response.status_code == 200:
+                        result = response.json()
+                        call.set_usage(result)
+                del body
 
                 if response.status_code == 200:
-                    result = response.json()
                     return result['choices'][0]['message']['content'].strip()
                 else:
                     error_text = response.text if response.text else f"状态码: {response.status_code}"
@@ -423,71 +458,70 @@ class PaperAnalyzer:
             # 使用配置中的文本模型
             model_name = self.config.TEXT_MODEL
 
-            prompt = f"""请从以下文献内容中提取数据集相关信息，以JSON格式返回：
-
-文献内容：
-{content}
-
-请提取以下信息（如果文献中没有相关信息，对应字段返回null）：
-{{
-    "datasets_used": ["数据集名称列表"],
-    "dataset_sources": ["数据集来源或链接"],
-    "dataset_sizes": ["数据集大小描述"],
-    "data_preprocessing": "数据预处理方法描述",
-    "evaluation_metrics": ["评估指标列表"],
-    "experimental_setup": "实验设置描述"
-}}
-
-只返回JSON格式的结果，不要其他解释。"""
-
-            data = {
-                "model": model_name,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.1,
-                "max_tokens": 1000
-            }
-
-            # 使用集中的API调用方法
-            result = self._make_api_call(model_name, data)
-            content = result['choices'][0]['message']['content'].strip()
+            prompt = DATASET_INFO_PROMPT_TEMPLATE.format(content=content)
+
+            # 使用集中的API调用方法，支持JSON模式的模型直接要求JSON输出
+            result = self._call_with_budget(model_name, prompt, "dataset_info",
+                                            self.config.DATASET_INFO_MAX_TOKENS_CAP,
+                                            stop=STOP_SEQUENCES["dataset_info"], json_mode=True)
+            response = result['choices'][0]['message']['content'].strip()
+
+            # 宽松解析：代码块标记、尾逗号、中文引号、截断等问题在本地修复
+            parsed = repair_json(response)
+            if parsed is None:
+                logger.warning("解析数据集信息JSON失败，重新提取一次")
+                result = self._call_with_budget(model_name, prompt, "dataset_info",
+                                                self.config.DATASET_INFO_MAX_TOKENS_CAP, json_mode=True)
+                response = result['choices'][0]['message']['content'].strip()
+                parsed = repair_json(response)
+                if parsed is None:
+                    logger.warning("解析数据集信息JSON失败")
+                    return {"raw_response": response}
+
+            # 按字段校验，缺失或无效的字段合并为一次追问
+            dataset_info, invalid_fields = validate_object(parsed, DATASET_INFO_SCHEMA)
+            if invalid_fields:
+                logger.info(f"数据集信息字段 {', '.join(invalid_fields)} 缺失或格式无效，追问一次")
+                try:
+                    field_result = self._call_with_budget(
+                        model_name, build_fields_reask_prompt(invalid_fields, DATASET_INFO_SCHEMA, content),
+                        "dataset_info_field",
+                        min(self.config.DATASET_INFO_MAX_TOKENS_CAP,
+                            self.config.DATASET_INFO_FIELD_MAX_TOKENS * len(invalid_fields)),
+                        json_mode=True)
+                    dataset_info.update(parse_fields_answer(field_result['choices'][0]['message']['content'],
+                                                            invalid_fields, DATASET_INFO_SCHEMA))
+                except Exception as e:
+                    # 追问失败只影响这些字段，已通过校验的字段保留
+                    logger.error(f"追问数据集信息字段失败: {e}")
+                    dataset_info.update({field: None for field in invalid_fields})
 
-            # 尝试解析JSON
-            try:
-                # 清理可能的markdown代码块标记
-                if content.startswith('```'):
-                    content = content.split('\n', 1)[1]
-                if content.endswith('```'):
-                    content = content.rsplit('\n', 1)[0]
-
-                # 移除可能的json前缀
-                if content.startswith('json'):
-                    content = content[4:].strip()
-
-                dataset_info = json.loads(content)
-                return dataset_info
-            except json.JSONDecodeError as e:
-                logger.warning(f"解析数据集信息JSON失败: {e}")
-                return {"raw_response": content}
+            return dataset_info
 
         except Exception as e:
             logger.error(f"提取数据集信息时出错: {e}")
             return {"error": str(e)}
 
-    def analyze_single_paper(self, paper_info: Dict[str, Any]) -> Dict[str, Any]:
+    @traced("analyze_paper")
+    def analyze_single_paper(self, paper_info: Dict[str, Any], incremental: bool = False,
+                             profiles: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """
         分析单篇论文
 
+        多个问题配置共用同一份准备好的文献内容：文献只读取与预处理一次，
+        所有问题的提示词共享相同的文献前缀（可命中服务端前缀缓存），
+        不同配置中相同的问题只回答一次。
+
         Args:
             paper_info: 论文信息，包含paper_id, paper_dir, main_md_file等
+            incremental: 是否增量分析，为True时复用已有结果中指纹未变化的条目
+            profiles: 问题配置 {配置名: 问题文件路径}，默认使用get_question_profiles()
 
         Returns:
             Dict: 分析结果
         """
         paper_id = paper_info.get('paper_id', 'unknown')
         paper_dir = paper_info.get('paper_dir', '')
-        main_md_file = paper_info.get('main_md_file', '')
 
         logger.info(f"开始分析论文: {paper_id}")
 
@@ -496,80 +530,157 @@ class PaperAnalyzer:
             "title": paper_info.get('title', ''),
             "analysis_status": "processing",
             "qa_results": {},
+            "profile_results": {},
             "dataset_info": {},
+            "table_data": {},
             "image_analysis": {},
             "summary": ""
         }
+        reuse_stats = {"reused": 0, "recomputed": 0}
+        profiles = profiles or self.get_question_profiles()
 
         try:
-            # 1. 读取markdown文件内容
-            if not main_md_file or not os.path.exists(main_md_file):
-                logger.error(f"Markdown文件不存在: {main_md_file}")
-                result["analysis_status"] = "failed"
-                result["error"] = "Markdown文件不存在"
-                return result
-
-            md_content = self.read_markdown_content(main_md_file)
-            if not md_content:
-                logger.error(f"无法读取markdown内容: {main_md_file}")
+            # 1. 读取markdown文件内容（表格HTML替换为紧凑文本）
+            md_content, table_data, table_image_paths, error = self._prepare_document(paper_info)
+            if error:
                 result["analysis_status"] = "failed"
-                result["error"] = "无法读取markdown内容"
+                result["error"] = error
                 return result
+            result["table_data"] = table_data
+            source_hash = sha256_text(md_content)
+
+            # 本地规则抽取：染色、放大倍数、图像块尺寸、标准化方法、骨干网络与链接等候选信息
+            candidates = self._extract_local_candidates(md_content)
+            if candidates:
+                result["local_candidates"] = candidates
+
+            # 检查点：恢复中断前已完成的问题、图片与数据集信息
+            checkpoint = self._get_checkpoint(paper_info)
+
+            # 增量分析：已有结果中指纹一致的条目直接复用
+            previous = self._load_previous_result(paper_info) if incremental else {}
+            previous_images = {entry.get("file_name"): entry for entry in previous.get("image_analysis", {}).values()
+                               if isinstance(entry, dict)}
+
+            # 分章节摘要模式：摘要在第一个需要回答的问题处生成（或从缓存读取），之后所有问题共用
+            digest_state = {}
+
+            def get_digest() -> Dict[str, Any]:
+                if "digest" not in digest_state:
+                    digest_state["digest"] = self.build_section_digests(paper_info, md_content)
+                return digest_state["digest"]
+
+            # 2-3. 按问题配置依次问答，相同的问题在本篇论文内只回答一次
+            answered: Dict[str, Dict[str, Any]] = {}
+            for profile_name, question_file in profiles.items():
+                questions = self.load_questions(question_file)
+                if not questions:
+                    logger.warning(f"问题配置 {profile_name} 没有加载到问题，跳过问答分析")
+                    continue
 
-            # 2. 加载问题列表
-            questions = self.read_question_file(self.config.QUESTION_FILE)
-            if not questions:
-                logger.warning("没有加载到问题，跳过问答分析")
-            else:
-                # 3. 对每个问题进行问答
-                logger.info(f"开始问答分析，共 {len(questions)} 个问题")
-                for i, question_data in enumerate(questions, 1):
-                    question_title = question_data["title"]
-                    question_content = question_data.get("content", "")
-
-                    # 组合完整问题
-                    full_question = question_title
-                    if question_content:
-                        full_question += "\n" + question_content
-
-                    logger.info(f"处理问题 {i}/{len(questions)}: {question_title[:50]}...")
-
-                    answer = self.call_text_model(md_content, full_question)
-                    result["qa_results"][f"question_{i}"] = {
-                        "title": question_title,
-                        "content": question_content,
-                        "answer": answer
-                    }
+                logger.info(f"开始问答分析 [{profile_name}]，共 {len(questions)} 个问题")
+                qa_results = self._answer_questions(
+                    questions, md_content, source_hash, checkpoint,
+                    self._previous_profile_qa(previous, profile_name), answered, reuse_stats,
+                    get_digest if self.config.ENABLE_SECTION_DIGEST else None, candidates
+                )
+                if profile_name == DEFAULT_PROFILE:
+                    result["qa_results"] = qa_results
+                else:
+                    result["profile_results"][profile_name] = qa_results
 
             # 4. 提取数据集信息
-            logger.info("提取数据集信息")
-            result["dataset_info"] = self.extract_dataset_info(md_content)
-
-            # 5. 分析图片
-            image_files = self.get_image_files(paper_dir)
+            dataset_fingerprint = self._dataset_fingerprint(source_hash)
+            result["dataset_info_fingerprint"] = dataset_fingerprint
+            saved_dataset_info = checkpoint.get("dataset_info", dataset_fingerprint["hash"]) if checkpoint else None
+            if saved_dataset_info is None and previous.get("dataset_info_fingerprint") == dataset_fingerprint \
+                    and self._is_valid_dataset_info(previous.get("dataset_info")):
+                saved_dataset_info = previous["dataset_info"]
+
+            if saved_dataset_info is not None:
+                logger.info("数据集信息已有有效结果，跳过")
+                result["dataset_info"] = saved_dataset_info
+                reuse_stats["reused"] += 1
+            else:
+                logger.info("提取数据集信息")
+                result["dataset_info"] = self.extract_dataset_info(md_content)
+                reuse_stats["recomputed"] += 1
+                if checkpoint and self._is_valid_dataset_info(result["dataset_info"]):
+                    checkpoint.record("dataset_info", dataset_fingerprint["hash"], result["dataset_info"])
+
+            # 5. 分析图片（已在本地解析的表格截图不再调用视觉模型）
+            image_files = [p for p in self.get_image_files(paper_dir)
+                           if os.path.normcase(os.path.normpath(p)) not in table_image_paths]
             if image_files:
                 logger.info(f"开始分析 {len(image_files)} 张图片")
+
+                # 已完成且指纹一致的图片直接恢复，只对剩余图片调用视觉模型
+                pending_images = {}
+                image_fingerprints = {}
                 for i, image_path in enumerate(image_files, 1):
-                    logger.info(f"分析图片 {i}/{len(image_files)}: {os.path.basename(image_path)}")
+                    file_name = os.path.basename(image_path)
+                    fingerprint = self._image_fingerprint(
+                        image_path, self._table_fallback_question(table_data, image_path))
+                    image_fingerprints[image_path] = fingerprint
+                    saved = self._reusable_entry(
+                        fingerprint,
+                        checkpoint.get("image", file_name) if checkpoint else None,
+                        previous_images.get(file_name)
+                    )
+                    if saved:
+                        saved = dict(saved, file_path=image_path)
+                        result["image_analysis"][f"image_{i}"] = saved
+                        reuse_stats["reused"] += 1
+                    else:
+                        pending_images[image_path] = i
+                if len(pending_images) < len(image_files):
+                    logger.info(f"{len(image_files) - len(pending_images)} 张图片已有有效结果，跳过")
+
+                # 图片预处理在进程池中进行，与视觉模型请求重叠执行
+                with ImagePreparePool(max_workers=self.config.IMAGE_PREP_WORKERS,
+                                      max_pending=self.config.IMAGE_PREP_MAX_PENDING,
+                                      max_pending_mb=self.config.IMAGE_PREP_MAX_PENDING_MB,
+                                      supported_formats=self.supported_image_formats,
+                                      max_image_size_mb=self.max_image_size_mb) as image_pool:
+                    for prepared in image_pool.imap(list(pending_images)):
+                        image_path = prepared["image_path"]
+                        i = pending_images[image_path]
+                        logger.info(f"分析图片 {i}/{len(image_files)}: {os.path.basename(image_path)}")
+
+                        failed = True
+                        if not prepared["compatible"]:
+                            logger.warning(f"图片 {os.path.basename(image_path)} 不兼容: {prepared['error']}")
+                            image_analysis = f"图片不兼容，无法处理: {prepared['error']}"
+                        elif not prepared["success"]:
+                            image_analysis = f"图片处理失败: {prepared['error']}"
+                        else:
+                            # 调用视觉模型分析图片
+                            image_analysis = self.call_vision_model(
+                                image_path,
+                                self._table_fallback_question(table_data, image_path),
+                                prepared=prepared
+                            )
+                            failed = self._is_failed_answer(image_analysis)
+                        prepared["image_base64"] = b""
+                        reuse_stats["recomputed"] += 1
 
-                    # 先检查图片是否兼容
-                    is_compatible, reason = self.is_compatible_image(image_path)
-                    if not is_compatible:
-                        logger.warning(f"图片 {os.path.basename(image_path)} 不兼容: {reason}")
                         result["image_analysis"][f"image_{i}"] = {
                             "file_path": image_path,
                             "file_name": os.path.basename(image_path),
-                            "analysis": f"图片不兼容，无法处理: {reason}"
+                            "analysis": image_analysis,
+                            "fingerprint": image_fingerprints[image_path]
                         }
-                        continue
-
-                    # 调用视觉模型分析图片
-                    image_analysis = self.call_vision_model(image_path)
-                    result["image_analysis"][f"image_{i}"] = {
-                        "file_path": image_path,
-                        "file_name": os.path.basename(image_path),
-                        "analysis": image_analysis
-                    }
+                        if checkpoint and not failed:
+                            checkpoint.record("image", os.path.basename(image_path), result["image_analysis"][f"image_{i}"])
+
+                    result["image_prep_timings"] = image_pool.report()
+
+                result["image_analysis"] = dict(sorted(result["image_analysis"].items(),
+                                                       key=lambda item: int(item[0].split('_')[1])))
+
+            if incremental:
+                result["incremental_stats"] = reuse_stats
+                logger.info(f"增量分析: 复用 {reuse_stats['reused']} 项，重新计算 {reuse_stats['recomputed']} 项")
 
             # 6. 生成总结
             logger.info("生成论文分析总结")
@@ -585,6 +696,502 @@ class PaperAnalyzer:
 
         return result
 
+    def get_question_profiles(self) -> Dict[str, str]:
+        """
+        获取问题配置：默认配置为QUESTION_FILE，QUESTION_PROFILE_DIR下的每个txt文件为一个额外配置
+
+        Returns:
+            Dict[str, str]: {配置名: 问题文件路径}
+        """
+        profiles = {DEFAULT_PROFILE: self.config.QUESTION_FILE}
+        profile_dir = self.config.QUESTION_PROFILE_DIR
+        if profile_dir and os.path.isdir(profile_dir):
+            for file in sorted(os.listdir(profile_dir)):
+                name, ext = os.path.splitext(file)
+                if ext.lower() == '.txt' and name != DEFAULT_PROFILE:
+                    profiles[name] = os.path.join(profile_dir, file)
+        return profiles
+
+    @staticmethod
+    def _previous_profile_qa(previous: Dict[str, Any], profile_name: str) -> Dict[str, Dict[str, Any]]:
+        """已有结果中某个问题配置的问答，按问题标题索引"""
+        if profile_name == DEFAULT_PROFILE:
+            qa_results = previous.get("qa_results", {})
+        else:
+            qa_results = previous.get("profile_results", {}).get(profile_name, {})
+        return {entry.get("title"): entry for entry in qa_results.values() if isinstance(entry, dict)}
+
+    def _answer_questions(self, questions: List[CompiledQuestion], md_content: str, source_hash: str,
+                          checkpoint: Optional[PaperCheckpoint], previous_qa: Dict[str, Dict[str, Any]],
+                          answered: Dict[str, Dict[str, Any]], reuse_stats: Dict[str, int],
+                          get_digest: Optional[Callable[[], Dict[str, Any]]] = None,
+                          candidates: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """
+        回答一组问题
+
+        Args:
+            questions: 编译后的问题列表
+            md_content: 文献内容
+            source_hash: 文献内容哈希
+            checkpoint: 检查点日志
+            previous_qa: 已有结果（增量分析时），按标题索引
+            answered: 本篇论文已回答的问题（按version_hash索引），跨问题配置共享
+            reuse_stats: 复用/重算计数
+            get_digest: 分章节摘要模式下获取论文摘要的函数，为空时使用全文提问
+            candidates: 本地规则抽取的候选信息
+
+        Returns:
+            Dict: 问答结果
+        """
+        qa_results = {}
+        for question in questions:
+            i = question.index
+            hints = self._local_hints(question, candidates)
+            fingerprint = self._question_fingerprint(question, source_hash, hints)
+
+            saved = self._reusable_entry(
+                fingerprint,
+                answered.get(question.version_hash),
+                checkpoint.get("question", question.version_hash) if checkpoint else None,
+                previous_qa.get(question.title)
+            )
+            if saved:
+                logger.info(f"问题 {i}/{len(questions)} 已有有效结果，跳过: {question.title[:50]}")
+                qa_results[question.key] = dict(saved, title=question.title)
+                answered[question.version_hash] = saved
+                reuse_stats["reused"] += 1
+                continue
+
+            # 问题只针对单个字段且本地候选置信度足够高时，不再调用模型
+            local_answer = direct_answer(question.title, candidates or {}, self.config.LOCAL_ANSWER_MIN_CONFIDENCE,
+                                         question.field) if self.config.ENABLE_LOCAL_EXTRACTION else None
+            if local_answer:
+                logger.info(f"问题 {i}/{len(questions)} 由本地规则直接回答: {question.title[:50]}")
+                qa_results[question.key] = {
+                    "title": question.title,
+                    "content": question.content,
+                    "answer": local_answer,
+                    "source": "local_rules",
+                    "fingerprint": fingerprint
+                }
+                answered[question.version_hash] = qa_results[question.key]
+                reuse_stats["recomputed"] += 1
+                continue
+
+            logger.info(f"处理问题 {i}/{len(questions)}: {question.title[:50]}...")
+
+            if get_digest:
+                prompt = render_digest_prompt(question.full_question, get_digest(),
+                                              self.config.DIGEST_EXCERPT_MAX_CHARS)
+            else:
+                prompt = question.render(md_content)
+            with telemetry_context(question_id=question.title):
+                answer = self.call_text_model(md_content, question.full_question, prompt=prompt + hints,
+                                              budget_key=f"qa:{question.question_hash}")
+            qa_results[question.key] = {
+                "title": question.title,
+                "content": question.content,
+                "answer": answer,
+                "fingerprint": fingerprint
+            }
+            reuse_stats["recomputed"] += 1
+            if not self._is_failed_answer(answer):
+                answered[question.version_hash] = qa_results[question.key]
+                if checkpoint:
+                    checkpoint.record("question", question.version_hash, qa_results[question.key])
+
+        return qa_results
+
+    def _extract_local_candidates(self, md_content: str) -> Dict[str, List[Dict[str, Any]]]:
+        """本地规则抽取候选信息，未启用或抽取失败时返回空字典"""
+        if not self.config.ENABLE_LOCAL_EXTRACTION:
+            return {}
+        try:
+            return extract_candidates(md_content)
+        except Exception as e:
+            logger.warning(f"本地规则抽取失败: {e}")
+            return {}
+
+    def _local_hints(self, question: CompiledQuestion, candidates: Optional[Dict[str, List[Dict[str, Any]]]]) -> str:
+        """与问题相关的本地候选提示，追加在问题之后（不影响文献前缀的缓存命中）"""
+        if not candidates:
+            return ""
+        return format_candidate_hints(candidates, question_fields(question.full_question))
+
+    def build_section_digests(self, paper_info: Dict[str, Any], md_content: str) -> Dict[str, Any]:
+        """
+        生成论文的分章节摘要（方法、数据、预处理、训练、结果）
+
+        每个类别的摘要以章节文本、模型与提示词版本的哈希缓存在result/section_digests.json中，
+        章节内容未变化时直接复用。
+
+        Args:
+            paper_info: 论文信息
+            md_content: 文献内容
+
+        Returns:
+            Dict: lead（摘要导语）、digests（类别 -> 摘要）与paragraphs（原文段落）
+        """
+        grouped = group_sections(md_content)
+        cache = SectionDigestCache(self._result_dir(paper_info))
+        cache.load()
+
+        digests = {}
+        updated = False
+        for category, section_text in grouped["categories"].items():
+            section_text = section_text[:self.config.DIGEST_SECTION_MAX_CHARS]
+            section_hash = self._digest_hash(section_text)
+            digest = cache.get(category, section_hash)
+            if digest is None:
+                logger.info(f"生成章节摘要: {DIGEST_CATEGORIES[category]}（{len(section_text)} 字符）")
+                prompt = DIGEST_PROMPT_TEMPLATE.format(label=DIGEST_CATEGORIES[category], content=section_text,
+                                                       max_chars=self.config.DIGEST_MAX_CHARS)
+                digest = self.call_text_model(section_text, DIGEST_CATEGORIES[category], prompt=prompt,
+                                              budget_key=f"digest:{category}")
+                if self._is_failed_answer(digest):
+                    # 摘要生成失败时该类别退回使用原文章节
+                    logger.warning(f"章节摘要生成失败，使用原文: {DIGEST_CATEGORIES[category]}")
+                    digest = section_text
+                else:
+                    cache.put(category, section_hash, digest)
+                    updated = True
+            digests[category] = digest
+
+        if updated:
+            cache.save()
+        return {"lead": grouped["lead"], "digests": digests, "paragraphs": grouped["paragraphs"]}
+
+    def _digest_hash(self, section_text: str) -> str:
+        """章节摘要缓存键：章节文本、模型与提示词版本的哈希"""
+        return sha256_text(f"{self.config.TEXT_MODEL}:{DIGEST_PROMPT_VERSION}:{section_text}")
+
+    @staticmethod
+    def _result_dir(paper_info: Dict[str, Any]) -> str:
+        return paper_info.get('result_dir', '') or os.path.join(paper_info.get('paper_dir', ''), 'result')
+
+    def _prepare_document(self, paper_info: Dict[str, Any], save_tables: bool = True):
+        """
+        读取论文markdown并完成表格处理
+
+        Args:
+            paper_info: 论文信息
+            save_tables: 是否将解析出的表格写入result目录
+
+        Returns:
+            Tuple: (markdown内容, 表格数据, 已解析表格截图路径集合, 错误信息)
+        """
+        main_md_file = paper_info.get('main_md_file', '')
+        if not main_md_file or not os.path.exists(main_md_file):
+            logger.error(f"Markdown文件不存在: {main_md_file}")
+            return "", {}, set(), "Markdown文件不存在"
+
+        md_content = self.read_markdown_content(main_md_file)
+        if not md_content:
+            logger.error(f"无法读取markdown内容: {main_md_file}")
+            return "", {}, set(), "无法读取markdown内容"
+
+        # 表格：本地解析MinerU表格结构，问答中使用紧凑文本替代表格HTML
+        table_data = {}
+        table_image_paths = set()
+        if self.config.ENABLE_TABLE_EXTRACTION:
+            table_data = self.extract_paper_tables(paper_info, main_md_file, save=save_tables)
+            table_image_paths = {os.path.normcase(t["image_path"]) for t in table_data.values()
+                                 if t.get("parsed") and t.get("image_path")}
+            md_content = compact_tables_in_markdown(md_content, self.config.TABLE_TEXT_MAX_CHARS)
+
+        return md_content, table_data, table_image_paths, ""
+
+    def _question_fingerprint(self, question: CompiledQuestion, source_hash: str, hints: str = "") -> Dict[str, str]:
+        """问答结果指纹：问题文本、模型、提示词版本与文献内容的哈希"""
+        fingerprint = {
+            "question_hash": question.question_hash,
+            "model": self.config.TEXT_MODEL,
+            "prompt_version": question.prompt_version,
+            "source_hash": source_hash
+        }
+        if self.config.ENABLE_SECTION_DIGEST:
+            # 分章节摘要模式与全文模式的回答互不复用
+            fingerprint["digest_version"] = DIGEST_PROMPT_VERSION
+        if hints:
+            fingerprint["local_hints"] = hints_version(hints)
+        return fingerprint
+
+    def _dataset_fingerprint(self, source_hash: str) -> Dict[str, str]:
+        """数据集信息提取结果指纹"""
+        fingerprint = {
+            "model": self.config.TEXT_MODEL,
+            "prompt_version": PROMPT_VERSIONS["dataset_info"],
+            "source_hash": source_hash
+        }
+        fingerprint["hash"] = sha256_text(json.dumps(fingerprint, sort_keys=True))
+        return fingerprint
+
+    def _image_fingerprint(self, image_path: str, question: Optional[str] = None) -> Dict[str, str]:
+        """图片分析结果指纹：图片内容、模型与提示词版本的哈希"""
+        try:
+            image_hash = sha256_file(image_path)
+        except OSError:
+            image_hash = ""
+        return {
+            "image_hash": image_hash,
+            "model": self.config.IMAGE_MODEL,
+            "prompt_version": sha256_text(question, 8) if question else PROMPT_VERSIONS["image"]
+        }
+
+    def _reusable_entry(self, fingerprint: Dict[str, str], *candidates: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """从候选结果中找出指纹一致且不是错误信息的条目"""
+        for candidate in candidates:
+            if not candidate or candidate.get("fingerprint") != fingerprint:
+                continue
+            answer = candidate.get("answer", candidate.get("analysis", ""))
+            if not self._is_failed_answer(answer):
+                return candidate
+        return None
+
+    @staticmethod
+    def _is_valid_dataset_info(dataset_info: Any) -> bool:
+        """数据集信息是否为成功解析的结果"""
+        return isinstance(dataset_info, dict) and bool(dataset_info) \
+            and "error" not in dataset_info and "raw_response" not in dataset_info
+
+    def _load_previous_result(self, paper_info: Dict[str, Any]) -> Dict[str, Any]:
+        """读取论文result目录下已有的分析结果"""
+        result_dir = paper_info.get('result_dir', '') or os.path.join(paper_info.get('paper_dir', ''), 'result')
+        result_file = os.path.join(result_dir, 'analysis_result.json')
+        if not os.path.exists(result_file):
+            return {}
+
+        try:
+            with open(result_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取已有分析结果失败 {result_file}: {e}")
+            return {}
+
+    def _estimate_cost(self, model_name: str, input_tokens: int, output_tokens: int) -> float:
+        """按模型价格表估算费用（元），价格未配置的模型返回0"""
+        prices = self.available_models.get(model_name, {}).get("price_per_million")
+        if not prices:
+            return 0.0
+        return (input_tokens * prices.get("input", 0) + output_tokens * prices.get("output", 0)) / 1_000_000
+
+    @staticmethod
+    def _stale_reasons(fingerprint: Dict[str, str], previous: Optional[Dict[str, str]]) -> List[str]:
+        """列出指纹中发生变化的字段"""
+        if previous is None:
+            return ["无已有结果"]
+        if not previous:
+            return ["已有结果缺少指纹"]
+        return [key for key, value in fingerprint.items() if key != "hash" and previous.get(key) != value] \
+            or ["已有结果为错误信息"]
+
+    def plan_reanalysis(self, paper_info: Dict[str, Any], incremental: bool = True) -> Dict[str, Any]:
+        """
+        预估重新分析需要重新计算的条目（dry-run，不调用API）
+
+        由本地规则直接回答的问题与不能通过图片检查的图片不计入模型调用。
+
+        Args:
+            paper_info: 论文信息
+            incremental: 为True时按增量分析预估（指纹未变化的条目复用），为False时按全量分析预估
+
+        Returns:
+            Dict: 过期条目列表及预估token与费用
+        """
+        plan = {
+            "paper_id": paper_info.get('paper_id', 'unknown'),
+            "stale_items": [],
+            "reused_count": 0,
+            "local_answer_count": 0,
+            "skipped_images": [],
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "estimated_cost": 0.0
+        }
+
+        md_content, table_data, table_image_paths, error = self._prepare_document(paper_info, save_tables=False)
+        if error:
+            plan["error"] = error
+            return plan
+
+        source_hash = sha256_text(md_content)
+        previous = self._load_previous_result(paper_info) if incremental else {}
+        previous_images = {entry.get("file_name"): entry for entry in previous.get("image_analysis", {}).values()
+                           if isinstance(entry, dict)}
+
+        def add_stale(kind: str, name: str, model: str, reasons: List[str], input_tokens: int, output_tokens: int):
+            plan["stale_items"].append({
+                "kind": kind,
+                "name": name,
+                "model": model,
+                "reasons": reasons if incremental else ["全量分析"],
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens
+            })
+            plan["input_tokens"] += input_tokens
+            plan["output_tokens"] += output_tokens
+            plan["estimated_cost"] += self._estimate_cost(model, input_tokens, output_tokens)
+
+        # 分章节摘要：缓存未命中的类别需要生成摘要，问答输入按摘要长度估算
+        digest = None
+        if self.config.ENABLE_SECTION_DIGEST:
+            grouped = group_sections(md_content)
+            cache = SectionDigestCache(self._result_dir(paper_info))
+            cache.load()
+            digest = {"lead": grouped["lead"], "digests": {}, "paragraphs": grouped["paragraphs"]}
+            for category, section_text in grouped["categories"].items():
+                section_text = section_text[:self.config.DIGEST_SECTION_MAX_CHARS]
+                cached = cache.get(category, self._digest_hash(section_text))
+                if cached is None:
+                    add_stale("section_digest", DIGEST_CATEGORIES[category], self.config.TEXT_MODEL, ["无章节摘要缓存"],
+                              estimate_tokens(section_text) + estimate_tokens(DIGEST_PROMPT_TEMPLATE),
+                              estimate_tokens("摘" * self.config.DIGEST_MAX_CHARS))
+                    cached = "摘" * self.config.DIGEST_MAX_CHARS
+                else:
+                    plan["reused_count"] += 1
+                digest["digests"][category] = cached
+
+        # 问答（各问题配置中相同的问题只计算一次）
+        candidates = self._extract_local_candidates(md_content)
+        planned = set()
+        for profile_name, question_file in self.get_question_profiles().items():
+            previous_qa = self._previous_profile_qa(previous, profile_name)
+            for question in self.load_questions(question_file):
+                hints = self._local_hints(question, candidates)
+                fingerprint = self._question_fingerprint(question, source_hash, hints)
+                previous_entry = previous_qa.get(question.title)
+                if question.version_hash in planned or self._reusable_entry(fingerprint, previous_entry):
+                    plan["reused_count"] += 1
+                    continue
+                planned.add(question.version_hash)
+
+                if self.config.ENABLE_LOCAL_EXTRACTION and direct_answer(
+                        question.title, candidates, self.config.LOCAL_ANSWER_MIN_CONFIDENCE, question.field):
+                    plan["local_answer_count"] += 1
+                    continue
+
+                # 输出长度依次参考：输出预算统计中的历史回答、已有结果中的回答、默认值
+                previous_answer = previous_entry.get("answer", "") if previous_entry else ""
+                output_tokens = self.token_budget.expected_tokens(f"qa:{question.question_hash}")
+                if output_tokens is None:
+                    output_tokens = estimate_tokens(previous_answer) if previous_answer and \
+                        not self._is_failed_answer(previous_answer) else DEFAULT_OUTPUT_TOKENS["qa"]
+                name = question.title if profile_name == DEFAULT_PROFILE else f"{profile_name}/{question.title}"
+                add_stale("question", name, self.config.TEXT_MODEL,
+                          self._stale_reasons(fingerprint,
+                                              previous_entry.get("fingerprint", {}) if previous_entry else None),
+                          estimate_tokens(render_digest_prompt(question.full_question, digest,
+                                                               self.config.DIGEST_EXCERPT_MAX_CHARS)
+                                          if digest else question.render(md_content)) + estimate_tokens(hints),
+                          output_tokens)
+
+        # 数据集信息
+        dataset_fingerprint = self._dataset_fingerprint(source_hash)
+        if previous.get("dataset_info_fingerprint") == dataset_fingerprint \
+                and self._is_valid_dataset_info(previous.get("dataset_info")):
+            plan["reused_count"] += 1
+        else:
+            add_stale("dataset_info", "数据集信息", self.config.TEXT_MODEL,
+                      self._stale_reasons(dataset_fingerprint, previous.get("dataset_info_fingerprint",
+                                                                            {} if previous else None)),
+                      estimate_tokens(DATASET_INFO_PROMPT_TEMPLATE.format(content=md_content)),
+                      self.token_budget.expected_tokens("dataset_info") or DEFAULT_OUTPUT_TOKENS["dataset_info"])
+
+        # 图片
+        image_files = [p for p in self.get_image_files(paper_info.get('paper_dir', ''))
+                       if os.path.normcase(os.path.normpath(p)) not in table_image_paths]
+        for image_path in image_files:
+            file_name = os.path.basename(image_path)
+            question = self._table_fallback_question(table_data, image_path)
+            fingerprint = self._image_fingerprint(image_path, question)
+            previous_entry = previous_images.get(file_name)
+            if self._reusable_entry(fingerprint, previous_entry):
+                plan["reused_count"] += 1
+                continue
+            # 与实际分析相同的图片检查：格式、大小与尺寸不符合要求的图片不会调用视觉模型
+            compatible, reason = self.is_compatible_image(image_path)
+            if not compatible:
+                plan["skipped_images"].append({"name": file_name, "reason": reason})
+                continue
+            add_stale("image", file_name, self.config.IMAGE_MODEL,
+                      self._stale_reasons(fingerprint, previous_entry.get("fingerprint", {}) if previous_entry else None),
+                      IMAGE_INPUT_TOKENS + estimate_tokens(question or IMAGE_ANALYSIS_QUESTION),
+                      DEFAULT_OUTPUT_TOKENS["image"])
+
+        plan["estimated_cost"] = round(plan["estimated_cost"], 4)
+        return plan
+
+    def estimate_papers(self, papers: List[Dict[str, Any]], incremental: bool = False) -> Dict[str, Any]:
+        """
+        预估分析论文列表所需的调用数、token、费用与耗时（dry-run，不调用API）
+
+        Args:
+            papers: 论文信息列表
+            incremental: 是否按增量分析预估
+
+        Returns:
+            Dict: 预估结果，见cost_estimator.estimate_analysis
+        """
+        return estimate_analysis(self, papers, incremental=incremental)
+
+    def extract_paper_tables(self, paper_info: Dict[str, Any], main_md_file: str, save: bool = True) -> Dict[str, Any]:
+        """
+        本地提取论文表格并保存到result目录
+
+        Args:
+            paper_info: 论文信息
+            main_md_file: 主markdown文件路径
+            save: 是否写入result目录
+
+        Returns:
+            Dict: 以table_id为键的表格数据，包含紧凑文本
+        """
+        try:
+            tables = extract_tables(main_md_file)
+            if save:
+                result_dir = paper_info.get('result_dir', '') or os.path.join(paper_info.get('paper_dir', ''), 'result')
+                save_tables(tables, result_dir)
+
+            table_data = {}
+            for table in tables:
+                table_data[table["table_id"]] = {
+                    "caption": table["caption"],
+                    "image_path": table["image_path"],
+                    "parsed": table["parsed"],
+                    "text": table_to_text(table["rows"], table["caption"], self.config.TABLE_TEXT_MAX_CHARS)
+                    if table["parsed"] else ""
+                }
+            return table_data
+        except Exception as e:
+            logger.error(f"提取表格时出错: {e}")
+            return {}
+
+    def _get_checkpoint(self, paper_info: Dict[str, Any]) -> Optional[PaperCheckpoint]:
+        """加载论文的检查点日志，未启用时返回None"""
+        if not self.config.ENABLE_CHECKPOINT:
+            return None
+        result_dir = paper_info.get('result_dir', '') or os.path.join(paper_info.get('paper_dir', ''), 'result')
+        checkpoint = PaperCheckpoint(result_dir)
+        checkpoint.load()
+        return checkpoint
+
+    @staticmethod
+    def _is_failed_answer(answer: str) -> bool:
+        """判断模型返回是否为错误信息（错误结果不写入检查点，恢复时会重试）"""
+        failure_prefixes = ("调用出错", "API返回格式异常", "API调用失败", "请求出错", "分析出错",
+                            "图片处理失败", "图片格式不兼容")
+        return not answer or answer.startswith(failure_prefixes) or answer.endswith("不支持图像分析")
+
+    def _table_fallback_question(self, table_data: Dict[str, Any], image_path: str) -> Optional[str]:
+        """本地无法解析的表格截图，改用表格转写提示词交给视觉模型兜底"""
+        image_key = os.path.normcase(os.path.normpath(image_path))
+        for table in table_data.values():
+            if table.get("image_path") and os.path.normcase(table["image_path"]) == image_key:
+                caption = table.get("caption", "")
+                return f"""这是一张论文中的表格截图{f'（{caption}）' if caption else ''}。
+请将表格内容逐行转写为文本，每行单元格之间使用 | 分隔，保留表头与数值，不要添加额外解释。"""
+        return None
+
     def generate_paper_summary(self, analysis_result: Dict[str, Any]) -> str:
         """
         生成论文分析总结
@@ -604,6 +1211,8 @@ class PaperAnalyzer:
             summary_parts.append(f"论文ID: {analysis_result.get('paper_id', 'unknown')}")
             summary_parts.append(f"标题: {analysis_result.get('title', 'unknown')}")
             summary_parts.append(f"问答分析: 完成 {qa_count} 个问题的回答")
+            for profile_name, profile_qa in analysis_result.get("profile_results", {}).items():
+                summary_parts.append(f"问答分析 [{profile_name}]: 完成 {len(profile_qa)} 个问题的回答")
 
             # 统计成功分析的图片数量
             successful_images = 0
@@ -615,6 +1224,11 @@ class PaperAnalyzer:
 
             summary_parts.append(f"图片分析: 尝试分析 {image_count} 张图片，成功 {successful_images} 张")
 
+            table_data = analysis_result.get("table_data", {})
+            if table_data:
+                parsed_tables = sum(1 for t in table_data.values() if t.get("parsed"))
+                summary_parts.append(f"表格提取: 共 {len(table_data)} 个表格，本地解析 {parsed_tables} 个")
+
             # 数据集信息总结
             if isinstance(dataset_info, dict) and "datasets_used" in dataset_info:
                 datasets = dataset_info.get("datasets_used", [])
@@ -628,13 +1242,16 @@ class PaperAnalyzer:
             logger.error(f"生成总结时出错: {e}")
             return f"总结生成失败: {str(e)}"
 
-    def save_analysis_result(self, paper_info: Dict[str, Any], analysis_result: Dict[str, Any]):
+    def save_analysis_result(self, paper_info: Dict[str, Any], analysis_result: Dict[str, Any]) -> bool:
         """
         保存分析结果到文件
 
         Args:
             paper_info: 论文信息
             analysis_result: 分析结果
+
+        Returns:
+            bool: 是否保存成功
         """
         try:
             result_dir = paper_info.get('result_dir', '')
@@ -654,6 +1271,13 @@ class PaperAnalyzer:
                 with open(qa_file, 'w', encoding='utf-8') as f:
                     json.dump(analysis_result["qa_results"], f, ensure_ascii=False, indent=2)
 
+            # 其他问题配置的问答结果分别保存到result/profiles/<配置名>/
+            for profile_name, qa_results in analysis_result.get("profile_results", {}).items():
+                profile_dir = os.path.join(result_dir, 'profiles', profile_name)
+                os.makedirs(profile_dir, exist_ok=True)
+                with open(os.path.join(profile_dir, 'qa_results.json'), 'w', encoding='utf-8') as f:
+                    json.dump(qa_results, f, ensure_ascii=False, indent=2)
+
             # 保存数据集信息
             if analysis_result.get("dataset_info"):
                 dataset_file = os.path.join(result_dir, 'dataset_info.json')
@@ -672,16 +1296,22 @@ class PaperAnalyzer:
                 f.write(analysis_result.get("summary", ""))
 
             logger.info(f"分析结果已保存到: {result_dir}")
+            return True
 
         except Exception as e:
             logger.error(f"保存分析结果失败: {e}")
+            return False
 
-    def analyze_papers(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @profiled("analyze")
+    def analyze_papers(self, papers: List[Dict[str, Any]], incremental: bool = False,
+                       profiles: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
         """
         分析论文列表
 
         Args:
             papers: 论文信息列表
+            incremental: 是否增量分析（仅重新计算指纹变化的条目）
+            profiles: 问题配置 {配置名: 问题文件路径}，默认使用get_question_profiles()
 
         Returns:
             List[Dict]: 分析结果列表
@@ -694,10 +1324,16 @@ class PaperAnalyzer:
 
             try:
                 # 分析单篇论文
-                analysis_result = self.analyze_single_paper(paper_info)
+                with telemetry_context(paper_id=paper_info.get('paper_id', f'paper_{i}')):
+                    analysis_result = self.analyze_single_paper(paper_info, incremental=incremental,
+                                                                profiles=profiles)
 
-                # 保存结果
-                self.save_analysis_result(paper_info, analysis_result)
+                # 保存结果，完整分析的结果落盘后检查点不再需要
+                saved = self.save_analysis_result(paper_info, analysis_result)
+                if saved and analysis_result.get("analysis_status") == "completed":
+                    checkpoint = self._get_checkpoint(paper_info)
+                    if checkpoint:
+                        checkpoint.clear()
 
                 results.append(analysis_result)
 
@@ -710,4 +1346,5 @@ class PaperAnalyzer:
                 })
 
         logger.info(f"论文分析完成，成功分析 {len([r for r in results if r.get('analysis_status') == 'completed'])} 篇")
+        self.token_budget.report()
         return results
@@ -0,0 +1,100 @@
+import os
+import json
+import time
+from typing import Dict, Any, Optional
+
+from utils import logger
+
+
+class PaperCheckpoint:
+    """
+    单篇论文的分析检查点日志
+
+    采用追加写入的JSONL文件，每完成一个问题、一张图片或数据集信息提取就写入一条记录并落盘。
+    进程中途退出后重新分析时，已完成的部分直接从日志恢复，不再重复调用API。
+    文件末尾因崩溃产生的不完整行在读取时截掉，后续追加的记录从新的一行开始。
+    """
+
+    FILE_NAME = 'analysis_checkpoint.jsonl'
+
+    def __init__(self, result_dir: str):
+        self.result_dir = result_dir
+        self.path = os.path.join(result_dir, self.FILE_NAME)
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _record_key(kind: str, key: str) -> str:
+        return f"{kind}:{key}"
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        读取检查点日志，同一条目以最后一次记录为准
+
+        Returns:
+            Dict: 以"类型:键"为键的记录
+        """
+        self.records = {}
+        if not os.path.exists(self.path):
+            return self.records
+
+        try:
+            with open(self.path, 'rb') as f:
+                content = f.read()
+            complete = content.rfind(b'\n') + 1
+            if complete < len(content):
+                # 截掉末尾不完整的行，否则下一条记录会接在它后面而无法解析
+                logger.warning(f"检查点末尾有不完整的记录（{len(content) - complete} 字节），已截掉")
+                with open(self.path, 'r+b') as f:
+                    f.truncate(complete)
+
+            for line_no, line in enumerate(content[:complete].decode('utf-8', errors='replace').splitlines(), 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"检查点第 {line_no} 行无法解析，已忽略")
+                    continue
+                self.records[self._record_key(record.get("kind", ""), record.get("key", ""))] = record
+        except Exception as e:
+            logger.error(f"读取检查点失败 {self.path}: {e}")
+            self.records = {}
+
+        if self.records:
+            logger.info(f"从检查点恢复 {len(self.records)} 条已完成记录: {self.path}")
+        return self.records
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """获取已完成条目的数据，不存在时返回None"""
+        record = self.records.get(self._record_key(kind, key))
+        return record.get("data") if record else None
+
+    def record(self, kind: str, key: str, data: Dict[str, Any]):
+        """
+        追加一条完成记录并立即落盘
+
+        Args:
+            kind: 记录类型（question、image、dataset_info）
+            key: 条目键
+            data: 条目结果
+        """
+        record = {"kind": kind, "key": key, "time": time.time(), "data": data}
+        try:
+            os.makedirs(self.result_dir, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.records[self._record_key(kind, key)] = record
+        except Exception as e:
+            logger.error(f"写入检查点失败 {self.path}: {e}")
+
+    def clear(self):
+        """分析结果完整保存后删除检查点日志"""
+        self.records = {}
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except Exception as e:
+            logger.error(f"删除检查点失败 {self.path}: {e}")
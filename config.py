@@ -20,6 +20,38 @@ class Config:
     # conda环境配置，必备的环境名
     ARXIV_CONDA_ENV: str = "mcp"
     MINERU_CONDA_ENV: str = "Agent"
+    # mineru可执行文件路径，为空时在MINERU_CONDA_ENV环境中查找（结果缓存，无需conda activate）
+    MINERU_EXECUTABLE: str = ""
+
+    # MinerU转换配置：后端、OCR语言、单篇超时（秒）
+    MINERU_BACKEND: str = "pipeline"
+    MINERU_LANG: str = "ch"
+    MINERU_TIMEOUT: int = 600
+    # 常驻转换服务：在MinerU环境中启动一个长期运行的进程，模型只加载一次，之后的PDF通过本地socket提交
+    MINERU_USE_WORKER: bool = False
+    MINERU_WORKER_STARTUP_TIMEOUT: int = 300
+    # 批量转换：多篇PDF一次启动MinerU命令行（每批最多MINERU_BATCH_SIZE篇），失败的论文再逐篇转换
+    MINERU_BATCH_MODE: bool = False
+    MINERU_BATCH_SIZE: int = 8
+    # 并行转换池：同时运行的转换进程数（1为逐篇转换，0为按CPU核心数与可用内存自动确定），
+    # 每个进程的OMP/MKL线程数与预估内存占用（GB）
+    MINERU_POOL_WORKERS: int = 1
+    MINERU_WORKER_THREADS: int = 4
+    MINERU_WORKER_MEMORY_GB: float = 6
+    # 文本层检测：用PyMuPDF检查每页文本层，文本层完整的PDF使用MinerU的txt方式（跳过OCR），
+    # 扫描版使用ocr方式，混合文档由MinerU自动判断；每页至少TEXT_LAYER_MIN_CHARS个字符视为有效文本层，
+    # 有效页占比不低于TEXT_LAYER_TXT_RATIO时使用txt方式。默认1.0：只要有一页需要OCR就不跳过OCR；
+    # 调低可以让个别扫描页的文档也走txt方式（更快），但这些页的内容会丢失
+    TEXT_LAYER_DETECTION: bool = True
+    TEXT_LAYER_MIN_CHARS: int = 200
+    TEXT_LAYER_TXT_RATIO: float = 1.0
+    # LaTeX源码：arXiv论文优先下载e-print源码直接生成markdown（章节、公式、图表标题准确），
+    # 没有可用源码时再转换PDF
+    LATEX_SOURCE_ENABLED: bool = True
+    # PyMuPDF备用转换的并行进程数上限（0为全部CPU核心；并行转换池中按池的并行数分摊CPU核心）
+    FALLBACK_WORKERS: int = 0
+    # 转换缓存：按PDF内容（SHA-256）与MinerU版本缓存转换输出（DATA_DIR/.conversion_cache），相同PDF只转换一次
+    CONVERSION_CACHE_ENABLED: bool = True
 
     # 检索配置,最多返回20条文献搜索结果
     MAX_RESULTS: int = 200
@@ -27,27 +59,99 @@ class Config:
 
     # 问题文件
     QUESTION_FILE: str = "data/question.txt"
+    # 额外的问题配置目录：其中每个txt文件作为一个问题配置，与QUESTION_FILE在同一轮分析中回答
+    QUESTION_PROFILE_DIR: str = "data/question_profiles"
 
     # 排除文件
     EXCLUDE_CSV: str = "data/exclude2025-7-1.csv"
     EXCLUDE_COLUMN: str = "文献标题"
 
+    # PDF下载配置：并行下载数、同一主机的并发数与最小请求间隔（秒）、连接与读取超时（秒）、重试次数
+    PDF_DOWNLOAD_WORKERS: int = 4
+    PDF_DOWNLOAD_PER_HOST: int = 2
+    PDF_DOWNLOAD_MIN_INTERVAL: float = 1.0
+    PDF_DOWNLOAD_CONNECT_TIMEOUT: float = 10
+    PDF_DOWNLOAD_READ_TIMEOUT: float = 120
+    PDF_DOWNLOAD_RETRIES: int = 3
+
+    # 表格提取配置：优先本地解析MinerU表格，视觉模型仅作兜底
+    ENABLE_TABLE_EXTRACTION: bool = True
+    TABLE_TEXT_MAX_CHARS: int = 3000
+
+    # 图片预处理进程池配置：并行进程数、预取窗口（张数与预估内存MB）
+    IMAGE_PREP_WORKERS: int = min(4, os.cpu_count() or 1)
+    IMAGE_PREP_MAX_PENDING: int = 6
+    IMAGE_PREP_MAX_PENDING_MB: int = 200
+
+    # 分章节摘要模式：先为方法、数据、预处理、训练、结果各生成一份摘要（按章节哈希缓存），
+    # 问答时只提供相关摘要与匹配问题术语的原文片段，而不是整篇文献
+    ENABLE_SECTION_DIGEST: bool = False
+    DIGEST_MAX_CHARS: int = 1500
+    DIGEST_SECTION_MAX_CHARS: int = 40000
+    DIGEST_EXCERPT_MAX_CHARS: int = 4000
+
+    # 本地规则抽取：候选信息附加到相关问题的提示词中；问题只针对单个字段（问题标题末尾标记[字段:links]等）
+    # 且候选置信度不低于阈值时直接作答
+    ENABLE_LOCAL_EXTRACTION: bool = True
+    LOCAL_ANSWER_MIN_CONFIDENCE: float = 0.9
+
+    # 输出token预算：按问题历史回答长度（P95乘以余量）自适应，限制在[最小值, 上限]之间，被截断时以上限重试
+    ADAPTIVE_MAX_TOKENS: bool = True
+    QA_MAX_TOKENS_CAP: int = 2000
+    DATASET_INFO_MAX_TOKENS_CAP: int = 1000
+    # 数据集信息追问时每个字段的输出上限（合计不超过DATASET_INFO_MAX_TOKENS_CAP）
+    DATASET_INFO_FIELD_MAX_TOKENS: int = 300
+    TOKEN_BUDGET_MARGIN: float = 1.3
+    TOKEN_BUDGET_MIN_TOKENS: int = 256
+    TOKEN_BUDGET_MIN_SAMPLES: int = 3
+
+    # 调用记录：每次LLM、视觉模型、arXiv查询与PDF下载写入DATA_DIR/telemetry/calls.jsonl（按大小轮转）
+    ENABLE_TELEMETRY: bool = True
+    TELEMETRY_MAX_MB: float = 20
+    TELEMETRY_BACKUP_COUNT: int = 5
+
+    # 阶段追踪：记录搜索、下载、转换、问答与图片分析等阶段的span，导出为Chrome trace（也可设置环境变量LIT_TRACE=1开启）
+    ENABLE_TRACING: bool = False
+
+    # 性能剖析：需要剖析的阶段（search、process、convert、analyze，逗号分隔，all表示全部，空为关闭），
+    # 结果写入DATA_DIR/profiles；也可通过环境变量LIT_PROFILE或main.py的--profile参数指定
+    PROFILE_STAGES: str = ""
+    # 剖析方式：cprofile（确定性，仅主线程）或sampling（定时采样所有线程）
+    PROFILE_MODE: str = "cprofile"
+    PROFILE_SAMPLE_INTERVAL: float = 0.005
+    PROFILE_TOP_N: int = 30
+    # 同时记录tracemalloc内存快照及记录的调用栈深度
+    PROFILE_MEMORY: bool = False
+    PROFILE_MEMORY_FRAMES: int = 5
+
+    # 分析检查点：逐条记录已完成的问题与图片，中断后可续跑
+    ENABLE_CHECKPOINT: bool = True
+
 
 AVAILABLE_MODELS = {
     "deepseek-chat": {
         "api_key": "DEEPSEEK_API_KEY",
         "endpoint": "https://api.deepseek.com/v1/chat/completions",
-        "supports_vision": True
+        "supports_vision": True,
+        # 是否支持response_format的JSON模式
+        "supports_json_mode": True,
+        # 每百万token价格（元）：输入（缓存未命中）、输入（缓存命中）、输出
+        "price_per_million": {"input": 2.0, "cached_input": 0.2, "output": 3.0}
     },
     "deepseek-reasoner": {
         "api_key": "DEEPSEEK_API_KEY",
         "endpoint": "https://api.deepseek.com/v1/chat/completions",
-        "supports_vision": False
+        "supports_vision": False,
+        "supports_json_mode": False,
+        # 推理模型：completion_tokens包含推理过程，输出预算不能按回答长度估算
+        "reasoning": True,
+        "price_per_million": {"input": 2.0, "cached_input": 0.2, "output": 3.0}
     },
     "kimi": {
         "api_key": "KIMI_API_KEY",
         "endpoint": "https://api.moonshot.cn/v1/chat/completions",
-        "supports_vision": False
+        "supports_vision": False,
+        "supports_json_mode": True
     }
 }
 
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import shutil
+import threading
+from typing import Dict, Optional, Tuple
+
+from utils import logger, sha256_file
+
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def _link_or_copy(source: str, target: str) -> bool:
+    """硬链接文件（跨磁盘或文件系统不支持时复制），返回是否为硬链接"""
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        shutil.copy2(source, target)
+        return False
+
+
+def has_hardlinks(path: str) -> bool:
+    """目录中是否有硬链接文件（从缓存恢复的输出）"""
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                if os.stat(os.path.join(root, name)).st_nlink > 1:
+                    return True
+            except OSError:
+                continue
+    return False
+
+
+class ConversionCache:
+    """
+    按PDF内容寻址的全局转换缓存
+
+    缓存键为PDF的SHA-256与转换器版本（MinerU版本、后端、解析方式），
+    同一份PDF无论在哪个论文目录下（重新下载、标题不同导致目录名不同）都只转换一次。
+    转换输出在缓存目录中只保存一份，论文目录中的文件是指向缓存的硬链接（不支持硬链接时复制）。
+    缓存条目先写入临时目录，完成后原子重命名，中断不会留下不完整的条目。
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        # (路径, 大小, 修改时间) -> SHA-256，避免同一进程内重复计算
+        self._digests: Dict[Tuple[str, int, float], str] = {}
+        self._lock = threading.Lock()
+
+    def _digest(self, pdf_path: str) -> str:
+        stat = os.stat(pdf_path)
+        key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime)
+        with self._lock:
+            if key not in self._digests:
+                self._digests[key] = sha256_file(pdf_path, length=64)
+            return self._digests[key]
+
+    def entry_dir(self, pdf_path: str, version: str) -> str:
+        """缓存条目目录：<缓存目录>/<SHA-256>_<转换器版本>"""
+        safe_version = "".join(c if c.isalnum() or c in '.-_' else '-' for c in version)
+        return os.path.join(self.cache_dir, f"{self._digest(pdf_path)}_{safe_version}")
+
+    def restore(self, pdf_path: str, mineru_dir: str, version: str) -> bool:
+        """
+        缓存命中时把输出链接到<mineru_dir>/<PDF文件名>/
+
+        输出文件名中的原文件名前缀（MinerU以PDF文件名命名输出）替换为当前PDF的文件名。
+
+        Returns:
+            bool: 是否命中缓存
+        """
+        try:
+            entry = self.entry_dir(pdf_path, version)
+            manifest_path = os.path.join(entry, MANIFEST_FILE)
+            if not os.path.isfile(manifest_path):
+                return False
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+            source_root = os.path.join(entry, 'output')
+            cached_stem = manifest["stem"]
+            stem = os.path.splitext(os.path.basename(pdf_path))[0]
+            target_root = os.path.join(mineru_dir, stem)
+            if os.path.exists(target_root):
+                shutil.rmtree(target_root)
+
+            linked = 0
+            for root, _, files in os.walk(source_root):
+                target_dir = os.path.join(target_root, os.path.relpath(root, source_root))
+                os.makedirs(target_dir, exist_ok=True)
+                for name in files:
+                    target_name = stem + name[len(cached_stem):] if name.startswith(cached_stem) else name
+                    linked += _link_or_copy(os.path.join(root, name), os.path.join(target_dir, target_name))
+
+            logger.info(f"转换缓存命中（{manifest.get('files', 0)} 个文件，硬链接 {linked} 个，"
+                        f"{manifest.get('created', '')} 转换）: {pdf_path}")
+            return True
+        except Exception as e:
+            logger.warning(f"读取转换缓存失败，重新转换: {e}")
+            return False
+
+    def store(self, pdf_path: str, mineru_dir: str, version: str) -> bool:
+        """
+        把<mineru_dir>/<PDF文件名>/中的转换输出存入缓存（已存在时跳过）
+
+        Returns:
+            bool: 是否成功存入（或已存在）
+        """
+        stem = os.path.splitext(os.path.basename(pdf_path))[0]
+        source_root = os.path.join(mineru_dir, stem)
+        if not os.path.isdir(source_root):
+            return False
+
+        staging = None
+        try:
+            entry = self.entry_dir(pdf_path, version)
+            if os.path.isfile(os.path.join(entry, MANIFEST_FILE)):
+                return True
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            staging = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+            files = 0
+            for root, _, names in os.walk(source_root):
+                target_dir = os.path.join(staging, 'output', os.path.relpath(root, source_root))
+                os.makedirs(target_dir, exist_ok=True)
+                for name in names:
+                    _link_or_copy(os.path.join(root, name), os.path.join(target_dir, name))
+                    files += 1
+
+            with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump({"stem": stem, "version": version, "source": os.path.abspath(pdf_path), "files": files,
+                           "created": time.strftime('%Y-%m-%d %H:%M:%S')}, f, ensure_ascii=False, indent=2)
+
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # 其他进程已写入同一条目
+                if not os.path.isfile(os.path.join(entry, MANIFEST_FILE)):
+                    raise
+            logger.info(f"转换输出已存入缓存: {entry}")
+            return True
+        except Exception as e:
+            logger.warning(f"保存转换缓存失败: {e}")
+            return False
+        finally:
+            if staging and os.path.exists(staging):
+                shutil.rmtree(staging, ignore_errors=True)
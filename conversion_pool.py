@@ -0,0 +1,128 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+
+from utils import logger
+from tracing import with_context
+
+
+# 需要限制线程数的数值计算库，避免多个转换进程各自占满所有核心
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS",
+                   "VECLIB_MAXIMUM_THREADS")
+
+
+def available_memory_gb() -> Optional[float]:
+    """可用内存（GB），优先使用psutil，其次读取/proc/meminfo，都不可用时返回None"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 1024 ** 3
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024 ** 2
+    except OSError:
+        pass
+    return None
+
+
+def plan_workers(max_workers: int = 0, threads_per_worker: int = 4, memory_per_worker_gb: float = 6) -> int:
+    """
+    根据CPU核心数与可用内存确定并行转换数
+
+    Args:
+        max_workers: 配置的并行数，0表示自动
+        threads_per_worker: 每个转换进程使用的线程数
+        memory_per_worker_gb: 每个转换进程预估的内存占用（GB）
+
+    Returns:
+        int: 并行转换数（至少为1）
+    """
+    by_cpu = max(1, (os.cpu_count() or 1) // max(1, threads_per_worker))
+    memory = available_memory_gb()
+    by_memory = max(1, int(memory // memory_per_worker_gb)) if memory is not None else by_cpu
+    workers = min(by_cpu, by_memory)
+    if max_workers > 0:
+        workers = min(workers, max_workers)
+    logger.info(f"并行转换数: {workers}（CPU核心 {os.cpu_count()}，每进程 {threads_per_worker} 线程；"
+                f"可用内存 {f'{memory:.1f}GB' if memory is not None else '未知'}，每进程约 {memory_per_worker_gb}GB）")
+    return workers
+
+
+def worker_env(threads: int) -> Dict[str, str]:
+    """转换进程的线程数环境变量"""
+    return {name: str(threads) for name in THREAD_ENV_VARS}
+
+
+class ConversionPool:
+    """
+    多进程PDF转换池
+
+    每个任务启动一个独立的转换进程（由convert函数负责），N个任务同时执行，
+    转换进程通过环境变量限制数值库线程数以避免超额订阅。
+    提交窗口最多保持2N个任务，结果按输入顺序产出。
+    """
+
+    def __init__(self, convert: Callable[[str, str, Dict[str, str]], Optional[str]], workers: int,
+                 threads_per_worker: int = 4):
+        """
+        Args:
+            convert: 转换函数 (PDF路径, 论文目录, 环境变量) -> MinerU_process目录或None
+            workers: 并行转换数
+            threads_per_worker: 每个转换进程的线程数
+        """
+        self.convert = convert
+        self.workers = max(1, workers)
+        self.max_pending = self.workers * 2
+        self.env = worker_env(threads_per_worker)
+
+    def _run(self, pdf_path: str, paper_dir: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            mineru_path = self.convert(pdf_path, paper_dir, self.env)
+            error = None if mineru_path else "转换失败"
+        except Exception as e:
+            mineru_path, error = None, str(e)
+        return {"pdf_path": pdf_path, "mineru_path": mineru_path, "error": error,
+                "seconds": round(time.perf_counter() - start, 1)}
+
+    def imap(self, jobs: Iterable[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+        """
+        按输入顺序产出转换结果
+
+        Args:
+            jobs: (PDF路径, 论文目录)序列
+
+        Yields:
+            Dict: {"pdf_path", "mineru_path", "error", "seconds"}
+        """
+        jobs = iter(jobs)
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pdf-convert') as executor:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < self.max_pending:
+                    try:
+                        pdf_path, paper_dir = next(jobs)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append(executor.submit(with_context(self._run), pdf_path, paper_dir))
+
+                if not pending:
+                    break
+                future: Future = pending.popleft()
+                yield future.result()
+
+    def map(self, jobs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """转换全部任务，返回与输入顺序一致的结果列表"""
+        start = time.perf_counter()
+        results = list(self.imap(jobs))
+        succeeded = sum(1 for r in results if r["mineru_path"])
+        logger.info(f"并行转换完成: {succeeded}/{len(results)} 篇成功，并行数 {self.workers}，"
+                    f"总耗时 {time.perf_counter() - start:.1f}s，单篇累计 {sum(r['seconds'] for r in results):.1f}s")
+        return results
@@ -0,0 +1,219 @@
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils import logger
+
+
+# 没有历史调用记录时各阶段单次调用的默认耗时（秒）
+DEFAULT_STAGE_SECONDS = {
+    "qa": 25.0,
+    "dataset_info": 20.0,
+    "digest": 30.0,
+    "image": 15.0,
+    "pdf_download": 10.0,
+    "pdf_convert": 180.0
+}
+
+# 预估条目类型 -> 调用记录中的阶段
+KIND_STAGES = {
+    "question": "qa",
+    "dataset_info": "dataset_info",
+    "section_digest": "digest",
+    "image": "image"
+}
+
+# 分析阶段（按论文汇总历史调用时使用）
+ANALYSIS_STAGES = ("qa", "dataset_info", "dataset_info_field", "digest", "image")
+
+
+class LatencyTable:
+    """
+    历史耗时表：从调用记录（DATA_DIR/telemetry）中统计各阶段、各模型成功调用的耗时中位数
+
+    没有历史记录的阶段使用DEFAULT_STAGE_SECONDS。
+    """
+
+    def __init__(self, data_dir: str):
+        from telemetry import load_events
+
+        self.events = [e for e in load_events(data_dir) if e.get("status") == "ok" and e.get("latency") is not None]
+        by_stage = defaultdict(list)
+        for event in self.events:
+            by_stage[(event.get("stage"), event.get("model"))].append(event["latency"])
+            by_stage[(event.get("stage"), None)].append(event["latency"])
+        self.samples = dict(by_stage)
+
+    def seconds(self, stage: str, model: Optional[str] = None) -> Tuple[float, bool]:
+        """
+        单次调用的预估耗时
+
+        Returns:
+            Tuple[float, bool]: (耗时秒数, 是否来自历史记录)
+        """
+        from token_budget import percentile
+
+        for key in ((stage, model), (stage, None)):
+            if self.samples.get(key):
+                return percentile(self.samples[key], 0.5), True
+        return DEFAULT_STAGE_SECONDS.get(stage, DEFAULT_STAGE_SECONDS["qa"]), False
+
+    def per_paper_analysis(self) -> Optional[Dict[str, float]]:
+        """历史上每篇论文分析阶段的平均调用数、视觉调用数、token、费用与耗时，没有记录时返回None"""
+        from telemetry import event_cost
+
+        papers = defaultdict(lambda: {"api_calls": 0, "vision_calls": 0, "input_tokens": 0, "output_tokens": 0,
+                                      "cost": 0.0, "seconds": 0.0})
+        for event in self.events:
+            if event.get("stage") not in ANALYSIS_STAGES or not event.get("paper_id"):
+                continue
+            paper = papers[event["paper_id"]]
+            paper["api_calls"] += 1
+            paper["vision_calls"] += int(event.get("stage") == "image")
+            paper["input_tokens"] += event.get("prompt_tokens") or 0
+            paper["output_tokens"] += event.get("completion_tokens") or 0
+            paper["cost"] += event_cost(event)
+            paper["seconds"] += event["latency"]
+
+        if not papers:
+            return None
+        return {key: sum(p[key] for p in papers.values()) / len(papers)
+                for key in ("api_calls", "vision_calls", "input_tokens", "output_tokens", "cost", "seconds")}
+
+
+def _empty_estimate() -> Dict[str, Any]:
+    return {
+        "paper_count": 0,
+        "api_calls": 0,
+        "vision_calls": 0,
+        "local_answers": 0,
+        "skipped_images": 0,
+        "reused_items": 0,
+        "downloads": 0,
+        "conversions": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "estimated_cost": 0.0,
+        "estimated_seconds": 0.0,
+        "default_latency_stages": [],
+        "papers": [],
+        "errors": []
+    }
+
+
+def estimate_analysis(analyzer, papers: List[Dict[str, Any]], incremental: bool = False,
+                      latency: Optional[LatencyTable] = None) -> Dict[str, Any]:
+    """
+    预估分析一批论文所需的模型调用、token、费用与耗时（不调用API）
+
+    文献与提示词的token在本地计算，图片按实际分析时的检查规则筛选，
+    耗时按历史调用记录中各阶段的耗时中位数累加（分析过程中的调用是串行的）。
+
+    Args:
+        analyzer: PaperAnalyzer
+        papers: 论文信息列表（需包含paper_dir与main_md_file）
+        incremental: 是否按增量分析预估
+        latency: 历史耗时表，为空时从DATA_DIR读取
+
+    Returns:
+        Dict: 预估结果
+    """
+    latency = latency or LatencyTable(analyzer.config.DATA_DIR)
+    estimate = _empty_estimate()
+    estimate["paper_count"] = len(papers)
+    default_stages = set()
+
+    for paper_info in papers:
+        plan = analyzer.plan_reanalysis(paper_info, incremental=incremental)
+        if plan.get("error"):
+            estimate["errors"].append({"paper_id": plan["paper_id"], "error": plan["error"]})
+            continue
+
+        seconds = 0.0
+        for item in plan["stale_items"]:
+            stage = KIND_STAGES.get(item["kind"], "qa")
+            item_seconds, from_history = latency.seconds(stage, item.get("model"))
+            if not from_history:
+                default_stages.add(stage)
+            seconds += item_seconds
+            estimate["vision_calls" if item["kind"] == "image" else "api_calls"] += 1
+
+        estimate["local_answers"] += plan["local_answer_count"]
+        estimate["skipped_images"] += len(plan["skipped_images"])
+        estimate["reused_items"] += plan["reused_count"]
+        estimate["input_tokens"] += plan["input_tokens"]
+        estimate["output_tokens"] += plan["output_tokens"]
+        estimate["estimated_cost"] += plan["estimated_cost"]
+        estimate["estimated_seconds"] += seconds
+        estimate["papers"].append(dict(plan, estimated_seconds=round(seconds, 1)))
+
+    estimate["estimated_cost"] = round(estimate["estimated_cost"], 4)
+    estimate["default_latency_stages"] = sorted(default_stages)
+    return estimate
+
+
+def estimate_processing(processor, papers: List[Dict], analyzer=None,
+                        latency: Optional[LatencyTable] = None) -> Dict[str, Any]:
+    """
+    预估下载、转换并分析一批检索结果所需的时间与费用（不下载、不调用API）
+
+    下载与转换耗时按历史调用记录中的中位数估算；论文尚未转换，文献token无法在本地计算，
+    分析部分按历史上每篇论文的平均调用数、token与耗时外推。
+
+    Args:
+        processor: PaperProcessor
+        papers: 检索结果列表
+        analyzer: PaperAnalyzer（可选，用于给出分析部分的外推）
+        latency: 历史耗时表，为空时从DATA_DIR读取
+
+    Returns:
+        Dict: 预估结果
+    """
+    latency = latency or LatencyTable(processor.config.DATA_DIR)
+    estimate = _empty_estimate()
+    estimate["paper_count"] = len(papers)
+    default_stages = set()
+
+    per_paper = 0.0
+    for stage in ("pdf_download", "pdf_convert"):
+        seconds, from_history = latency.seconds(stage)
+        if not from_history:
+            default_stages.add(stage)
+        per_paper += seconds
+    estimate["downloads"] = estimate["conversions"] = len(papers)
+    estimate["estimated_seconds"] = per_paper * len(papers)
+
+    if analyzer is not None:
+        analysis = latency.per_paper_analysis()
+        if analysis is None:
+            estimate["errors"].append({"paper_id": "*", "error": "没有历史分析调用记录，未包含分析部分的预估"})
+        else:
+            estimate["api_calls"] = round((analysis["api_calls"] - analysis["vision_calls"]) * len(papers))
+            estimate["vision_calls"] = round(analysis["vision_calls"] * len(papers))
+            estimate["input_tokens"] = round(analysis["input_tokens"] * len(papers))
+            estimate["output_tokens"] = round(analysis["output_tokens"] * len(papers))
+            estimate["estimated_cost"] = round(analysis["cost"] * len(papers), 4)
+            estimate["estimated_seconds"] += analysis["seconds"] * len(papers)
+
+    estimate["default_latency_stages"] = sorted(default_stages)
+    return estimate
+
+
+def print_estimate(estimate: Dict[str, Any], title: str = "预估结果"):
+    """打印预估结果"""
+    print(f"\n=== {title}（dry-run，未调用API） ===")
+    print(f"论文数: {estimate['paper_count']}")
+    if estimate["downloads"]:
+        print(f"PDF下载: {estimate['downloads']} 次，PDF转换: {estimate['conversions']} 次")
+    print(f"文本模型调用: {estimate['api_calls']} 次，视觉模型调用: {estimate['vision_calls']} 次")
+    if estimate["local_answers"] or estimate["skipped_images"] or estimate["reused_items"]:
+        print(f"本地规则直接回答: {estimate['local_answers']} 个问题，未通过检查的图片: {estimate['skipped_images']} 张，"
+              f"可复用: {estimate['reused_items']} 项")
+    print(f"预估输入tokens: {estimate['input_tokens']}，输出tokens: {estimate['output_tokens']}")
+    print(f"预估费用: ¥{estimate['estimated_cost']:.2f}")
+    print(f"预估耗时: {estimate['estimated_seconds'] / 60:.1f} 分钟")
+    if estimate["default_latency_stages"]:
+        print(f"（{', '.join(estimate['default_latency_stages'])} 没有历史调用记录，耗时按默认值估算）")
+    for error in estimate["errors"]:
+        print(f"⚠️ {error['paper_id']}: {error['error']}")
+    if estimate["errors"]:
+        logger.warning(f"预估时 {len(estimate['errors'])} 项无法计算")
@@ -0,0 +1,328 @@
+import os
+import json
+import time
+import base64
+import mimetypes
+from io import BytesIO
+from collections import deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from utils import logger
+
+
+SUPPORTED_IMAGE_FORMATS = ['.jpg', '.jpeg', '.png', '.webp']
+MAX_IMAGE_SIZE_MB = 20
+# 超过该大小的图片重新编码为JPEG
+COMPRESS_THRESHOLD_MB = 5
+# 请求体中图片URL的占位符，序列化后替换为Base64数据
+IMAGE_URL_PLACEHOLDER = "__IMAGE_URL_PLACEHOLDER__"
+
+
+def check_image_compatibility(image_path: str,
+                              supported_formats: Optional[List[str]] = None,
+                              max_image_size_mb: float = MAX_IMAGE_SIZE_MB) -> Tuple[bool, str]:
+    """
+    检查图片是否兼容DeepSeek API
+
+    Args:
+        image_path: 图片路径
+        supported_formats: 支持的图片扩展名
+        max_image_size_mb: 最大图片大小 (MB)
+
+    Returns:
+        Tuple[bool, str]: (是否兼容, 原因)
+    """
+    from PIL import Image
+
+    supported_formats = supported_formats or SUPPORTED_IMAGE_FORMATS
+    try:
+        # 检查文件扩展名
+        ext = os.path.splitext(image_path)[1].lower()
+        if ext not in supported_formats:
+            return False, f"不支持的图片格式: {ext}，仅支持 {', '.join(supported_formats)}"
+
+        # 检查文件大小
+        file_size = os.path.getsize(image_path) / (1024 * 1024)  # 转换为MB
+        if file_size > max_image_size_mb:
+            return False, f"图片过大 ({file_size:.2f}MB)，最大支持 {max_image_size_mb}MB"
+
+        # 尝试打开图片以验证完整性（只读取文件头，不解码像素）
+        try:
+            with Image.open(image_path) as img:
+                width, height = img.size
+                if width > 4096 or height > 4096:
+                    return False, f"图片尺寸过大 ({width}x{height})，建议裁剪至4096x4096以内"
+
+                if width < 16 or height < 16:
+                    return False, f"图片尺寸过小 ({width}x{height})，应大于16x16"
+        except Exception as e:
+            return False, f"图片无法打开: {str(e)}"
+
+        return True, "兼容"
+    except Exception as e:
+        return False, f"图片验证失败: {str(e)}"
+
+
+def prepare_image(image_path: str,
+                  supported_formats: Optional[List[str]] = None,
+                  max_image_size_mb: float = MAX_IMAGE_SIZE_MB,
+                  compress_threshold_mb: float = COMPRESS_THRESHOLD_MB) -> Dict[str, Any]:
+    """
+    准备用于API调用的图片数据（检查、读取、必要时压缩、Base64编码）
+
+    该函数只使用可序列化的参数与返回值，可以直接在进程池中执行。
+
+    Args:
+        image_path: 图片路径
+        supported_formats: 支持的图片扩展名
+        max_image_size_mb: 最大图片大小 (MB)
+        compress_threshold_mb: 超过该大小时重新编码为JPEG
+
+    Returns:
+        Dict: 包含success、compatible、mime_type、image_base64（ASCII字节串）、error以及各阶段耗时timings
+    """
+    timings = {}
+    result = {
+        "image_path": image_path,
+        "success": False,
+        "compatible": True,
+        "mime_type": "",
+        "image_base64": b"",
+        "error": "",
+        "timings": timings
+    }
+
+    try:
+        # 1. 兼容性检查
+        start = time.perf_counter()
+        is_compatible, reason = check_image_compatibility(image_path, supported_formats, max_image_size_mb)
+        timings["check"] = time.perf_counter() - start
+        if not is_compatible:
+            result["compatible"] = False
+            result["error"] = reason
+            return result
+
+        # 获取MIME类型
+        mime_type, _ = mimetypes.guess_type(image_path)
+        if not mime_type:
+            mime_type = "images/jpeg"  # 默认MIME类型
+
+        # 2. 读取文件
+        start = time.perf_counter()
+        with open(image_path, "rb") as image_file:
+            image_data = image_file.read()
+        timings["read"] = time.perf_counter() - start
+
+        # 3. 压缩过大的图片
+        if len(image_data) / (1024 * 1024) > compress_threshold_mb:
+            start = time.perf_counter()
+            try:
+                from PIL import Image
+                with Image.open(BytesIO(image_data)) as img:
+                    output = BytesIO()
+                    # 转换为RGB模式（如果是RGBA）
+                    if img.mode in ('RGBA', 'P', 'LA'):
+                        img = img.convert('RGB')
+                    img.save(output, format='JPEG', quality=85)
+                image_data = output.getvalue()
+                mime_type = "image/jpeg"
+            except Exception as e:
+                logger.warning(f"图片压缩失败: {str(e)}，使用原始图片")
+            timings["compress"] = time.perf_counter() - start
+
+        # 4. Base64编码（保持为字节串，不再生成str与data URL副本）
+        start = time.perf_counter()
+        result["image_base64"] = base64.b64encode(image_data)
+        del image_data
+        result["mime_type"] = mime_type
+        timings["encode"] = time.perf_counter() - start
+
+        result["success"] = True
+        return result
+
+    except Exception as e:
+        result["error"] = f"准备图片数据失败: {str(e)}"
+        return result
+
+
+def build_vision_request_body(request_data: Dict[str, Any], mime_type: str, image_base64: bytes) -> bytes:
+    """
+    构造视觉模型请求体
+
+    request_data中图片URL位置使用IMAGE_URL_PLACEHOLDER占位，只序列化其余较小的字段，
+    再与Base64字节串一次性拼接为最终请求体，避免同时持有data URL字符串、
+    JSON字符串及其编码副本。调用方在拿到请求体后应释放image_base64。
+
+    Args:
+        request_data: 请求数据（图片URL为占位符）
+        mime_type: 图片MIME类型
+        image_base64: Base64编码后的图片字节串
+
+    Returns:
+        bytes: UTF-8编码的JSON请求体
+    """
+    serialized = json.dumps(request_data, ensure_ascii=False).encode('utf-8')
+    placeholder = json.dumps(IMAGE_URL_PLACEHOLDER).encode('utf-8')
+    prefix, sep, suffix = serialized.partition(placeholder)
+    if not sep:
+        raise ValueError("请求数据中缺少图片URL占位符")
+
+    return b"".join((prefix, b'"data:', mime_type.encode('ascii'), b';base64,', image_base64, b'"', suffix))
+
+
+def _prepare_image_traced(context: Dict[str, Any], image_path: str, supported_formats: Optional[List[str]],
+                          max_image_size_mb: float) -> Dict[str, Any]:
+    """在进程池中执行prepare_image，恢复主进程的调用上下文并记录追踪span"""
+    from telemetry import telemetry_context
+    from tracing import span
+
+    with telemetry_context(**context), span("image_prepare", image=os.path.basename(image_path)):
+        return prepare_image(image_path, supported_formats, max_image_size_mb)
+
+
+class ImagePreparePool:
+    """
+    图片预处理进程池
+
+    图片解码、重编码与Base64编码都是CPU密集操作，放在独立进程中执行，
+    主线程在等待视觉模型HTTP响应的同时，后续图片已经在后台准备。
+    提交窗口同时受任务数与预估内存占用限制，避免一次性把所有图片载入内存。
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 4, max_pending_mb: float = 200,
+                 supported_formats: Optional[List[str]] = None, max_image_size_mb: float = MAX_IMAGE_SIZE_MB):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.max_pending_bytes = max_pending_mb * 1024 * 1024
+        self.supported_formats = supported_formats or SUPPORTED_IMAGE_FORMATS
+        self.max_image_size_mb = max_image_size_mb
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stage_timings: Dict[str, List[float]] = defaultdict(list)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self._executor is None and self.max_workers > 1:
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            except Exception as e:
+                logger.warning(f"创建图片预处理进程池失败，改为主进程处理: {e}")
+                self.max_workers = 1
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def _estimate_memory(image_path: str) -> int:
+        """估算单张图片在预处理结果中的内存占用（Base64约膨胀4/3）"""
+        try:
+            return int(os.path.getsize(image_path) * 4 / 3)
+        except OSError:
+            return 0
+
+    def _prepare_inline(self, image_path: str) -> Dict[str, Any]:
+        return prepare_image(image_path, self.supported_formats, self.max_image_size_mb)
+
+    def _submit(self, image_path: str) -> Future:
+        executor = self._get_executor()
+        if executor is None:
+            future = Future()
+            future.set_result(self._prepare_inline(image_path))
+            return future
+        from telemetry import current_context
+        return executor.submit(_prepare_image_traced, current_context(), image_path,
+                               self.supported_formats, self.max_image_size_mb)
+
+    def imap(self, image_paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        按输入顺序产出预处理结果，后台保持有限的预取窗口
+
+        Args:
+            image_paths: 图片路径序列
+
+        Yields:
+            Dict: prepare_image的返回结果，额外包含wait耗时（主线程等待预处理的时间）
+        """
+        pending = deque()
+        pending_bytes = 0
+        paths = iter(image_paths)
+        exhausted = False
+
+        while True:
+            # 在任务数与内存预算内尽量填满预取窗口（至少保证一个任务在执行）
+            while not exhausted and len(pending) < self.max_pending:
+                if pending and pending_bytes >= self.max_pending_bytes:
+                    break
+                try:
+                    image_path = next(paths)
+                except StopIteration:
+                    exhausted = True
+                    break
+                estimated = self._estimate_memory(image_path)
+                pending.append((image_path, estimated, self._submit(image_path)))
+                pending_bytes += estimated
+
+            if not pending:
+                break
+
+            image_path, estimated, future = pending.popleft()
+            pending_bytes -= estimated
+
+            start = time.perf_counter()
+            try:
+                prepared = future.result()
+            except BrokenProcessPool as e:
+                logger.warning(f"图片预处理进程池异常，改为主进程处理: {e}")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self.max_workers = 1
+                prepared = self._prepare_inline(image_path)
+                # 重新提交仍在等待的任务
+                pending = deque((p, est, self._submit(p)) for p, est, _ in pending)
+            except Exception as e:
+                prepared = {
+                    "image_path": image_path,
+                    "success": False,
+                    "compatible": True,
+                    "mime_type": "",
+                    "image_base64": b"",
+                    "error": f"准备图片数据失败: {str(e)}",
+                    "timings": {}
+                }
+            prepared["timings"]["wait"] = time.perf_counter() - start
+
+            for stage, seconds in prepared["timings"].items():
+                self.stage_timings[stage].append(seconds)
+
+            yield prepared
+            # 填充下一轮预取窗口前释放已产出的结果，不在窗口之外多持有一张图片
+            del prepared
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """汇总各阶段耗时并写入日志"""
+        summary = {}
+        for stage, values in self.stage_timings.items():
+            if not values:
+                continue
+            summary[stage] = {
+                "count": len(values),
+                "total": round(sum(values), 4),
+                "mean": round(sum(values) / len(values), 4),
+                "max": round(max(values), 4)
+            }
+
+        if summary:
+            details = ', '.join(f"{stage}: 共{info['total']:.2f}s/均{info['mean']:.3f}s"
+                                for stage, info in summary.items())
+            logger.info(f"图片预处理耗时统计 - {details}")
+        return summary
@@ -0,0 +1,671 @@
+"""
+arXiv LaTeX源码转换
+
+下载论文的e-print（作者上传的LaTeX源码包），找到主.tex文件并展开\\input/\\include，
+直接从源码得到章节、公式、图表标题与原始图片文件，不需要PDF版面分析。
+输出布局与MinerU一致：<输出目录>/<文件名>/auto/{<文件名>.md, <文件名>_content_list.json, images/}。
+"""
+import os
+import re
+import gzip
+import html
+import json
+import shutil
+import tarfile
+import threading
+import unicodedata
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from utils import logger
+
+
+EPRINT_URL = "https://arxiv.org/e-print/{}"
+# 主文件的常见名称（有多个含\documentclass的文件时优先）
+MAIN_FILE_NAMES = ('main.tex', 'ms.tex', 'paper.tex', 'article.tex')
+GRAPHIC_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.pdf', '.eps')
+MAX_INCLUDE_DEPTH = 10
+SECTION_LEVELS = {"section": 1, "subsection": 2, "subsubsection": 3}
+MATH_ENVIRONMENTS = ('equation', 'align', 'gather', 'multline', 'eqnarray', 'displaymath', 'flalign', 'alignat')
+FIGURE_ENVIRONMENTS = ('figure', 'wrapfigure', 'SCfigure')
+TABLE_ENVIRONMENTS = ('table', 'wraptable')
+# 连同参数一起删除的命令
+DROP_WITH_ARGS = ('label', 'vspace', 'hspace', 'bibliographystyle', 'setlength', 'addtolength', 'setcounter',
+                  'addcontentsline', 'pagestyle', 'thispagestyle', 'newcommand', 'renewcommand', 'definecolor',
+                  'includegraphics', 'graphicspath', 'author', 'affiliation', 'institute', 'email', 'keywords',
+                  'date', 'thanks', 'icmlauthor', 'icmlaffiliation', 'icmlcorrespondingauthor', 'hypersetup',
+                  'usepackage', 'input', 'acmConference', 'copyrightyear', 'settopmatter', 'raisebox', 'resizebox')
+SYMBOLS = {'ldots': '…', 'dots': '…', 'textendash': '–', 'textemdash': '—', 'textbar': '|', 'S': '§',
+           'textasciitilde': '~', 'textbackslash': '\\', 'LaTeX': 'LaTeX', 'TeX': 'TeX', 'ie': 'i.e.', 'eg': 'e.g.',
+           'etal': 'et al.', 'textdegree': '°', 'copyright': '©', 'ss': 'ß', 'o': 'ø', 'ae': 'æ', 'aa': 'å'}
+ACCENTS = {"'": '\u0301', '"': '\u0308', '`': '\u0300', '^': '\u0302', '~': '\u0303', '=': '\u0304',
+           'c': '\u0327', 'v': '\u030c', 'u': '\u0306', 'H': '\u030b', '.': '\u0307'}
+# 占位符：块级内容（图、表、公式）、行内公式、交叉引用与文献引用，在全部转换完成后还原
+BLOCK, INLINE, REF = '\x00', '\x01', '\x02'
+
+
+def eprint_url(arxiv_id: str) -> str:
+    """arXiv e-print下载地址"""
+    return EPRINT_URL.format(re.sub(r'^arxiv:', '', arxiv_id.strip(), flags=re.IGNORECASE))
+
+
+def verify_eprint(path: str) -> Tuple[bool, str]:
+    """检查下载的e-print文件（非空且不是错误网页），是否含LaTeX源码在解压时判断"""
+    try:
+        size = os.path.getsize(path)
+        if size < 100:
+            return False, f"文件过小 ({size} 字节)"
+        with open(path, 'rb') as f:
+            head = f.read(512).lstrip().lower()
+        if head.startswith(b'<!doctype html') or head.startswith(b'<html'):
+            return False, "返回了网页而不是源码"
+        return True, "完整"
+    except OSError as e:
+        return False, f"无法读取文件: {e}"
+
+
+def extract_eprint(archive_path: str, dest_dir: str) -> bool:
+    """
+    解压e-print：tar包（可能gzip压缩）、gzip压缩的单个.tex文件或未压缩的.tex文件
+
+    Returns:
+        bool: 是否得到LaTeX源码（e-print只有PDF时返回False）
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    with open(archive_path, 'rb') as f:
+        head = f.read(512)
+    if head.startswith(b'%PDF'):
+        logger.info("arXiv没有提供LaTeX源码（e-print为PDF）")
+        return False
+
+    if tarfile.is_tarfile(archive_path):
+        with tarfile.open(archive_path) as tar:
+            # 只解压普通文件与目录，跳过绝对路径、上级路径与链接
+            members = [m for m in tar.getmembers()
+                       if (m.isfile() or m.isdir()) and not os.path.isabs(m.name)
+                       and not os.path.normpath(m.name).startswith('..')]
+            if hasattr(tarfile, 'data_filter'):
+                tar.extractall(dest_dir, members=members, filter='data')
+            else:
+                tar.extractall(dest_dir, members=members)
+        return True
+
+    if head.startswith(b'\x1f\x8b'):
+        with gzip.open(archive_path, 'rb') as f:
+            data = f.read()
+    else:
+        with open(archive_path, 'rb') as f:
+            data = f.read()
+    if data.startswith(b'%PDF') or b'\\documentclass' not in data and b'\\begin{document}' not in data:
+        logger.info("e-print中没有可用的LaTeX源码")
+        return False
+    with open(os.path.join(dest_dir, 'main.tex'), 'wb') as f:
+        f.write(data)
+    return True
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+def strip_comments(text: str) -> str:
+    """删除注释：行内%之后的内容、comment环境与\\iffalse...\\fi"""
+    text = re.sub(r'(?<!\\)%.*', '', text)
+    text = re.sub(r'\\begin\{comment\}.*?\\end\{comment\}', '', text, flags=re.DOTALL)
+    return re.sub(r'\\iffalse\b.*?\\fi\b', '', text, flags=re.DOTALL)
+
+
+def find_main_tex(src_dir: str) -> Optional[str]:
+    """查找主.tex文件：含\\documentclass，优先含\\begin{document}、常见主文件名、内容较长的文件"""
+    candidates = []
+    for root, _, files in os.walk(src_dir):
+        for name in files:
+            if not name.lower().endswith('.tex'):
+                continue
+            path = os.path.join(root, name)
+            text = strip_comments(_read_text(path))
+            if re.search(r'\\documentclass', text):
+                candidates.append(('\\begin{document}' in text, name.lower() in MAIN_FILE_NAMES, len(text), path))
+    return max(candidates)[-1] if candidates else None
+
+
+def _resolve_file(root_dir: str, name: str, extensions: Tuple[str, ...]) -> Optional[str]:
+    name = name.strip().strip('"')
+    for candidate in [name] + [name + ext for ext in extensions]:
+        path = os.path.normpath(os.path.join(root_dir, candidate))
+        if os.path.isfile(path) and path.startswith(os.path.normpath(root_dir)):
+            return path
+    return None
+
+
+def expand_includes(text: str, root_dir: str, depth: int = 0, seen: Optional[set] = None) -> str:
+    """递归展开\\input、\\include与\\subfile（路径相对于主文件所在目录）"""
+    seen = seen or set()
+
+    def replace(match):
+        path = _resolve_file(root_dir, match.group(2) or match.group(3), ('.tex',))
+        if not path or depth >= MAX_INCLUDE_DEPTH or path in seen:
+            return ''
+        included = strip_comments(_read_text(path))
+        return expand_includes(included, root_dir, depth + 1, seen | {path})
+
+    return re.sub(r'\\(input|include|subfile)\s*\{([^}]+)\}|\\input\s+([^\s{}\\]+)', replace, text)
+
+
+def read_group(text: str, pos: int, open_char: str = '{', close_char: str = '}') -> Tuple[Optional[str], int]:
+    """从pos开始（跳过空白）读取一个括号组，返回(内容, 结束位置)；不是括号组时返回(None, pos)"""
+    i = pos
+    while i < len(text) and text[i] in ' \t\n':
+        i += 1
+    if i >= len(text) or text[i] != open_char:
+        return None, pos
+    depth = 0
+    j = i
+    while j < len(text):
+        char = text[j]
+        if char == '\\':
+            j += 2
+            continue
+        if char == open_char:
+            depth += 1
+        elif char == close_char:
+            depth -= 1
+            if depth == 0:
+                return text[i + 1:j], j + 1
+        j += 1
+    return None, pos
+
+
+def replace_command(text: str, name: str, func: Callable[..., str], nargs: int = 1) -> str:
+    """把\\name[可选参数]{参数1}...{参数nargs}替换为func(参数...)的结果，嵌套的同名命令重复替换"""
+    pattern = re.compile(r'\\' + name + r'(?![A-Za-z])\*?')
+    for _ in range(5):
+        out, pos = [], 0
+        for match in pattern.finditer(text):
+            if match.start() < pos:
+                continue
+            _, end = read_group(text, match.end(), '[', ']')
+            args = []
+            for _ in range(nargs):
+                arg, end = read_group(text, end)
+                if arg is None:
+                    break
+                args.append(arg)
+            if len(args) < nargs:
+                continue
+            out.append(text[pos:match.start()])
+            out.append(func(*args))
+            pos = end
+        out.append(text[pos:])
+        replaced = ''.join(out)
+        if replaced == text:
+            break
+        text = replaced
+    return text
+
+
+def parse_macros(text: str) -> Dict[str, str]:
+    """无参数的\\newcommand/\\renewcommand/\\def宏定义"""
+    macros = {}
+    for match in re.finditer(r'\\(?:re)?newcommand\*?\s*\{?\\([A-Za-z]+)\}?', text):
+        nargs, end = read_group(text, match.end(), '[', ']')
+        if nargs not in (None, '0'):
+            continue
+        body, _ = read_group(text, end)
+        if body is not None:
+            macros[match.group(1)] = body
+    for match in re.finditer(r'\\def\s*\\([A-Za-z]+)\s*\{', text):
+        body, _ = read_group(text, match.end() - 1)
+        if body is not None:
+            macros.setdefault(match.group(1), body)
+    return macros
+
+
+def _env_pattern(names: Tuple[str, ...]) -> re.Pattern:
+    alternatives = '|'.join(re.escape(name) for name in names)
+    return re.compile(r'\\begin\{(' + alternatives + r')(\*?)\}(.*?)\\end\{\1\2\}', re.DOTALL)
+
+
+class LatexConverter:
+    """把展开后的LaTeX源码转换为MinerU格式的markdown与content_list"""
+
+    def __init__(self, src_dir: str, images_dir: str):
+        self.src_dir = src_dir
+        self.images_dir = images_dir
+        self.graphic_dirs = ['']
+        self.blocks: List[Tuple[str, List[Dict[str, Any]]]] = []
+        self.inline_math: List[str] = []
+        self.labels: Dict[str, str] = {}
+        self.citations: Dict[str, int] = {}
+        self.counters = {"figure": 0, "table": 0, "equation": 0}
+
+    # ---------- 占位符 ----------
+
+    def _block(self, markdown: str, items: List[Dict[str, Any]]) -> str:
+        self.blocks.append((markdown, items))
+        return f"\n\n{BLOCK}{len(self.blocks) - 1}{BLOCK}\n\n"
+
+    def _protect_math(self, text: str) -> str:
+        """公式原样保留：行间公式转为$$...$$块，行内公式替换为占位符，避免被文本转换破坏"""
+        def display(body: str, numbered: bool) -> str:
+            if numbered:
+                self.counters["equation"] += 1
+                for label in re.findall(r'\\label\{([^}]+)\}', body):
+                    self.labels[label] = f"({self.counters['equation']})"
+            body = re.sub(r'\\label\{[^}]*\}|\\nonumber|\\notag', '', body).strip()
+            latex = f"$$\n{body}\n$$"
+            return self._block(latex, [{"type": "equation", "text": latex, "text_format": "latex", "page_idx": 0}])
+
+        def environment(match):
+            name, star, body = match.groups()
+            if name not in ('equation', 'displaymath'):
+                body = f"\\begin{{{name}}}{body}\\end{{{name}}}" if name != 'eqnarray' else \
+                    f"\\begin{{aligned}}{body}\\end{{aligned}}"
+            return display(body, not star and name != 'displaymath')
+
+        text = _env_pattern(MATH_ENVIRONMENTS).sub(environment, text)
+        text = re.sub(r'\\\[(.*?)\\\]', lambda m: display(m.group(1), False), text, flags=re.DOTALL)
+        text = re.sub(r'(?<!\\)\$\$(.*?)(?<!\\)\$\$', lambda m: display(m.group(1), False), text, flags=re.DOTALL)
+
+        def inline(body: str) -> str:
+            self.inline_math.append(f"${body.strip()}$")
+            return f"{INLINE}{len(self.inline_math) - 1}{INLINE}"
+
+        text = re.sub(r'\\\((.*?)\\\)', lambda m: inline(m.group(1)), text, flags=re.DOTALL)
+        return re.sub(r'(?<!\\)\$((?:\\.|[^$\\])+?)\$', lambda m: inline(m.group(1)), text)
+
+    # ---------- 行内转换 ----------
+
+    def inline(self, text: str) -> str:
+        """行内格式、引用、特殊字符与其余命令的转换"""
+        text = replace_command(text, 'textbf', lambda a: f"**{a.strip()}**")
+        for name in ('emph', 'textit'):
+            text = replace_command(text, name, lambda a: f"*{a.strip()}*")
+        text = replace_command(text, 'texttt', lambda a: f"`{a.strip()}`")
+        text = replace_command(text, 'url', lambda a: a.strip())
+        text = replace_command(text, 'href', lambda url, label: f"[{label.strip()}]({url.strip()})", nargs=2)
+        text = replace_command(text, 'footnote', lambda a: f" ({a.strip()})")
+        for name in ('cite', 'citep', 'citet', 'citealp', 'citeauthor', 'citeyear', 'parencite', 'textcite'):
+            text = replace_command(text, name, lambda keys: f"{REF}C{keys}{REF}")
+        for name in ('ref', 'eqref', 'autoref', 'cref', 'Cref', 'pageref'):
+            text = replace_command(text, name, lambda key: f"{REF}R{key}{REF}")
+        for name in DROP_WITH_ARGS:
+            text = replace_command(text, name, lambda *a: '')
+
+        # 重音与特殊字符
+        text = re.sub(r"\\(['\"`^~=.]|[cvuH](?![A-Za-z]))\s*\{?\\?([A-Za-z])\}?",
+                      lambda m: unicodedata.normalize('NFC', m.group(2) + ACCENTS[m.group(1)]), text)
+        text = re.sub(r'\\([A-Za-z]+)(?![A-Za-z])\s?(?:\{\})?',
+                      lambda m: SYMBOLS.get(m.group(1), m.group(0)), text)
+        text = text.replace('~', ' ').replace('``', '"').replace("''", '"')
+        text = re.sub(r'\\\\(?:\[[^\]]*\])?|\\newline\b|\\par\b', '\n', text)
+        text = re.sub(r'\\[,;:! ]', ' ', text)
+
+        # 其余命令：保留参数中的文字，删除命令本身与可选参数
+        def unknown(match):
+            end = match.end()
+            _, end = read_group(text, end, '[', ']')
+            parts = []
+            while True:
+                arg, new_end = read_group(text, end)
+                if arg is None or '\n\n' in text[end:new_end - len(arg) - 1]:
+                    break
+                parts.append(arg)
+                end = new_end
+            state["end"] = end
+            return ' '.join(parts)
+
+        for _ in range(5):
+            out, pos, state = [], 0, {}
+            for match in re.finditer(r'\\[A-Za-z]+\*?', text):
+                if match.start() < pos:
+                    continue
+                out.append(text[pos:match.start()])
+                out.append(unknown(match))
+                pos = state["end"]
+            out.append(text[pos:])
+            replaced = ''.join(out)
+            if replaced == text:
+                break
+            text = replaced
+        text = re.sub(r'(?<!\\)[{}]', '', text)
+        return re.sub(r'\\([&%_#${}])', r'\1', text)
+
+    # ---------- 图表 ----------
+
+    def _copy_graphic(self, name: str) -> Optional[str]:
+        """复制图片文件到images目录（PDF图片用PyMuPDF渲染为PNG），返回images下的文件名"""
+        path = None
+        for directory in self.graphic_dirs:
+            path = _resolve_file(self.src_dir, os.path.join(directory, name), GRAPHIC_EXTENSIONS)
+            if path:
+                break
+        if not path:
+            logger.warning(f"找不到图片文件: {name}")
+            return None
+
+        relative = os.path.relpath(path, self.src_dir)
+        base, ext = os.path.splitext(relative.replace(os.sep, '_').replace('/', '_'))
+        ext = ext.lower()
+        os.makedirs(self.images_dir, exist_ok=True)
+        if ext in ('.png', '.jpg', '.jpeg'):
+            shutil.copy2(path, os.path.join(self.images_dir, base + ext))
+            return base + ext
+        if ext == '.pdf':
+            try:
+                import fitz  # PyMuPDF
+                with fitz.open(path) as doc:
+                    doc.load_page(0).get_pixmap(matrix=fitz.Matrix(2, 2)).save(
+                        os.path.join(self.images_dir, base + '.png'))
+                return base + '.png'
+            except Exception as e:
+                logger.warning(f"渲染PDF图片失败 {name}: {e}")
+                return None
+        logger.warning(f"不支持的图片格式，跳过: {name}")
+        return None
+
+    def _caption(self, body: str) -> str:
+        captions = []
+        replace_command(body, 'caption', lambda a: captions.append(a) or '')
+        # 子图各有标题时，整个图的标题在最后
+        return self.inline(captions[-1]).strip() if captions else ""
+
+    def _figure(self, match) -> str:
+        body = match.group(3)
+        self.counters["figure"] += 1
+        number = self.counters["figure"]
+        for label in re.findall(r'\\label\{([^}]+)\}', body):
+            self.labels[label] = str(number)
+
+        files = []
+        replace_command(body, 'includegraphics', lambda a: files.append(a.strip()) or '')
+        images = [image for image in (self._copy_graphic(name) for name in files) if image]
+        caption = self._caption(body)
+        caption = f"Figure {number}: {caption}" if caption else ""
+
+        markdown = '\n\n'.join([f"![](images/{image})" for image in images] + ([caption] if caption else []))
+        items = [{"type": "image", "img_path": f"images/{image}", "img_caption": [caption] if caption else [],
+                  "img_footnote": [], "page_idx": 0} for image in images]
+        if not items and caption:
+            items = [{"type": "text", "text": caption, "page_idx": 0}]
+        return self._block(markdown, items) if markdown else ''
+
+    def _tabulars(self, text: str) -> List[str]:
+        """text中所有tabular环境转换成的HTML表格"""
+        tables = []
+        for tabular in re.finditer(r'\\begin\{(tabular[x*]?|tabulary|longtable)\}(.*?)\\end\{\1\}', text, re.DOTALL):
+            content = tabular.group(2)
+            # 去掉列格式参数（tabular*、tabularx、tabulary还有宽度参数）
+            if tabular.group(1) in ('tabular*', 'tabularx', 'tabulary'):
+                _, end = read_group(content, 0)
+                content = content[end:]
+            _, end = read_group(content, 0)
+            tables.append(self._tabular_html(content[end:]))
+        return tables
+
+    def _tabular_html(self, body: str) -> str:
+        body = re.sub(r'\\(?:hline|toprule|midrule|bottomrule|endhead|endfirsthead)\b'
+                      r'|\\(?:cline|cmidrule)(?:\([^)]*\))?\{[^}]*\}|\\addlinespace(?:\[[^\]]*\])?', '', body)
+        rows = []
+        for row in re.split(r'\\\\(?:\s*\[[^\]]*\])?', body):
+            if not row.strip():
+                continue
+            cells = []
+            for cell in re.split(r'(?<!\\)&', row):
+                span = ''
+                multicolumn = re.match(r'\s*\\multicolumn\s*\{(\d+)\}', cell)
+                if multicolumn:
+                    _, end = read_group(cell, multicolumn.end())
+                    content, _ = read_group(cell, end)
+                    span = f' colspan="{multicolumn.group(1)}"'
+                    cell = content or ''
+                cell = replace_command(cell, 'multirow', lambda rows, width, text: text, nargs=3)
+                cells.append(f"<td{span}>{html.escape(self.inline(cell).strip(), quote=False)}</td>")
+            rows.append(f"<tr>{''.join(cells)}</tr>")
+        return f"<table>{''.join(rows)}</table>"
+
+    def _table(self, match) -> str:
+        body = match.group(3)
+        self.counters["table"] += 1
+        number = self.counters["table"]
+        for label in re.findall(r'\\label\{([^}]+)\}', body):
+            self.labels[label] = str(number)
+        caption = self._caption(body)
+        caption = f"Table {number}: {caption}" if caption else ""
+
+        tables = self._tabulars(body)
+        markdown = '\n\n'.join(([caption] if caption else []) + tables)
+        items = [{"type": "table", "img_path": "", "table_caption": [caption] if caption else [],
+                  "table_footnote": [], "table_body": table, "page_idx": 0} for table in tables]
+        return self._block(markdown, items) if markdown else ''
+
+    # ---------- 参考文献 ----------
+
+    def _bibliography(self, bbl: str) -> str:
+        entries = []
+        parts = re.split(r'\\bibitem\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}', bbl)
+        for key, entry in zip(parts[1::2], parts[2::2]):
+            entry = re.sub(r'\\end\{thebibliography\}.*', '', entry, flags=re.DOTALL)
+            entry = re.sub(r'\\newblock\b', ' ', entry)
+            self.citations[key.strip()] = len(entries) + 1
+            entries.append(f"[{len(entries) + 1}] {' '.join(self.inline(entry).split())}")
+        if not entries:
+            return ''
+        return "\n\n# References\n\n" + '\n\n'.join(entries) + "\n\n"
+
+    def _find_bbl(self, main_tex: str) -> Optional[str]:
+        candidate = os.path.splitext(main_tex)[0] + '.bbl'
+        if os.path.isfile(candidate):
+            return candidate
+        for root, _, files in os.walk(self.src_dir):
+            for name in files:
+                if name.endswith('.bbl'):
+                    return os.path.join(root, name)
+        return None
+
+    # ---------- 章节 ----------
+
+    def _sections(self, text: str) -> str:
+        """章节标题编号（附录使用字母编号），紧随标题的\\label对应章节编号"""
+        numbers = [0, 0, 0]
+        appendix = False
+        out, pos = [], 0
+        pattern = re.compile(r'\\(section|subsection|subsubsection|paragraph|appendix|label)(?![A-Za-z])(\*?)')
+        for match in pattern.finditer(text):
+            if match.start() < pos:
+                continue
+            command, star = match.groups()
+            out.append(text[pos:match.start()])
+            pos = match.end()
+            if command == 'appendix':
+                appendix, numbers = True, [0, 0, 0]
+                continue
+            _, end = read_group(text, pos, '[', ']')
+            title, end = read_group(text, end)
+            if title is None:
+                continue
+            pos = end
+            if command == 'label':
+                if title not in self.labels:
+                    self.labels[title] = '.'.join(str(n) for n in numbers if n) if any(numbers) else ''
+                continue
+            if command == 'paragraph':
+                out.append(f"\n\n**{self.inline(title).strip()}** ")
+                continue
+
+            level = SECTION_LEVELS[command]
+            heading = self.inline(title).strip()
+            if not star:
+                numbers[level - 1] += 1
+                numbers[level:] = [0] * (3 - level)
+                parts = [chr(ord('A') + numbers[0] - 1) if appendix else str(numbers[0])] + \
+                        [str(n) for n in numbers[1:level]]
+                heading = f"{'.'.join(parts)} {heading}"
+            out.append(f"\n\n{'#' * level} {heading}\n\n")
+        out.append(text[pos:])
+        return ''.join(out)
+
+    # ---------- 主流程 ----------
+
+    def convert(self, main_tex: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        转换主.tex文件
+
+        Returns:
+            Tuple[str, List[Dict]]: (markdown, content_list)
+        """
+        full = expand_includes(strip_comments(_read_text(main_tex)), os.path.dirname(main_tex))
+        for match in re.finditer(r'\\graphicspath\s*\{', full):
+            paths, _ = read_group(full, match.end() - 1)
+            self.graphic_dirs += re.findall(r'\{([^}]*)\}', paths or '')
+
+        title_match = re.search(r'\\title(?![A-Za-z])\s*(?:\[[^\]]*\])?', full)
+        title = read_group(full, title_match.end())[0] if title_match else None
+        body_match = re.search(r'\\begin\{document\}(.*?)(?:\\end\{document\}|$)', full, re.DOTALL)
+        body = body_match.group(1) if body_match else full
+
+        # 1. 无参数宏展开（正文与标题）
+        macros = parse_macros(full)
+        for _ in range(2):
+            for name, value in macros.items():
+                pattern = r'\\' + name + r'(?![A-Za-z])(?:\{\})?'
+                body = re.sub(pattern, lambda m: value, body)
+                title = re.sub(pattern, lambda m: value, title) if title else title
+
+        # 2. 公式、图表（内容作为块保存）
+        body = self._protect_math(body)
+        body = _env_pattern(FIGURE_ENVIRONMENTS).sub(self._figure, body)
+        body = _env_pattern(TABLE_ENVIRONMENTS).sub(self._table, body)
+        body = re.sub(r'\\begin\{(tabular[x*]?|tabulary|longtable)\}.*?\\end\{\1\}',
+                      lambda m: self._block(self._tabulars(m.group(0))[0], []), body, flags=re.DOTALL)
+
+        # 3. 参考文献（.bbl或正文中的thebibliography环境）
+        bibliography = re.search(r'\\begin\{thebibliography\}.*?\\end\{thebibliography\}', body, re.DOTALL)
+        if bibliography:
+            body = body.replace(bibliography.group(0), self._bibliography(bibliography.group(0)))
+        else:
+            bbl = self._find_bbl(main_tex)
+            references = self._bibliography(_read_text(bbl)) if bbl else ''
+            body = re.sub(r'\\bibliography\{[^}]*\}|\\printbibliography(?:\[[^\]]*\])?',
+                          lambda m: references, body)
+
+        # 4. 摘要、章节、列表
+        body = re.sub(r'\\begin\{abstract\}', '\n\n# Abstract\n\n', body)
+        body = self._sections(body)
+        body = re.sub(r'\\item\s*\[([^\]]*)\]', r'\n\n- **\1** ', body)
+        body = re.sub(r'\\item\b', '\n\n- ', body)
+        body = re.sub(r'\\(?:begin|end)\{[^}]*\}(?:\{[^}]*\})?(?:\[[^\]]*\])?', '\n', body)
+        body = re.sub(r'\\maketitle\b|\\tableofcontents\b|\\clearpage\b|\\newpage\b|\\centering\b|\\noindent\b',
+                      '', body)
+
+        # 5. 行内转换与段落整理
+        body = self.inline(body)
+        paragraphs = []
+        if title:
+            paragraphs.append(f"# {' '.join(self.inline(title).split())}")
+        for paragraph in re.split(r'\n\s*\n', body):
+            paragraph = ' '.join(paragraph.split())
+            if paragraph:
+                paragraphs.append(paragraph)
+
+        # 6. 生成content_list并还原占位符
+        content_list = []
+        markdown = []
+        for paragraph in paragraphs:
+            block = re.fullmatch(BLOCK + r'(\d+)' + BLOCK, paragraph)
+            if block:
+                block_markdown, items = self.blocks[int(block.group(1))]
+                markdown.append(self._restore(block_markdown))
+                content_list.extend({key: self._restore(value) if isinstance(value, str) else
+                                     [self._restore(v) for v in value] if isinstance(value, list) else value
+                                     for key, value in item.items()} for item in items)
+                continue
+            text = self._restore(paragraph)
+            markdown.append(text)
+            heading = re.match(r'^(#{1,6})\s+(.*)$', text)
+            if heading:
+                content_list.append({"type": "text", "text": heading.group(2), "text_level": len(heading.group(1)),
+                                     "page_idx": 0})
+            else:
+                content_list.append({"type": "text", "text": text, "page_idx": 0})
+        return '\n\n'.join(markdown) + '\n', content_list
+
+    def _restore(self, text: str) -> str:
+        text = re.sub(INLINE + r'(\d+)' + INLINE, lambda m: self.inline_math[int(m.group(1))], text)
+
+        def reference(match):
+            kind, keys = match.group(1), match.group(2)
+            if kind == 'R':
+                return self.labels.get(keys.strip()) or keys.strip()
+            numbers = [str(self.citations.get(key.strip(), key.strip())) for key in keys.split(',')]
+            return f"[{', '.join(numbers)}]"
+
+        return re.sub(REF + r'([RC])(.*?)' + REF, reference, text)
+
+
+def convert_latex_source(archive_path: str, output_dir: str, stem: str, work_dir: str) -> Optional[str]:
+    """
+    把e-print转换为MinerU格式的输出
+
+    Args:
+        archive_path: 下载的e-print文件
+        output_dir: 输出目录（论文的MinerU_process目录）
+        stem: 输出文件名（与PDF文件名一致）
+        work_dir: 解压用的临时目录（转换完成后删除）
+
+    Returns:
+        Optional[str]: 生成的markdown文件路径，没有可用的LaTeX源码或转换失败时返回None
+    """
+    src_dir = os.path.join(work_dir, 'src')
+    target = os.path.join(output_dir, stem)
+    # 先写入同一目录下的临时目录，转换成功后再替换已有输出，失败时不影响已有输出
+    staging = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if not extract_eprint(archive_path, src_dir):
+            return None
+        main_tex = find_main_tex(src_dir)
+        if not main_tex:
+            logger.info("LaTeX源码中没有找到含\\documentclass的主文件")
+            return None
+
+        auto_dir = os.path.join(staging, 'auto')
+        converter = LatexConverter(os.path.dirname(main_tex), os.path.join(auto_dir, 'images'))
+        markdown, content_list = converter.convert(main_tex)
+        if len(markdown.strip()) < 500:
+            logger.warning(f"LaTeX源码转换结果过短（{len(markdown.strip())} 字符），不使用")
+            return None
+
+        os.makedirs(os.path.join(auto_dir, 'images'), exist_ok=True)
+        with open(os.path.join(auto_dir, f"{stem}.md"), 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        with open(os.path.join(auto_dir, f"{stem}_content_list.json"), 'w', encoding='utf-8') as f:
+            json.dump(content_list, f, ensure_ascii=False, indent=2)
+
+        # os.replace不能覆盖非空目录：已有输出先移开，替换完成后再删除
+        previous = f"{staging}.old"
+        if os.path.exists(target):
+            os.replace(target, previous)
+        try:
+            os.replace(staging, target)
+        except OSError:
+            if os.path.exists(previous):
+                os.replace(previous, target)
+            raise
+        shutil.rmtree(previous, ignore_errors=True)
+        md_file = os.path.join(target, 'auto', f"{stem}.md")
+
+        logger.info(f"LaTeX源码转换完成（主文件 {os.path.relpath(main_tex, src_dir)}）: "
+                    f"{sum(1 for i in content_list if i.get('text_level'))} 个标题，"
+                    f"{converter.counters['figure']} 个图，{converter.counters['table']} 个表，"
+                    f"{converter.counters['equation']} 个编号公式: {md_file}")
+        return md_file
+    except Exception as e:
+        logger.error(f"LaTeX源码转换失败: {e}")
+        return None
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
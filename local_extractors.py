@@ -0,0 +1,340 @@
+import os
+import re
+import sys
+import glob
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils import logger, sha256_text
+from section_digest import split_sections
+
+
+# 字段名称
+FIELD_LABELS = {
+    "stains": "染色方法",
+    "magnification": "放大倍数",
+    "resolution": "分辨率",
+    "patch_size": "图像块尺寸",
+    "normalization": "染色标准化方法",
+    "backbones": "骨干网络/基础模型",
+    "links": "代码与数据链接"
+}
+
+# 词典类字段：标准名称 -> 正则（按原文大小写敏感程度分别编译）
+STAIN_PATTERNS = {
+    "H&E": r'\bH\s?&\s?E\b|\bhematoxylin[\s\-]+(?:and|&)[\s\-]+eosin\b|\bhaematoxylin[\s\-]+(?:and|&)[\s\-]+eosin\b',
+    "PAS": r'\bPAS\b|\bperiodic acid[\s\-]+schiff\b',
+    "Masson": r'\bMasson\b|\btrichrome\b',
+    "PASM": r'\bPASM\b|\bJones\b',
+    "IHC": r'\bIHC\b|\bimmunohisto\w*',
+    "IF": r'\bimmunofluorescen\w*',
+    "CD3": r'\bCD3\b', "CD4": r'\bCD4\b', "CD8": r'\bCD8\b', "CD20": r'\bCD20\b', "CD68": r'\bCD68\b',
+    "Ki-67": r'\bKi-?67\b', "PD-L1": r'\bPD-?L1\b', "HER2": r'\bHER-?2\b'
+}
+NORMALIZATION_PATTERNS = {
+    "Macenko": r'\bMacenko\b',
+    "Reinhard": r'\bReinhard\b',
+    "Vahadane": r'\bVahadane\b',
+    "StainGAN": r'\bStainGAN\b',
+    "CycleGAN": r'\bCycle-?GAN\b',
+    "StainNet": r'\bStainNet\b',
+    "stain augmentation": r'\bstain augmentation\b|\bcolor augmentation\b|\bcolou?r jitter\w*'
+}
+BACKBONE_PATTERNS = {
+    "ResNet": r'\bResNet[\s\-]?\d*\b',
+    "ViT": r'\bViT(?:-[SBLHG](?:/\d+)?)?\b|\bVision Transformer\b',
+    "VGG": r'\bVGG[\s\-]?\d*\b',
+    "DenseNet": r'\bDenseNet[\s\-]?\d*\b',
+    "EfficientNet": r'\bEfficientNet(?:-B\d)?\b',
+    "Swin Transformer": r'\bSwin\b',
+    "U-Net": r'\bU-?Net\b|\bnnU-?Net\b',
+    "UNI": r'\bUNI\b',
+    "CONCH": r'\bCONCH\b',
+    "PLIP": r'\bPLIP\b',
+    "CTransPath": r'\bCTransPath\b',
+    "Virchow": r'\bVirchow\s?2?\b',
+    "Prov-GigaPath": r'\bProv-?GigaPath\b|\bGigaPath\b',
+    "Phikon": r'\bPhikon\b',
+    "MUSK": r'\bMUSK\b',
+    "DINOv2": r'\bDINOv2\b',
+    "CLIP": r'\bCLIP\b'
+}
+
+# 数值与链接类字段
+MAGNIFICATION_PATTERN = re.compile(
+    r'(?<![\d.])(2\.5|5|10|20|40|60|100)\s*(?:[xX×]|\\times)(?![\d])(?:\s*(?:magnification|objective))?'
+    r'|(?:magnification|objective)\s+(?:of\s+)?(2\.5|5|10|20|40|60|100)\s*(?:[xX×]|\\times)?(?![\d])')
+RESOLUTION_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(?:\\mu\s*m|μm|µm|um|microns?)\s*(?:/|per)\s*(?:px|pixels?)'
+    r'|(\d+(?:\.\d+)?)\s*(?:mpp|MPP)\b')
+PATCH_SIZE_PATTERN = re.compile(r'(?<![\d.])(\d{2,4})\s*(?:[xX×]|\\times)\s*(\d{2,4})(?![\d.])')
+PATCH_CONTEXT_PATTERN = re.compile(r'patch|tile|crop|image|pixel|图像块', re.IGNORECASE)
+LINK_PATTERN = re.compile(
+    r'https?://(?:www\.)?(?:github\.com|gitlab\.com|zenodo\.org|drive\.google\.com|huggingface\.co|'
+    r'pan\.baidu\.com|figshare\.com|kaggle\.com|grand-challenge\.org|doi\.org/10\.5281)[^\s\)\]\}>"\'，。；]*',
+    re.IGNORECASE)
+# 链接附近出现发布代码或数据的表述时才可信（单独的链接可能是引用他人的工作）
+LINK_RELEASE_PATTERN = re.compile(
+    r'\bour\s+(?:code|source code|implementation|models?|data(?:set)?s?)\b|\bavailable\s+(?:at|from|on)\b|'
+    r'\bpublicly\s+available\b|\breleased?\s+(?:at|on)\b|\bopen[\s\-]?sourced?\b|代码|开源|公开',
+    re.IGNORECASE)
+
+# MinerU输出的行内公式中数字常被空格拆开（如"$2 2 4 \\times 2 2 4$"）
+INLINE_MATH_PATTERN = re.compile(r'\$([^$\n]{1,200})\$')
+SPACED_DIGIT_PATTERN = re.compile(r'(?<=\d)\s+(?=[\d.])|(?<=\.)\s+(?=\d)')
+
+REFERENCE_HEADING_PATTERN = re.compile(r'reference|bibliograph|参考文献', re.IGNORECASE)
+CONTEXT_CHARS = 60
+
+# 问题文本关键词 -> 可提供候选的字段
+QUESTION_FIELD_KEYWORDS = {
+    "stains": ["染色", "H&E", "PAS", "IHC"],
+    "magnification": ["放大", "分辨率", "10X", "20X"],
+    "resolution": ["分辨率", "μm/px", "微米"],
+    "patch_size": ["图像块", "patch", "像素"],
+    "normalization": ["Macenko", "Reinhard", "Vahadane", "标准化"],
+    "backbones": ["ResNet", "ViT", "UNI", "CONCH", "基础模型", "骨干"],
+    "links": ["github", "zenodo", "链接", "GoogleDrive", "代码"]
+}
+
+# 问题标题只针对单个字段时，高置信度候选可以直接作为答案（也可以在问题文件中用[字段:links]标记）
+FIELD_QUESTION_TITLES = {
+    "stains": ["染色方法", "染色类型"],
+    "magnification": ["放大倍数"],
+    "resolution": ["分辨率"],
+    "patch_size": ["图像块尺寸", "patch尺寸"],
+    "normalization": ["染色标准化", "标准化方法"],
+    "backbones": ["骨干网络", "基础模型", "backbone"],
+    "links": ["代码链接", "数据链接", "代码与数据链接", "开源链接"]
+}
+
+EXTRACTOR_VERSION = "2"
+
+
+def _compile(patterns: Dict[str, str]) -> Dict[str, re.Pattern]:
+    # 全大写缩写（PAS、UNI、CONCH等）大小写敏感，其余忽略大小写
+    return {name: re.compile(pattern, 0 if name.isupper() else re.IGNORECASE) for name, pattern in patterns.items()}
+
+
+DICTIONARY_FIELDS = {
+    "stains": _compile(STAIN_PATTERNS),
+    "normalization": _compile(NORMALIZATION_PATTERNS),
+    "backbones": _compile(BACKBONE_PATTERNS)
+}
+
+
+def strip_references(md_content: str) -> str:
+    """去掉参考文献章节（其中的模型与方法名称多为引用，会造成误报）"""
+    sections = split_sections(md_content)
+    return '\n'.join(f"# {heading}\n{body}" if heading else body
+                     for heading, body in sections if not REFERENCE_HEADING_PATTERN.search(heading))
+
+
+def normalize_inline_math(text: str) -> str:
+    """将行内公式还原为普通文本：合并被拆开的数字，\\times替换为x，\\mu替换为μ"""
+    def replace(match: re.Match) -> str:
+        formula = SPACED_DIGIT_PATTERN.sub('', match.group(1))
+        formula = re.sub(r'\\times', 'x', formula)
+        formula = re.sub(r'\\mu\s*', 'μ', formula)
+        formula = re.sub(r'\\mathrm\s*\{\s*([^}]*)\}', lambda m: m.group(1).replace(' ', ''), formula)
+        return formula.strip()
+    return INLINE_MATH_PATTERN.sub(replace, text)
+
+
+def _context(text: str, start: int, end: int) -> str:
+    return text[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS].replace('\n', ' ').strip()
+
+
+def _confidence(count: int, base: float) -> float:
+    """出现次数越多置信度越高"""
+    return round(min(0.95, base + 0.1 * (count - 1)), 2)
+
+
+def _add(found: Dict[str, Dict[str, Any]], value: str, text: str, match: re.Match):
+    entry = found.setdefault(value, {"value": value, "count": 0, "context": _context(text, match.start(), match.end())})
+    entry["count"] += 1
+
+
+def extract_candidates(md_content: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    基于规则与词典从markdown中抽取结构化候选信息
+
+    Args:
+        md_content: markdown内容
+
+    Returns:
+        Dict: 字段 -> 候选列表，每个候选包含value、count、confidence与context（首次出现的上下文）
+    """
+    text = normalize_inline_math(strip_references(md_content))
+    candidates: Dict[str, List[Dict[str, Any]]] = {}
+
+    def collect(field: str, found: Dict[str, Dict[str, Any]], base: float):
+        if found:
+            for entry in found.values():
+                entry["confidence"] = _confidence(entry["count"], base)
+            candidates[field] = sorted(found.values(), key=lambda e: -e["count"])
+
+    for field, patterns in DICTIONARY_FIELDS.items():
+        found = {}
+        for name, pattern in patterns.items():
+            for match in pattern.finditer(text):
+                _add(found, name, text, match)
+        collect(field, found, 0.6)
+
+    found = {}
+    for match in MAGNIFICATION_PATTERN.finditer(text):
+        _add(found, f"{match.group(1) or match.group(2)}X", text, match)
+    collect("magnification", found, 0.5)
+
+    found = {}
+    for match in RESOLUTION_PATTERN.finditer(text):
+        _add(found, f"{match.group(1) or match.group(2)} μm/px", text, match)
+    collect("resolution", found, 0.7)
+
+    found = {}
+    for match in PATCH_SIZE_PATTERN.finditer(text):
+        width, height = int(match.group(1)), int(match.group(2))
+        if not (16 <= width <= 4096 and 16 <= height <= 4096):
+            continue
+        # 非正方形尺寸需要上下文中出现图像块等字样
+        if width != height and not PATCH_CONTEXT_PATTERN.search(_context(text, match.start(), match.end())):
+            continue
+        _add(found, f"{width}x{height}", text, match)
+    collect("patch_size", found, 0.6)
+
+    found, released = {}, set()
+    for match in LINK_PATTERN.finditer(text):
+        link = match.group(0).rstrip('.,;:')
+        _add(found, link, text, match)
+        if LINK_RELEASE_PATTERN.search(_context(text, match.start(), match.end())):
+            released.add(link)
+    collect("links", found, 0.6)
+    for entry in candidates.get("links", []):
+        if entry["value"] in released:
+            entry["confidence"] = _confidence(entry["count"], 0.9)
+
+    return candidates
+
+
+def question_fields(question: str) -> List[str]:
+    """根据问题文本判断哪些字段的候选与之相关"""
+    question_lower = question.lower()
+    return [field for field, keywords in QUESTION_FIELD_KEYWORDS.items()
+            if any(keyword.lower() in question_lower for keyword in keywords)]
+
+
+def format_candidate_hints(candidates: Dict[str, List[Dict[str, Any]]], fields: List[str],
+                           max_values: int = 8) -> str:
+    """
+    将相关字段的候选整理为提示词片段
+
+    Args:
+        candidates: extract_candidates的返回结果
+        fields: 需要的字段
+        max_values: 每个字段最多列出的候选数
+
+    Returns:
+        str: 提示词片段，没有候选时返回空字符串
+    """
+    lines = []
+    for field in fields:
+        values = candidates.get(field)
+        if not values:
+            continue
+        listed = '、'.join(f"{v['value']}（{v['count']}次）" for v in values[:max_values])
+        lines.append(f"- {FIELD_LABELS[field]}: {listed}")
+
+    if not lines:
+        return ""
+    return "\n\n本地规则从原文中抽取到以下候选信息（可能包含误报，请以文献原文为准核对后使用）：\n" + '\n'.join(lines)
+
+
+def direct_answer(title: str, candidates: Dict[str, List[Dict[str, Any]]], min_confidence: float,
+                  field: str = "") -> Optional[str]:
+    """
+    问题只针对单个字段且候选置信度足够高时，直接给出答案（跳过模型调用）
+
+    Args:
+        title: 问题标题
+        candidates: extract_candidates的返回结果
+        min_confidence: 最低置信度
+        field: 问题文件中标记的字段，为空时按问题标题判断
+
+    Returns:
+        Optional[str]: 答案，无法直接回答时返回None
+    """
+    title_lower = title.lower()
+    matched = [field] if field else [name for name, titles in FIELD_QUESTION_TITLES.items()
+                                     if any(t.lower() in title_lower for t in titles)]
+    if len(matched) != 1:
+        return None
+
+    values = [v for v in candidates.get(matched[0], []) if v["confidence"] >= min_confidence]
+    if not values:
+        return None
+    return '、'.join(v["value"] for v in values)
+
+
+def hints_version(hints: str) -> str:
+    """候选提示的哈希，写入问答指纹"""
+    return sha256_text(f"{EXTRACTOR_VERSION}:{hints}", 8)
+
+
+def benchmark_corpus(data_dir: str) -> Dict[str, Any]:
+    """
+    在语料库上评估规则抽取的速度与命中率
+
+    Args:
+        data_dir: 数据目录（包含各论文的MinerU_process输出）
+
+    Returns:
+        Dict: 论文数、总耗时、单篇平均耗时以及各字段命中论文数与命中率
+    """
+    md_files = []
+    for paper_dir in sorted(glob.glob(os.path.join(data_dir, '*'))):
+        found = glob.glob(os.path.join(paper_dir, 'MinerU_process', '*', '*', '*.md'))
+        if found:
+            md_files.append(found[0])
+
+    hits = {field: 0 for field in FIELD_LABELS}
+    timings: List[Tuple[str, float]] = []
+    for md_file in md_files:
+        try:
+            with open(md_file, 'r', encoding='utf-8') as f:
+                md_content = f.read()
+        except Exception as e:
+            logger.warning(f"读取失败 {md_file}: {e}")
+            continue
+
+        start = time.perf_counter()
+        candidates = extract_candidates(md_content)
+        timings.append((md_file, time.perf_counter() - start))
+        for field in candidates:
+            hits[field] += 1
+
+    paper_count = len(timings)
+    total = sum(seconds for _, seconds in timings)
+    return {
+        "paper_count": paper_count,
+        "total_seconds": round(total, 4),
+        "mean_ms": round(total / paper_count * 1000, 2) if paper_count else 0.0,
+        "max_ms": round(max((s for _, s in timings), default=0) * 1000, 2),
+        "field_hits": hits,
+        "field_hit_rate": {field: round(count / paper_count, 3) if paper_count else 0.0
+                           for field, count in hits.items()}
+    }
+
+
+if __name__ == "__main__":
+    from config import config
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else config.DATA_DIR
+    report = benchmark_corpus(data_dir)
+    print("本地规则抽取基准测试")
+    print("=" * 50)
+    print(f"论文数: {report['paper_count']}")
+    print(f"总耗时: {report['total_seconds']:.3f}s，单篇平均 {report['mean_ms']:.2f}ms，最长 {report['max_ms']:.2f}ms")
+    print("\n各字段命中率:")
+    for field, label in FIELD_LABELS.items():
+        print(f"  {label}: {report['field_hits'][field]}/{report['paper_count']} "
+              f"({report['field_hit_rate'][field]:.0%})")
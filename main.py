@@ -320,6 +320,9 @@ from utils import setup_directories, logger, save_excluded_papers
 from searcher import ArxivSearcher
 from processor import PaperProcessor
 from analyzer import PaperAnalyzer
+from telemetry import print_summary
+from cost_estimator import print_estimate
+import tracing
 
 
 class LiteratureProcessor:
@@ -356,10 +359,11 @@ class LiteratureProcessor:
         print("3. 重新分析已处理的文献")
         print("4. 查看配置")
         print("5. 查看论文目录结构")
-        print("6. 退出")
+        print("6. 查看调用统计")
+        print("7. 退出")
         print("=" * 60)
 
-        choice = input("请选择操作 (1-6): ").strip()
+        choice = input("请选择操作 (1-7): ").strip()
         return choice
 
     def show_config(self):
@@ -372,6 +376,7 @@ class LiteratureProcessor:
         print(f"最大选择数量: {self.config.MAX_SELECTED}")
         print(f"数据目录: {self.config.DATA_DIR}")
         print(f"问题文件: {self.config.QUESTION_FILE}")
+        print(f"问题配置目录: {self.config.QUESTION_PROFILE_DIR}")
         print(f"排除文件: {self.config.EXCLUDE_CSV}")
         print(f"MinerU conda环境: {self.config.MINERU_CONDA_ENV}")
         print(f"Arxiv conda环境: {self.config.ARXIV_CONDA_ENV}")
@@ -501,6 +506,13 @@ class LiteratureProcessor:
             logger.info("用户取消操作或未选择论文")
             return
 
+        # 预估处理与分析的耗时和费用（可选）
+        if input("\n是否先预估处理与分析的耗时和费用？(y/N): ").strip().lower() == 'y':
+            print_estimate(self.processor.estimate_papers(selected_papers, analyzer=self.analyzer), "批量处理预估")
+            if input("是否继续处理？(Y/n): ").strip().lower() == 'n':
+                logger.info("用户取消处理")
+                return
+
         # 5. 处理选中的文献
         logger.info(f"开始处理选中的 {len(selected_papers)} 篇文献...")
         processed_papers = self.processor.process_papers(selected_papers)
@@ -608,12 +620,16 @@ class LiteratureProcessor:
             logger.info("用户取消操作或未选择论文")
             return
 
+        # 批量或并行转换选中的PDF，失败的再逐篇转换
+        converted = self.processor.convert_pdfs(
+            [(paper_info['pdf_path'], paper_info['paper_dir']) for paper_info in selected_papers])
+
         # 处理选中的论文
         processed_papers = []
-        for paper_info in selected_papers:
+        for paper_info, mineru_path in zip(selected_papers, converted):
             try:
                 # 使用现有的PDF文件进行转换
-                mineru_path = self.processor.convert_pdf_to_markdown(
+                mineru_path = mineru_path or self.processor.convert_pdf_to_markdown(
                     paper_info['pdf_path'],
                     paper_info['paper_dir']
                 )
@@ -734,10 +750,44 @@ class LiteratureProcessor:
             logger.info("用户取消操作或未选择论文")
             return
 
-        logger.info(f"开始重新分析选中的 {len(selected_papers)} 篇文献...")
-        analysis_results = self.analyzer.analyze_papers(selected_papers)
+        print("\n请选择重新分析方式:")
+        print("1. 全量重新分析")
+        print("2. 增量重新分析（仅重新计算问题、模型、提示词或文献内容有变化的条目）")
+        print("3. 预览增量重新分析（dry-run，不调用API）")
+        print("4. 预估全量重新分析（dry-run，不调用API）")
+        mode = input("请选择 (1-4，默认2): ").strip() or '2'
+
+        if mode == '3':
+            self._show_reanalysis_plan(selected_papers)
+            return
+        if mode == '4':
+            print_estimate(self.analyzer.estimate_papers(selected_papers, incremental=False), "全量重新分析预估")
+            return
+
+        incremental = mode != '1'
+        logger.info(f"开始{'增量' if incremental else ''}重新分析选中的 {len(selected_papers)} 篇文献...")
+        analysis_results = self.analyzer.analyze_papers(selected_papers, incremental=incremental)
         print(f"重新分析完成: {len(analysis_results)} 篇文献")
 
+    def _show_reanalysis_plan(self, selected_papers: List[Dict]):
+        """展示增量重新分析的预估结果"""
+        estimate = self.analyzer.estimate_papers(selected_papers, incremental=True)
+
+        print("\n增量重新分析预览:")
+        print("=" * 80)
+        for plan in estimate['papers']:
+            print(f"\n📁 {plan['paper_id']}")
+            print(f"   可复用: {plan['reused_count']} 项，需重新计算: {len(plan['stale_items'])} 项，"
+                  f"约 {plan['estimated_seconds'] / 60:.1f} 分钟")
+            for item in plan['stale_items']:
+                print(f"   - [{item['kind']}] {item['name'][:40]} "
+                      f"(原因: {', '.join(item['reasons'])}; 约 {item['input_tokens']}+{item['output_tokens']} tokens)")
+            for image in plan['skipped_images']:
+                print(f"   - [跳过图片] {image['name'][:40]} ({image['reason']})")
+
+        print("\n" + "=" * 80)
+        print_estimate(estimate, "增量重新分析预估")
+
     def _select_processed_papers(self, processed_papers: List[Dict]) -> List[Dict]:
         """选择要重新分析的论文"""
         print("\n请选择要重新分析的论文:")
@@ -794,7 +844,12 @@ class LiteratureProcessor:
             elif choice == '5':
                 self.show_paper_structure()
             elif choice == '6':
+                print_summary(self.config.DATA_DIR)
+            elif choice == '7':
                 logger.info("退出系统")
+                if tracing.is_enabled():
+                    tracing.export_chrome_trace()
+                self.processor.close()
                 break
             else:
                 print("无效选择，请重新输入")
@@ -802,6 +857,26 @@ class LiteratureProcessor:
             input("\n按Enter键继续...")
 
 
+def parse_args():
+    """命令行参数：性能剖析开关"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="文献处理系统")
+    parser.add_argument("--profile", metavar="STAGES",
+                        help="剖析的阶段，逗号分隔（search,process,convert,analyze 或 all），结果写入DATA_DIR/profiles")
+    parser.add_argument("--profile-mode", choices=["cprofile", "sampling"], help="剖析方式")
+    parser.add_argument("--profile-memory", action="store_true", help="同时记录tracemalloc内存快照")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.profile:
+        config.PROFILE_STAGES = args.profile
+    if args.profile_mode:
+        config.PROFILE_MODE = args.profile_mode
+    if args.profile_memory:
+        config.PROFILE_MEMORY = True
+
     processor = LiteratureProcessor()
     processor.run()
@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import time
+import shutil
+import platform
+import threading
+import subprocess
+from collections import deque
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from utils import logger
+
+
+# MinerU（tqdm）进度行，例如 "Layout Predict: 45%|████▌     | 5/11 [00:03<00:04, 1.52it/s]"
+PROGRESS_PATTERN = re.compile(
+    r'(?P<stage>[A-Za-z][\w\-/ ]{0,40}?)\s*:\s*(?P<percent>\d{1,3})%\|[^|]*\|\s*(?P<done>\d+)/(?P<total>\d+)')
+# 保留的最后若干行输出，用于失败时的错误信息
+TAIL_LINES = 50
+
+
+def parse_progress(line: str) -> Optional[Dict[str, Any]]:
+    """从MinerU输出行中解析进度，不是进度行时返回None"""
+    match = PROGRESS_PATTERN.search(line)
+    if not match:
+        return None
+    return {
+        "stage": match.group("stage").strip(),
+        "percent": int(match.group("percent")),
+        "done": int(match.group("done")),
+        "total": int(match.group("total"))
+    }
+
+
+def run_streaming(command: List[str], env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+                  on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    运行转换进程并实时读取输出
+
+    以进程退出作为完成信号（不轮询输出目录），stdout与stderr合并读取，
+    tqdm用回车刷新的进度在文本模式下按行拆分，解析出的进度交给on_progress。
+
+    Args:
+        command: 命令及参数
+        env: 额外的环境变量
+        timeout: 超时（秒），超时后结束进程
+        on_progress: 进度回调
+
+    Returns:
+        Dict: {"returncode", "timed_out", "seconds", "tail": 最后若干行输出, "last_progress"}
+    """
+    start = time.perf_counter()
+    tail = deque(maxlen=TAIL_LINES)
+    state = {"last_progress": None}
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               encoding='utf-8', errors='replace', bufsize=1,
+                               env={**os.environ, **(env or {})})
+
+    def read_output():
+        for line in process.stdout:
+            line = line.rstrip()
+            if not line:
+                continue
+            progress = parse_progress(line)
+            if progress:
+                state["last_progress"] = progress
+                if on_progress:
+                    on_progress(progress)
+            else:
+                tail.append(line)
+                logger.debug(f"[mineru] {line}")
+
+    reader = threading.Thread(target=read_output, name='mineru-output', daemon=True)
+    reader.start()
+
+    timed_out = False
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        logger.error(f"转换超过 {timeout} 秒，结束进程")
+        process.kill()
+        process.wait()
+    reader.join(timeout=5)
+
+    return {
+        "returncode": process.returncode,
+        "timed_out": timed_out,
+        "seconds": round(time.perf_counter() - start, 2),
+        "tail": list(tail),
+        "last_progress": state["last_progress"]
+    }
+
+
+def print_progress(progress: Dict[str, Any]):
+    """在控制台同一行刷新转换进度"""
+    print(f"\r转换进行中 [{progress['stage']}] {progress['percent']:>3}% ({progress['done']}/{progress['total']})      ",
+          end='', flush=True)
+
+
+class MinerUEnvironment:
+    """解析得到的MinerU运行环境：可执行文件、Python解释器与需要追加的环境变量"""
+
+    def __init__(self, mineru: str, python: Optional[str] = None, prefix: Optional[str] = None,
+                 version: Optional[str] = None, mtime: Optional[float] = None):
+        self.mineru = mineru
+        self.python = python
+        self.prefix = prefix
+        # MinerU版本（用于转换缓存的键），可执行文件修改时间变化（升级）时重新获取
+        self.mtime = _mtime(mineru)
+        self.version = version if version and mtime == self.mtime else _mineru_version(mineru)
+
+    def env(self) -> Dict[str, str]:
+        """直接调用环境中的程序时需要的环境变量（代替conda activate）"""
+        if not self.prefix:
+            return {}
+        if platform.system() == "Windows":
+            paths = [self.prefix, os.path.join(self.prefix, 'Library', 'bin'), os.path.join(self.prefix, 'Scripts')]
+        else:
+            paths = [os.path.join(self.prefix, 'bin')]
+        return {"PATH": os.pathsep.join(paths + [os.environ.get("PATH", "")]), "CONDA_PREFIX": self.prefix}
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {"mineru": self.mineru, "python": self.python, "prefix": self.prefix, "version": self.version,
+                "mtime": self.mtime}
+
+    def is_valid(self) -> bool:
+        return bool(self.mineru) and os.path.isfile(self.mineru) and (not self.python or os.path.isfile(self.python))
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _mineru_version(mineru: str) -> str:
+    """mineru --version的版本号，获取失败时返回unknown"""
+    try:
+        completed = subprocess.run([mineru, "--version"], capture_output=True, text=True, timeout=120)
+        match = re.search(r'\d+(?:\.\d+)+\S*', completed.stdout) if completed.returncode == 0 else None
+        if match:
+            return match.group(0)
+    except Exception as e:
+        logger.warning(f"获取MinerU版本失败: {e}")
+    return "unknown"
+
+
+_resolved: Dict[str, Optional[MinerUEnvironment]] = {}
+_resolve_lock = threading.Lock()
+
+
+def _env_executables(prefix: str) -> Tuple[str, str]:
+    if platform.system() == "Windows":
+        return os.path.join(prefix, 'Scripts', 'mineru.exe'), os.path.join(prefix, 'python.exe')
+    return os.path.join(prefix, 'bin', 'mineru'), os.path.join(prefix, 'bin', 'python')
+
+
+def _find_conda_prefix(conda_executable: str, env_name: str) -> Optional[str]:
+    """通过conda env list --json查找环境目录（只在没有缓存时调用一次）"""
+    try:
+        completed = subprocess.run([conda_executable, "env", "list", "--json"], capture_output=True, text=True,
+                                   timeout=30)
+        if completed.returncode != 0:
+            logger.error(f"查询conda环境失败: {completed.stderr.strip()}")
+            return None
+        for prefix in json.loads(completed.stdout).get("envs", []):
+            if os.path.basename(os.path.normpath(prefix)) == env_name:
+                return prefix
+    except Exception as e:
+        logger.error(f"查询conda环境失败: {e}")
+    return None
+
+
+def resolve_mineru(env_name: str, conda_executable: str = "conda", executable: str = "",
+                   cache_file: Optional[str] = None) -> Optional[MinerUEnvironment]:
+    """
+    解析MinerU可执行文件，进程内只解析一次，并缓存到文件供下次启动使用
+
+    依次尝试：配置中指定的可执行文件、缓存文件、conda环境目录（conda env list --json）、当前PATH中的mineru。
+
+    Args:
+        env_name: MinerU所在的conda环境名
+        conda_executable: conda可执行文件
+        executable: 配置中指定的mineru路径（为空时自动查找）
+        cache_file: 解析结果缓存文件
+
+    Returns:
+        Optional[MinerUEnvironment]: 找不到MinerU时返回None
+    """
+    key = f"{env_name}|{executable}"
+    with _resolve_lock:
+        if key in _resolved:
+            return _resolved[key]
+
+        environment = None
+        if executable:
+            prefix = os.path.dirname(os.path.dirname(os.path.abspath(executable)))
+            python = _env_executables(prefix)[1]
+            environment = MinerUEnvironment(executable, python if os.path.isfile(python) else None, prefix)
+
+        if environment is None and cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get("env_name") == env_name and os.path.isfile(cached.get("mineru", "")):
+                    environment = MinerUEnvironment(cached["mineru"], cached.get("python"), cached.get("prefix"),
+                                                    cached.get("version"), cached.get("mtime"))
+                    if not environment.is_valid():
+                        environment = None
+            except Exception:
+                environment = None
+
+        if environment is None:
+            prefix = _find_conda_prefix(conda_executable, env_name)
+            if prefix:
+                mineru, python = _env_executables(prefix)
+                if os.path.isfile(mineru):
+                    environment = MinerUEnvironment(mineru, python if os.path.isfile(python) else None, prefix)
+                else:
+                    logger.error(f"conda环境 {env_name} 中没有找到mineru: {mineru}")
+
+        if environment is None and shutil.which("mineru"):
+            mineru = shutil.which("mineru")
+            logger.warning(f"未找到conda环境 {env_name}，使用PATH中的mineru: {mineru}")
+            python = os.path.join(os.path.dirname(mineru), os.path.basename(_env_executables('')[1]))
+            environment = MinerUEnvironment(mineru, python if os.path.isfile(python) else None)
+
+        if environment is None:
+            logger.error("无法找到MinerU可执行文件")
+        else:
+            logger.info(f"MinerU {environment.version}: {environment.mineru}")
+            if cache_file and not executable:
+                try:
+                    with open(cache_file, 'w', encoding='utf-8') as f:
+                        json.dump({"env_name": env_name, **environment.to_dict()}, f, ensure_ascii=False, indent=2)
+                except Exception as e:
+                    logger.warning(f"保存MinerU环境缓存失败: {e}")
+
+        _resolved[key] = environment
+        return environment
@@ -0,0 +1,85 @@
+"""
+MinerU常驻转换服务（在MinerU所在的conda环境中运行）
+
+由mineru_worker.MinerUWorker启动，通过本地socket接收转换任务。
+同一进程内MinerU的版面、OCR与公式模型只在第一个任务时加载一次，之后的任务直接复用。
+本文件只依赖标准库与mineru，不导入项目中的其他模块。
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+import traceback
+from pathlib import Path
+from multiprocessing.connection import Listener
+
+AUTHKEY_ENV = 'MINERU_WORKER_AUTHKEY'
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - mineru_service - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def convert(pdf_path: str, output_dir: str, backend: str, lang: str, method: str) -> str:
+    """转换单个PDF，输出布局与mineru命令行一致：<output_dir>/<文件名>/<解析方式>/"""
+    from mineru.cli.common import do_parse, read_fn
+
+    stem = Path(pdf_path).stem
+    pdf_bytes = read_fn(Path(pdf_path))
+    do_parse(output_dir, [stem], [pdf_bytes], [lang], backend=backend, parse_method=method)
+    return os.path.join(output_dir, stem)
+
+
+def serve(port: int, authkey: bytes):
+    # 启动时导入MinerU，导入失败时尽早退出，由客户端报告环境问题
+    from mineru.cli.common import do_parse  # noqa: F401
+
+    listener = Listener(('127.0.0.1', port), authkey=authkey)
+    logger.info(f"MinerU转换服务已启动，端口 {port}，进程 {os.getpid()}")
+    jobs = 0
+    try:
+        while True:
+            conn = listener.accept()
+            try:
+                while True:
+                    try:
+                        message = conn.recv()
+                    except EOFError:
+                        break
+
+                    command = message.get("cmd")
+                    if command == "ping":
+                        conn.send({"ok": True, "pid": os.getpid(), "jobs": jobs})
+                    elif command == "shutdown":
+                        conn.send({"ok": True})
+                        logger.info("收到关闭请求")
+                        return
+                    elif command == "convert":
+                        start = time.perf_counter()
+                        try:
+                            output = convert(message["pdf_path"], message["output_dir"], message.get("backend", "pipeline"),
+                                             message.get("lang", "ch"), message.get("method", "auto"))
+                            jobs += 1
+                            conn.send({"ok": True, "output": output, "seconds": round(time.perf_counter() - start, 2)})
+                        except Exception as e:
+                            logger.error(f"转换失败 {message.get('pdf_path')}: {e}")
+                            conn.send({"ok": False, "error": f"{e}\n{traceback.format_exc()}",
+                                       "seconds": round(time.perf_counter() - start, 2)})
+                    else:
+                        conn.send({"ok": False, "error": f"未知命令: {command}"})
+            finally:
+                conn.close()
+    finally:
+        listener.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MinerU常驻转换服务")
+    parser.add_argument("--port", type=int, required=True)
+    args = parser.parse_args()
+
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        print(f"缺少环境变量 {AUTHKEY_ENV}", file=sys.stderr)
+        sys.exit(2)
+    serve(args.port, authkey.encode())
@@ -0,0 +1,181 @@
+import os
+import time
+import socket
+import atexit
+import secrets
+import threading
+import subprocess
+from multiprocessing.connection import Client
+from typing import List, Dict, Any, Optional
+
+from utils import logger
+from mineru_service import AUTHKEY_ENV
+
+
+SERVICE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mineru_service.py')
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class MinerUWorker:
+    """
+    常驻MinerU转换进程的客户端
+
+    启动mineru_service.py（在MinerU环境的Python中运行），通过本地socket提交转换任务，
+    模型在服务进程中只加载一次。每个任务前做健康检查，服务进程退出、连接断开或任务超时时重启服务，
+    并对该任务重试一次。
+    """
+
+    def __init__(self, python_command: List[str], log_path: str, backend: str = "pipeline", lang: str = "ch",
+                 method: str = "auto", startup_timeout: float = 120, job_timeout: float = 600,
+                 env: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            python_command: 启动MinerU环境Python的命令（如conda run -n <env> python）
+            log_path: 服务进程输出日志
+            backend: MinerU后端
+            lang: OCR语言
+            method: 解析方式（auto、txt、ocr）
+            startup_timeout: 等待服务就绪的最长时间（秒）
+            job_timeout: 单个任务的最长时间（秒）
+            env: 额外的环境变量
+        """
+        self.python_command = python_command
+        self.log_path = log_path
+        self.backend = backend
+        self.lang = lang
+        self.method = method
+        self.startup_timeout = startup_timeout
+        self.job_timeout = job_timeout
+        self.env = env or {}
+
+        self._process: Optional[subprocess.Popen] = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self.restarts = 0
+        atexit.register(self.stop)
+
+    def start(self) -> bool:
+        """启动服务进程并等待就绪"""
+        self._close()
+        port = _free_port()
+        authkey = secrets.token_hex(16)
+        env = {**os.environ, **self.env, AUTHKEY_ENV: authkey}
+        env.setdefault("HF_HUB_DISABLE_SYMLINKS_WARNING", "1")
+
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        log_file = open(self.log_path, 'a', encoding='utf-8')
+        logger.info(f"启动MinerU常驻转换服务，日志: {self.log_path}")
+        try:
+            self._process = subprocess.Popen(self.python_command + [SERVICE_SCRIPT, '--port', str(port)],
+                                             stdout=log_file, stderr=subprocess.STDOUT, env=env)
+        except Exception as e:
+            logger.error(f"启动MinerU转换服务失败: {e}")
+            return False
+        finally:
+            log_file.close()
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                logger.error(f"MinerU转换服务启动后退出（返回码 {self._process.returncode}），详见 {self.log_path}")
+                return False
+            try:
+                self._conn = Client(('127.0.0.1', port), authkey=authkey.encode())
+                if self._request({"cmd": "ping"}, timeout=10).get("ok"):
+                    logger.info(f"MinerU转换服务已就绪（进程 {self._process.pid}）")
+                    return True
+            except (ConnectionRefusedError, OSError, EOFError):
+                time.sleep(0.5)
+
+        logger.error("等待MinerU转换服务就绪超时")
+        self._kill()
+        return False
+
+    def _request(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self._conn.send(message)
+        if not self._conn.poll(timeout):
+            raise TimeoutError(f"MinerU转换服务在 {timeout} 秒内没有响应")
+        return self._conn.recv()
+
+    def is_healthy(self) -> bool:
+        """健康检查：进程存活且能响应ping"""
+        if self._process is None or self._process.poll() is not None or self._conn is None:
+            return False
+        try:
+            return bool(self._request({"cmd": "ping"}, timeout=10).get("ok"))
+        except Exception:
+            return False
+
+    def restart(self) -> bool:
+        self.restarts += 1
+        logger.warning(f"重启MinerU转换服务（第 {self.restarts} 次）")
+        self._kill()
+        return self.start()
+
+    def convert(self, pdf_path: str, output_dir: str, method: Optional[str] = None) -> Optional[str]:
+        """
+        提交转换任务
+
+        Args:
+            pdf_path: PDF路径
+            output_dir: 输出目录（MinerU_process）
+            method: 解析方式，为空时使用默认值
+
+        Returns:
+            Optional[str]: 成功时返回输出子目录
+        """
+        message = {"cmd": "convert", "pdf_path": os.path.abspath(pdf_path), "output_dir": os.path.abspath(output_dir),
+                   "backend": self.backend, "lang": self.lang, "method": method or self.method}
+        with self._lock:
+            for attempt in (1, 2):
+                if not self.is_healthy() and not (self.restart() if self._process else self.start()):
+                    return None
+                try:
+                    response = self._request(message, timeout=self.job_timeout)
+                except Exception as e:
+                    # 服务崩溃、连接断开或超时：重启服务后重试一次
+                    logger.error(f"MinerU转换服务任务失败（第 {attempt} 次）: {type(e).__name__} {e}")
+                    self._kill()
+                    continue
+
+                if response.get("ok"):
+                    logger.info(f"MinerU转换完成，用时 {response['seconds']}s: {response['output']}")
+                    return response["output"]
+                logger.error(f"MinerU转换失败: {response.get('error', '')[:500]}")
+                # 转换出错后检查服务状态，不健康时关闭，下一个任务前重新启动
+                if not self.is_healthy():
+                    self._kill()
+                return None
+        return None
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _kill(self):
+        self._close()
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+
+    def stop(self):
+        """关闭服务进程"""
+        if self._process is None:
+            return
+        if self._process.poll() is None and self._conn is not None:
+            try:
+                self._request({"cmd": "shutdown"}, timeout=10)
+                self._process.wait(timeout=10)
+            except Exception:
+                pass
+        self._kill()
+        self._process = None
@@ -0,0 +1,202 @@
+import os
+import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import logger
+from telemetry import track_call, telemetry_context
+from tracing import with_context
+
+
+PARTIAL_SUFFIX = '.part'
+CHUNK_SIZE = 1024 * 1024
+# PDF结束标记通常位于文件末尾，允许其后有少量空白或增量更新残留
+EOF_SEARCH_BYTES = 2048
+
+
+def verify_pdf(path: str) -> Tuple[bool, str]:
+    """
+    检查PDF文件完整性：文件头为%PDF-，末尾附近包含%%EOF
+
+    Returns:
+        Tuple[bool, str]: (是否完整, 原因)
+    """
+    try:
+        size = os.path.getsize(path)
+        if size < 1024:
+            return False, f"文件过小 ({size} 字节)"
+        with open(path, 'rb') as f:
+            if not f.read(5).startswith(b'%PDF-'):
+                return False, "缺少%PDF文件头"
+            f.seek(max(0, size - EOF_SEARCH_BYTES))
+            if b'%%EOF' not in f.read():
+                return False, "缺少%%EOF结束标记（可能下载不完整）"
+        return True, "完整"
+    except OSError as e:
+        return False, f"无法读取文件: {e}"
+
+
+class PDFDownloadManager:
+    """
+    并行PDF下载管理器
+
+    - 共享连接池的requests.Session，多个下载并行进行
+    - 按主机限制并发数，并保证同一主机两次请求之间的最小间隔（对arXiv保持礼貌）
+    - 先写入.part临时文件，校验通过后原子重命名为最终文件，中断不会留下被信任的残缺PDF
+    - 已有.part文件时通过HTTP Range续传
+    - 目标文件已存在且校验通过时直接跳过
+    """
+
+    def __init__(self, max_workers: int = 4, per_host: int = 2, min_interval: float = 1.0,
+                 timeout: Tuple[float, float] = (10, 120), max_retries: int = 3):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._hosts_lock = threading.Lock()
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._host_last_request: Dict[str, float] = {}
+
+    def _host_slot(self, host: str) -> threading.Semaphore:
+        with self._hosts_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _wait_politeness(self, host: str):
+        """同一主机两次请求之间至少间隔min_interval秒"""
+        while True:
+            with self._hosts_lock:
+                now = time.monotonic()
+                wait = self._host_last_request.get(host, 0) + self.min_interval - now
+                if wait <= 0:
+                    self._host_last_request[host] = now
+                    return
+            time.sleep(wait)
+
+    def _fetch(self, url: str, partial_path: str, call) -> int:
+        """下载到.part文件（已有部分内容时续传），返回本次下载的字节数"""
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+            call.set_response(response)
+            if response.status_code == 416:
+                # 请求的范围超出文件大小：.part文件已是完整内容
+                return 0
+            response.raise_for_status()
+
+            if offset and response.status_code != 206:
+                logger.info(f"服务器不支持续传，重新下载: {url}")
+                offset = 0
+            elif offset:
+                logger.info(f"从 {offset} 字节处续传: {url}")
+            call.set(resumed_from=offset)
+
+            size = 0
+            with open(partial_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        size += len(chunk)
+            return size
+
+    def download(self, url: str, filepath: str, validate: Callable[[str], Tuple[bool, str]] = verify_pdf,
+                 stage: str = "pdf_download") -> Dict[str, Any]:
+        """
+        下载单个PDF（或其他文件，如arXiv的LaTeX源码包）
+
+        Args:
+            url: PDF链接
+            filepath: 目标文件路径
+            validate: 文件完整性检查，默认检查PDF
+            stage: 记录调用耗时使用的阶段名
+
+        Returns:
+            Dict: {"path": 成功时的文件路径或None, "status": downloaded/skipped/failed, "error": 错误信息}
+        """
+        if os.path.exists(filepath):
+            valid, reason = validate(filepath)
+            if valid:
+                logger.info(f"文件已存在且校验通过，跳过下载: {filepath}")
+                return {"path": filepath, "status": "skipped", "error": None}
+            logger.warning(f"已有文件不完整（{reason}），重新下载: {filepath}")
+            os.remove(filepath)
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        partial_path = filepath + PARTIAL_SUFFIX
+        host = urlparse(url).netloc
+        error = None
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                with self._host_slot(host):
+                    self._wait_politeness(host)
+                    logger.info(f"开始下载: {url}")
+                    with track_call(stage, url=url, attempt=attempt) as call:
+                        size = self._fetch(url, partial_path, call)
+                        call.set(bytes=size)
+
+                valid, reason = validate(partial_path)
+                if valid:
+                    os.replace(partial_path, filepath)
+                    logger.info(f"下载完成: {filepath}")
+                    return {"path": filepath, "status": "downloaded", "error": None}
+
+                # 内容损坏时续传无意义，删除后重新下载
+                error = f"文件校验失败: {reason}"
+                logger.warning(f"{error}，第 {attempt}/{self.max_retries} 次: {url}")
+                os.remove(partial_path)
+            except Exception as e:
+                # 网络中断时保留.part文件，下次尝试从断点续传
+                error = str(e)
+                logger.warning(f"下载失败，第 {attempt}/{self.max_retries} 次: {e}")
+            if attempt < self.max_retries:
+                time.sleep(min(2 ** attempt, 30))
+
+        logger.error(f"下载失败: {url}: {error}")
+        return {"path": None, "status": "failed", "error": error}
+
+    def _download_with_context(self, url: str, filepath: str, fields: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        with telemetry_context(**fields):
+            return self.download(url, filepath, **kwargs)
+
+    def download_many(self, jobs: List[Tuple[str, str]], contexts: Optional[List[Dict[str, Any]]] = None,
+                      validate: Callable[[str], Tuple[bool, str]] = verify_pdf,
+                      stage: str = "pdf_download") -> List[Dict[str, Any]]:
+        """
+        并行下载多个PDF
+
+        Args:
+            jobs: [(PDF链接, 目标文件路径)]
+            contexts: 每个下载的调用上下文（如paper_id），与jobs一一对应
+            validate: 文件完整性检查，默认检查PDF
+            stage: 记录调用耗时使用的阶段名
+
+        Returns:
+            List[Dict]: 与jobs顺序一致的下载结果
+        """
+        if not jobs:
+            return []
+        contexts = contexts or [{} for _ in jobs]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs)),
+                                thread_name_prefix='pdf-download') as executor:
+            futures = [executor.submit(with_context(self._download_with_context), url, path, fields,
+                                       validate=validate, stage=stage)
+                       for (url, path), fields in zip(jobs, contexts)]
+            return [future.result() for future in futures]
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,280 @@
+"""
+PyMuPDF备用转换器（MinerU不可用或转换失败时使用）
+
+按页分块在多个进程中并行提取文本块与嵌入图片，根据字号排序恢复标题层级，
+按栏恢复阅读顺序，输出布局与MinerU一致：<输出目录>/<文件名>/auto/{<文件名>.md, <文件名>_content_list.json, images/}，
+后续的分析流程无需区分两种转换结果。
+"""
+import os
+import re
+import json
+import time
+import shutil
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils import logger
+
+
+# 页数少于该值时在当前进程中提取（启动进程池的开销大于收益）
+MIN_PAGES_FOR_POOL = 8
+# 小于该尺寸（像素）的图片视为图标或装饰，不提取
+MIN_IMAGE_SIZE = 64
+# 页眉页脚区域（页面高度的比例），其中的短文本（页码、页眉）不输出
+MARGIN_RATIO = 0.05
+# 最多识别的标题层级数
+MAX_HEADING_LEVELS = 3
+SECTION_NUMBER = re.compile(r'^(?:\d+(?:\.\d+)*\.?|[A-Z](?:\.\d+)*\.?|[IVX]+\.)\s+\S')
+CAPTION_PREFIX = re.compile(r'^(?:Figure|Fig\.|图)\s*\d+', re.IGNORECASE)
+
+
+def _block_text(block: Dict[str, Any]) -> Tuple[str, float, bool, int]:
+    """合并文本块中的行，返回(文本, 主要字号, 是否粗体, 字符数)；只保留水平方向的行（跳过arXiv侧边标识等竖排文字）"""
+    lines = []
+    sizes: Counter = Counter()
+    bold_chars = 0
+    for line in block.get("lines", []):
+        if abs(line.get("dir", (1, 0))[1]) > 0.1:
+            continue
+        text = ''.join(span["text"] for span in line["spans"])
+        for span in line["spans"]:
+            count = len(span["text"].strip())
+            sizes[round(span["size"] * 2) / 2] += count
+            if span["flags"] & 16:
+                bold_chars += count
+        if text.strip():
+            lines.append(text.strip())
+
+    chars = sum(sizes.values())
+    if not lines or not chars:
+        return "", 0.0, False, 0
+
+    # 合并行：行尾连字符直接拼接，其余以空格连接
+    merged = lines[0]
+    for text in lines[1:]:
+        merged = merged[:-1] + text if merged.endswith('-') and merged[-2:-1].isalpha() else f"{merged} {text}"
+    return merged, sizes.most_common(1)[0][0], bold_chars > chars / 2, chars
+
+
+def _reading_order(items: List[Dict[str, Any]], page_width: float) -> List[Dict[str, Any]]:
+    """
+    按栏恢复阅读顺序：跨栏的块（标题、通栏图表）把页面分成若干带，
+    每一带内先左栏后右栏，栏内从上到下
+    """
+    middle = page_width / 2
+    tolerance = page_width * 0.02
+
+    def column(item):
+        x0, _, x1, _ = item["bbox"]
+        if x1 <= middle + tolerance:
+            return 0
+        if x0 >= middle - tolerance:
+            return 1
+        return -1
+
+    ordered, band = [], []
+    for item in sorted(items, key=lambda i: (i["bbox"][1], i["bbox"][0])):
+        if column(item) == -1:
+            ordered.extend(sorted(band, key=lambda i: (column(i), i["bbox"][1])))
+            band = []
+            ordered.append(item)
+        else:
+            band.append(item)
+    ordered.extend(sorted(band, key=lambda i: (column(i), i["bbox"][1])))
+    return ordered
+
+
+def _extract_image(doc, xref: int, images_dir: str) -> Optional[str]:
+    """保存嵌入图片为PNG（同一图片只保存一次），返回文件名"""
+    import fitz  # PyMuPDF
+
+    name = f"img_{xref}.png"
+    path = os.path.join(images_dir, name)
+    if os.path.exists(path):
+        return name
+    pixmap = fitz.Pixmap(doc, xref)
+    if pixmap.width < MIN_IMAGE_SIZE or pixmap.height < MIN_IMAGE_SIZE:
+        return None
+    if pixmap.n - pixmap.alpha >= 4:
+        pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+    elif pixmap.alpha:
+        pixmap = fitz.Pixmap(pixmap, 0)
+    pixmap.save(path)
+    return name
+
+
+def extract_pages(pdf_path: str, start: int, end: int, images_dir: str) -> List[List[Dict[str, Any]]]:
+    """
+    提取[start, end)页的文本块与图片（在进程池中运行）
+
+    Returns:
+        List[List[Dict]]: 每页按阅读顺序排列的块，
+        文本块 {"type": "text", "text", "size", "bold", "chars", "bbox"}，图片块 {"type": "image", "file", "bbox"}
+    """
+    import fitz  # PyMuPDF
+
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for page_index in range(start, end):
+            page = doc.load_page(page_index)
+            height = page.rect.height
+            items = []
+            for block in page.get_text("dict")["blocks"]:
+                if block.get("type") != 0:
+                    continue
+                text, size, bold, chars = _block_text(block)
+                if not text:
+                    continue
+                y0, y1 = block["bbox"][1], block["bbox"][3]
+                in_margin = y1 < height * MARGIN_RATIO or y0 > height * (1 - MARGIN_RATIO)
+                if in_margin and len(text) < 80:
+                    continue
+                items.append({"type": "text", "text": text, "size": size, "bold": bold, "chars": chars,
+                              "bbox": tuple(block["bbox"])})
+
+            for image in page.get_images(full=True):
+                xref = image[0]
+                try:
+                    rects = page.get_image_rects(xref)
+                    name = _extract_image(doc, xref, images_dir) if rects else None
+                except Exception as e:
+                    logger.debug(f"提取图片 {xref} 失败: {e}")
+                    continue
+                if name:
+                    items.append({"type": "image", "file": name, "bbox": tuple(rects[0])})
+
+            pages.append(_reading_order(items, page.rect.width))
+    return pages
+
+
+def _heading_levels(pages: List[List[Dict[str, Any]]]) -> Tuple[float, Dict[float, int]]:
+    """按字符数统计正文字号，比正文大的字号按从大到小排名为1..MAX_HEADING_LEVELS级标题"""
+    sizes: Counter = Counter()
+    for blocks in pages:
+        for block in blocks:
+            if block["type"] == "text":
+                sizes[block["size"]] += block["chars"]
+    if not sizes:
+        return 0.0, {}
+    body_size = sizes.most_common(1)[0][0]
+    larger = sorted((size for size in sizes if size >= body_size + 1), reverse=True)
+    # 字号过大的只出现一次的文字（如首页大号标题）仍然作为一级标题
+    return body_size, {size: min(rank + 1, MAX_HEADING_LEVELS) for rank, size in enumerate(larger)}
+
+
+def _heading_level(block: Dict[str, Any], body_size: float, levels: Dict[float, int]) -> int:
+    """标题层级，不是标题时返回0"""
+    text = block["text"]
+    if len(text) > 150 or text.endswith(('.', ',', ';', ':')) and not SECTION_NUMBER.match(text):
+        return 0
+    if block["size"] in levels:
+        return levels[block["size"]]
+    # 与正文字号相同的粗体编号标题（如"3.1 Method"），按编号深度确定层级
+    if block["bold"] and block["size"] >= body_size and len(text) <= 100 and SECTION_NUMBER.match(text):
+        depth = text.split()[0].rstrip('.').count('.') + 1
+        return min(depth + 1, MAX_HEADING_LEVELS)
+    return 0
+
+
+def convert_pdf(pdf_path: str, output_dir: str, workers: int = 0) -> Optional[str]:
+    """
+    用PyMuPDF把PDF转换为MinerU格式的输出
+
+    Args:
+        pdf_path: PDF路径
+        output_dir: 输出目录（论文的MinerU_process目录）
+        workers: 并行进程数，0表示使用全部CPU核心
+
+    Returns:
+        Optional[str]: 生成的markdown文件路径（<输出目录>/<文件名>/auto/<文件名>.md，转换成功后整体替换已有输出），
+        失败时返回None
+    """
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        logger.error("PyMuPDF未安装，无法使用备用转换方法")
+        return None
+
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+    if page_count == 0:
+        logger.error(f"PDF没有页面: {pdf_path}")
+        return None
+
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    target = os.path.join(output_dir, stem)
+    # 先写入同一目录下的临时目录再整体替换：已有输出可能是指向转换缓存的硬链接，原地覆盖写入会破坏缓存条目，
+    # 也会与MinerU残留的文件混在一起
+    staging = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        md_file = _convert_into(pdf_path, staging, stem, page_count, workers)
+        previous = f"{staging}.old"
+        if os.path.exists(target):
+            os.replace(target, previous)
+        try:
+            os.replace(staging, target)
+        except OSError:
+            if os.path.exists(previous):
+                os.replace(previous, target)
+            raise
+        shutil.rmtree(previous, ignore_errors=True)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return os.path.join(target, 'auto', os.path.basename(md_file))
+
+
+def _convert_into(pdf_path: str, output_root: str, stem: str, page_count: int, workers: int) -> str:
+    """把PDF转换到<output_root>/auto/，返回markdown文件路径"""
+    start_time = time.perf_counter()
+    auto_dir = os.path.join(output_root, 'auto')
+    images_dir = os.path.join(auto_dir, 'images')
+    os.makedirs(images_dir, exist_ok=True)
+
+    # 1. 按页分块并行提取
+    workers = min(workers or os.cpu_count() or 1, page_count)
+    if workers > 1 and page_count >= MIN_PAGES_FOR_POOL:
+        chunk = -(-page_count // workers)
+        ranges = [(i, min(i + chunk, page_count)) for i in range(0, page_count, chunk)]
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [executor.submit(extract_pages, pdf_path, begin, end, images_dir) for begin, end in ranges]
+            pages = [page for future in futures for page in future.result()]
+    else:
+        workers = 1
+        pages = extract_pages(pdf_path, 0, page_count, images_dir)
+
+    # 2. 恢复标题层级，生成markdown与content_list
+    body_size, levels = _heading_levels(pages)
+    markdown: List[str] = []
+    content_list: List[Dict[str, Any]] = []
+    for page_index, blocks in enumerate(pages):
+        for i, block in enumerate(blocks):
+            if block["type"] == "image":
+                following = blocks[i + 1] if i + 1 < len(blocks) else None
+                caption = following["text"] if following and following["type"] == "text" \
+                    and CAPTION_PREFIX.match(following["text"]) else ""
+                markdown.append(f"![](images/{block['file']})")
+                content_list.append({"type": "image", "img_path": f"images/{block['file']}",
+                                     "img_caption": [caption] if caption else [], "img_footnote": [],
+                                     "page_idx": page_index})
+                continue
+
+            level = _heading_level(block, body_size, levels)
+            markdown.append(f"{'#' * level} {block['text']}" if level else block["text"])
+            item = {"type": "text", "text": block["text"], "page_idx": page_index}
+            if level:
+                item["text_level"] = level
+            content_list.append(item)
+
+    md_file = os.path.join(auto_dir, f"{stem}.md")
+    with open(md_file, 'w', encoding='utf-8') as f:
+        f.write('\n\n'.join(markdown) + '\n')
+    with open(os.path.join(auto_dir, f"{stem}_content_list.json"), 'w', encoding='utf-8') as f:
+        json.dump(content_list, f, ensure_ascii=False, indent=2)
+
+    headings = sum(1 for item in content_list if item.get("text_level"))
+    images = sum(1 for item in content_list if item["type"] == "image")
+    logger.info(f"备用方法转换完成: {page_count} 页，{headings} 个标题，{images} 张图片，"
+                f"{workers} 个进程，用时 {time.perf_counter() - start_time:.2f}s: {pdf_path}")
+    return md_file
@@ -3,13 +3,25 @@
 # mineru -p <input_path> -o <output_path>
 import os
 import subprocess
-import requests
 import json
 import tempfile
 import platform
 import shutil
-from typing import List, Dict, Optional
-from utils import logger
+import time
+from typing import List, Dict, Optional, Tuple
+from utils import logger, find_method_dir
+from telemetry import track_call, telemetry_context
+from tracing import traced
+from profiler import profiled
+from cost_estimator import estimate_processing
+from pdf_downloader import PDFDownloadManager
+from latex_source import eprint_url, verify_eprint, convert_latex_source
+from mineru_worker import MinerUWorker
+from conversion_pool import ConversionPool, plan_workers
+from conversion_cache import ConversionCache, has_hardlinks
+from text_layer import inspect_text_layer
+from pdf_fallback import convert_pdf
+from mineru_runner import run_streaming, print_progress, resolve_mineru, MinerUEnvironment
 
 
 
@@ -17,6 +29,21 @@ class PaperProcessor:
     def __init__(self, config):
         self.config = config
         self.ensure_directories()
+        # 共享连接池的并行下载器
+        self.downloader = PDFDownloadManager(
+            max_workers=config.PDF_DOWNLOAD_WORKERS,
+            per_host=config.PDF_DOWNLOAD_PER_HOST,
+            min_interval=config.PDF_DOWNLOAD_MIN_INTERVAL,
+            timeout=(config.PDF_DOWNLOAD_CONNECT_TIMEOUT, config.PDF_DOWNLOAD_READ_TIMEOUT),
+            max_retries=config.PDF_DOWNLOAD_RETRIES
+        )
+        # 常驻MinerU转换服务（首次使用时启动）
+        self._mineru_worker: Optional[MinerUWorker] = None
+        # 按PDF内容寻址的转换缓存
+        self.conversion_cache = ConversionCache(os.path.join(config.DATA_DIR, '.conversion_cache')) \
+            if config.CONVERSION_CACHE_ENABLED else None
+        # PDF路径 -> MinerU解析方式（文本层检测结果）
+        self._parse_methods: Dict[str, str] = {}
 
     def ensure_directories(self):
         """确保data根目录存在"""
@@ -47,43 +74,106 @@ class PaperProcessor:
         logger.info(f"创建论文目录: {paper_dir}")
         return paper_dir
 
+    @staticmethod
+    def _pdf_filepath(paper: Dict, paper_dir: str) -> str:
+        """PDF保存路径：<论文目录>/pdf/<论文ID>.pdf"""
+        return os.path.join(paper_dir, 'pdf', f"{paper.get('id', 'unknown')}.pdf")
+
     def download_pdf(self, paper: Dict, paper_dir: str) -> Optional[str]:
-        """下载PDF文件到论文的pdf目录"""
+        """下载PDF文件到论文的pdf目录（已存在且完整时跳过）"""
         pdf_url = paper.get('pdf_url', '')
         if not pdf_url:
             logger.error(f"论文 {paper.get('id', 'Unknown')} 没有PDF链接")
             return None
 
-        # PDF保存路径
-        paper_id = paper.get('id', 'unknown')
-        filename = f"{paper_id}.pdf"
-        pdf_dir = os.path.join(paper_dir, 'pdf')
-        filepath = os.path.join(pdf_dir, filename)
-
-        try:
-            logger.info(f"开始下载: {pdf_url}")
-            response = requests.get(pdf_url, stream=True, timeout=300)
-            response.raise_for_status()
-
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-            logger.info(f"PDF下载完成: {filepath}")
-            return filepath
+        return self.downloader.download(pdf_url, self._pdf_filepath(paper, paper_dir))["path"]
+
+    def download_pdfs(self, papers: List[Dict], paper_dirs: List[str]) -> List[Dict]:
+        """
+        并行下载多篇论文的PDF
+
+        Args:
+            papers: 论文列表
+            paper_dirs: 与papers一一对应的论文目录
+
+        Returns:
+            List[Dict]: 与papers顺序一致的下载结果 {"path", "status", "error"}
+        """
+        results: List[Optional[Dict]] = [None] * len(papers)
+        jobs, contexts, indexes = [], [], []
+        for i, (paper, paper_dir) in enumerate(zip(papers, paper_dirs)):
+            if not paper.get('pdf_url'):
+                logger.error(f"论文 {paper.get('id', 'Unknown')} 没有PDF链接")
+                results[i] = {"path": None, "status": "failed", "error": "没有PDF链接"}
+                continue
+            jobs.append((paper['pdf_url'], self._pdf_filepath(paper, paper_dir)))
+            contexts.append({"paper_id": paper.get('id', 'unknown')})
+            indexes.append(i)
+
+        logger.info(f"并行下载 {len(jobs)} 篇论文的PDF（并发 {self.downloader.max_workers}）")
+        for i, result in zip(indexes, self.downloader.download_many(jobs, contexts)):
+            results[i] = result
+
+        counts = {status: sum(1 for r in results if r["status"] == status)
+                  for status in ("downloaded", "skipped", "failed")}
+        logger.info(f"PDF下载完成: 新下载 {counts['downloaded']} 篇，已存在 {counts['skipped']} 篇，"
+                    f"失败 {counts['failed']} 篇")
+        return results
 
-        except Exception as e:
-            logger.error(f"下载PDF失败: {e}")
-            return None
+    @staticmethod
+    def _eprint_filepath(paper: Dict, paper_dir: str) -> str:
+        """arXiv源码包保存路径：<论文目录>/pdf/<论文ID>.eprint"""
+        return os.path.join(paper_dir, 'pdf', f"{paper.get('id', 'unknown')}.eprint")
+
+    @traced("latex_convert")
+    def convert_latex_sources(self, papers: List[Dict], paper_dirs: List[str]) -> List[Optional[str]]:
+        """
+        并行下载arXiv论文的e-print源码包，从LaTeX源码生成markdown与图片
+
+        Args:
+            papers: 论文列表
+            paper_dirs: 与papers一一对应的论文目录
+
+        Returns:
+            List[Optional[str]]: 与papers顺序一致的MinerU_process目录，不是arXiv论文或没有可用源码时为None
+        """
+        results: List[Optional[str]] = [None] * len(papers)
+        indexes = [i for i, paper in enumerate(papers)
+                   if paper.get('id') and ('arxiv.org' in paper.get('pdf_url', '') or paper.get('arxiv_url'))]
+        if not indexes:
+            return results
+
+        jobs = [(eprint_url(papers[i]['id']), self._eprint_filepath(papers[i], paper_dirs[i])) for i in indexes]
+        contexts = [{"paper_id": papers[i]['id']} for i in indexes]
+        logger.info(f"下载 {len(jobs)} 篇论文的LaTeX源码")
+        downloads = self.downloader.download_many(jobs, contexts, validate=verify_eprint, stage="eprint_download")
+
+        for i, downloaded in zip(indexes, downloads):
+            if not downloaded["path"]:
+                continue
+            mineru_dir = os.path.join(paper_dirs[i], 'MinerU_process')
+            stem = os.path.splitext(os.path.basename(self._pdf_filepath(papers[i], paper_dirs[i])))[0]
+            with telemetry_context(paper_id=papers[i]['id']), track_call("latex_convert") as call:
+                md_file = convert_latex_source(downloaded["path"], mineru_dir, stem,
+                                               tempfile.mkdtemp(prefix='latex_'))
+                if not md_file:
+                    call.set(status="no_source")
+            if md_file:
+                results[i] = mineru_dir
+
+        succeeded = sum(1 for r in results if r)
+        logger.info(f"LaTeX源码转换成功 {succeeded}/{len(indexes)} 篇，其余转换PDF")
+        return results
 
+    @traced("mineru_convert")
     def convert_pdf_to_markdown_with_mineru(self, pdf_path: str, paper_dir: str) -> Optional[str]:
-        """使用MinerU将PDF转换，自动检测完成并关闭cmd窗口"""
-        try:
-            import threading
-            import time
-            from watchdog.observers import Observer
-            from watchdog.events import FileSystemEventHandler
+        """
+        使用MinerU将PDF转换
 
+        以转换进程退出作为完成信号，退出后检查一次输出清单；
+        进度从MinerU的输出中实时解析并显示，不再监控输出目录。
+        """
+        try:
             # MinerU输出目录 - 所有转换结果都在这里
             mineru_dir = os.path.join(paper_dir, 'MinerU_process')
 
@@ -95,217 +185,30 @@ class PaperProcessor:
             # 确保输出目录存在
             os.makedirs(mineru_dir, exist_ok=True)
 
-            # 用于跟踪转换完成状态
-            conversion_status = {
-                'completed': False,
-                'success': False,
-                'start_time': time.time(),
-                'md_file': None,
-                'images_dir': None
-            }
-
-            # 文件监控处理器
-            class ConversionWatcher(FileSystemEventHandler):
-                def __init__(self, status_dict, target_dir):
-                    self.status = status_dict
-                    self.target_dir = target_dir
-
-                def on_created(self, event):
-                    if not event.is_directory:
-                        self._check_completion()
-
-                def on_modified(self, event):
-                    if not event.is_directory:
-                        self._check_completion()
-
-                def _check_completion(self):
-                    """检查MinerU转换是否完成"""
-                    try:
-                        # 等待文件写入完成
-                        time.sleep(1)
-
-                        # 检查目录是否存在
-                        if not os.path.exists(self.target_dir):
-                            return
-
-                        # 查找MinerU_process下的子文件夹
-                        try:
-                            subdirs = [d for d in os.listdir(self.target_dir)
-                                       if os.path.isdir(os.path.join(self.target_dir, d))]
-                        except (OSError, PermissionError):
-                            return
-
-                        if not subdirs:
-                            return
-
-                        # MinerU_process下只会有一个文件夹
-                        subdir = subdirs[0]
-                        auto_dir = os.path.join(self.target_dir, subdir, 'auto')
-
-                        if not os.path.exists(auto_dir):
-                            return
-
-                        # 检查auto目录下的md文件和images文件夹
-                        try:
-                            md_files = [f for f in os.listdir(auto_dir)
-                                        if f.lower().endswith('.md')]
-                        except (OSError, PermissionError):
-                            return
-
-                        images_dir = os.path.join(auto_dir, 'images')
-
-                        if md_files and os.path.exists(images_dir):
-                            md_file = os.path.join(auto_dir, md_files[0])
-
-                            # 检查md文件大小（确保写入完成）
-                            try:
-                                if os.path.getsize(md_file) > 1000:  # 至少1KB
-                                    self.status['completed'] = True
-                                    self.status['success'] = True
-                                    self.status['md_file'] = md_file
-                                    self.status['images_dir'] = images_dir
-
-                                    logger.info(f"转换完成！")
-                                    logger.info(f"Markdown文件: {md_file}")
-                                    logger.info(f"图片目录: {images_dir}")
-                            except OSError:
-                                return
-
-                    except Exception as e:
-                        logger.error(f"检查转换状态时出错: {e}")
-
-            # 构建批处理文件内容
-            batch_file_content = f'''@echo off
-            echo ============================================
-            echo 正在使用MinerU转换PDF文件...
-            echo 输入文件: {pdf_path}
-            echo 输出目录: {mineru_dir}
-            echo ============================================
-            echo.
-
-            call conda activate {self.config.MINERU_CONDA_ENV}
-            if errorlevel 1 (
-                echo 错误: 无法激活conda环境 {self.config.MINERU_CONDA_ENV}
-                exit /b 1
-            )
-
-            echo 已激活环境: {self.config.MINERU_CONDA_ENV}
-            echo 开始转换...
-            echo.
-            set HF_ENDPOINT=https://hf-mirror.com
-            set HF_HUB_DISABLE_SYMLINKS_WARNING=1
-            mineru -p "{pdf_path}" -o "{mineru_dir}"
-
-            if errorlevel 1 (
-                echo.
-                echo 转换失败！
-                exit /b 1
-            ) else (
-                echo.
-                echo 转换完成！
-                echo 结果保存在: {mineru_dir}
-            )
-
-            :: 自动关闭窗口
-            exit /b 0
-            '''
-            # 创建临时批处理文件
-            import tempfile
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.bat', delete=False, encoding='gbk') as f:
-                f.write(batch_file_content)
-                batch_file = f.name
-
-            logger.info(f"启动MinerU转换...")
+            method = self._parse_method(pdf_path)
+            logger.info(f"启动MinerU转换（解析方式 {method}）...")
             logger.info(f"输入文件: {pdf_path}")
             logger.info(f"输出目录: {mineru_dir}")
 
-            # 设置文件监控
-            event_handler = ConversionWatcher(conversion_status, mineru_dir)
-            observer = Observer()
-            observer.schedule(event_handler, mineru_dir, recursive=True)
-            observer.start()
-
-            try:
-                # 启动转换进程
-                import subprocess
-                import platform
-
-                if platform.system() == "Windows":
-                    # 在后台启动cmd窗口
-                    process = subprocess.Popen(
-                        ['cmd', '/c', batch_file],
-                        creationflags=subprocess.CREATE_NEW_CONSOLE,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE
-                    )
-
-                    print(f"\n{'=' * 60}")
-                    print("MinerU转换已启动...")
-                    print("正在后台处理，请稍候...")
-                    print(f"{'=' * 60}")
-
-                    # 监控转换进度
-                    timeout = 600  # 10分钟超时
-                    check_interval = 2  # 每2秒检查一次
-
-                    while not conversion_status['completed']:
-                        time.sleep(check_interval)
-
-                        # 检查超时
-                        elapsed = time.time() - conversion_status['start_time']
-                        if elapsed > timeout:
-                            logger.error("转换超时")
-                            process.terminate()
-                            break
-
-                        # 检查进程是否仍在运行
-                        if process.poll() is not None:
-                            # 进程已结束，再等待几秒检查结果
-                            time.sleep(3)
-
-                            # 手动检查转换结果
-                            self._manual_check_conversion(mineru_dir, conversion_status)
-                            break
-
-                        # 显示进度
-                        dots = '.' * (int(elapsed) % 4)
-                        print(f"\r转换进行中{dots}   ", end='', flush=True)
-
-                else:
-                    # Linux/Mac系统的处理
-                    result = subprocess.run(
-                        ['bash', '-c', f'''
-                        conda activate {self.config.MINERU_CONDA_ENV} && \
-                        mineru -p "{pdf_path}" -o "{mineru_dir}"
-                        '''],
-                        capture_output=True,
-                        text=True,
-                        timeout=600
-                    )
-
-                    if result.returncode == 0:
-                        self._manual_check_conversion(mineru_dir, conversion_status)
-                    else:
-                        logger.error(f"转换失败: {result.stderr}")
-
-            finally:
-                # 停止文件监控
-                observer.stop()
-                observer.join()
+            run = run_streaming(self._mineru_command(["-p", pdf_path, "-o", mineru_dir, "-m", method]),
+                                env=self._mineru_process_env(),
+                                timeout=self.config.MINERU_TIMEOUT, on_progress=print_progress)
+            print()
 
-                # 清理临时文件
-                try:
-                    os.unlink(batch_file)
-                except:
-                    pass
+            if run["timed_out"]:
+                logger.error("转换超时")
+                return None
+            if run["returncode"] != 0:
+                logger.error(f"转换失败（返回码 {run['returncode']}）: {' | '.join(run['tail'][-5:])}")
+                return None
 
             # 检查最终结果
-            if conversion_status['success']:
-                conversion_info = self._analyze_mineru_output(mineru_dir)
-                logger.info(f"转换结果: {conversion_info}")
+            output = self._check_conversion_output(mineru_dir, pdf_path)
+            if output:
+                logger.info(f"转换完成，用时 {run['seconds']}s")
                 print(f"\n✅ 转换完成！")
-                print(f"📄 Markdown文件: {conversion_status['md_file']}")
-                print(f"🖼️  图片目录: {conversion_status['images_dir']}")
+                print(f"📄 Markdown文件: {output['md_file']}")
+                print(f"🖼️  图片目录: {output['images_dir']}")
                 return mineru_dir
             else:
                 logger.error("转换失败或输出目录为空")
@@ -316,45 +219,357 @@ class PaperProcessor:
             logger.error(f"PDF转换过程中出错: {e}")
             return None
 
-    def _manual_check_conversion(self, mineru_dir: str, conversion_status: dict):
-        """手动检查转换结果"""
+    def _check_conversion_output(self, mineru_dir: str, pdf_path: str) -> Optional[Dict[str, str]]:
+        """
+        转换进程退出后检查一次输出清单：<文件名>/<解析方式>/<文件名>.md
+
+        解析方式子目录（auto、txt、ocr）由find_method_dir确定；
+        输出子目录名与PDF文件名不一致时按目录中唯一的子文件夹查找。
+
+        Returns:
+            Optional[Dict]: {"md_file", "images_dir", "content_list"}，没有有效输出时返回None
+        """
+        stem = os.path.splitext(os.path.basename(pdf_path))[0]
+        auto_dir = find_method_dir(os.path.join(mineru_dir, stem)) or os.path.join(mineru_dir, stem, 'auto')
+        md_file = os.path.join(auto_dir, f"{stem}.md")
+        if not os.path.isfile(md_file):
+            md_file = self._find_main_markdown_file(mineru_dir)
+            if not md_file:
+                return None
+            auto_dir = os.path.dirname(md_file)
+            stem = os.path.splitext(os.path.basename(md_file))[0]
+
+        if os.path.getsize(md_file) == 0:
+            return None
+        content_list = os.path.join(auto_dir, f"{stem}_content_list.json")
+        return {
+            "md_file": md_file,
+            "images_dir": os.path.join(auto_dir, 'images'),
+            "content_list": content_list if os.path.exists(content_list) else ""
+        }
+
+    def _get_mineru_worker(self) -> MinerUWorker:
+        """获取常驻MinerU转换服务客户端，服务进程在第一个任务时启动"""
+        if self._mineru_worker is None:
+            environment = self._mineru_environment()
+            if environment is not None and environment.python:
+                python_command = [environment.python]
+            else:
+                python_command = [self._get_conda_executable(), "run", "--no-capture-output",
+                                  "-n", self.config.MINERU_CONDA_ENV, "python"]
+            self._mineru_worker = MinerUWorker(
+                python_command,
+                log_path=os.path.join(self.config.DATA_DIR, 'mineru_worker.log'),
+                backend=self.config.MINERU_BACKEND,
+                lang=self.config.MINERU_LANG,
+                startup_timeout=self.config.MINERU_WORKER_STARTUP_TIMEOUT,
+                job_timeout=self.config.MINERU_TIMEOUT,
+                env=self._mineru_process_env()
+            )
+        return self._mineru_worker
+
+    @traced("mineru_convert")
+    def convert_pdf_to_markdown_with_worker(self, pdf_path: str, paper_dir: str) -> Optional[str]:
+        """通过常驻MinerU转换服务转换PDF（模型只加载一次）"""
+        mineru_dir = os.path.join(paper_dir, 'MinerU_process')
+        os.makedirs(mineru_dir, exist_ok=True)
+
+        if not self._get_mineru_worker().convert(pdf_path, mineru_dir, method=self._parse_method(pdf_path)):
+            return None
+
+        if not self._check_conversion_output(mineru_dir, pdf_path):
+            logger.error("MinerU转换服务未生成有效的输出")
+            return None
+        return mineru_dir
+
+    def _mineru_command(self, args: List[str]) -> List[str]:
+        """mineru命令行：直接调用解析到的可执行文件，不经过shell与conda activate"""
+        environment = self._mineru_environment()
+        if environment is not None:
+            return [environment.mineru] + args
+        return [self._get_conda_executable(), "run", "--no-capture-output", "-n", self.config.MINERU_CONDA_ENV,
+                "mineru"] + args
+
+    @staticmethod
+    def _pdf_page_count(pdf_path: str) -> Optional[int]:
+        """PDF页数（PyMuPDF未安装或无法打开时返回None）"""
         try:
-            if not os.path.exists(mineru_dir):
-                return
+            import fitz  # PyMuPDF
+            with fitz.open(pdf_path) as doc:
+                return len(doc)
+        except Exception:
+            return None
 
-            # 查找MinerU_process下的子文件夹
-            subdirs = [d for d in os.listdir(mineru_dir)
-                       if os.path.isdir(os.path.join(mineru_dir, d))]
+    @traced("mineru_batch_convert")
+    def convert_pdfs_batch(self, jobs: List[Tuple[str, str]], method: str = "auto") -> List[Optional[str]]:
+        """
+        一次启动MinerU转换多个PDF
+
+        将PDF链接到临时输入目录，按MINERU_BATCH_SIZE分批，每批只启动一次mineru命令行（模型每批只加载一次），
+        完成后把各PDF的输出移动到对应论文的MinerU_process目录。
+        MinerU在一批内合并处理所有页面，无法得到单篇的真实耗时，单篇耗时按页数占比分摊。
+
+        Args:
+            jobs: [(PDF路径, 论文目录)]
+            method: MinerU解析方式（auto、txt、ocr）
+
+        Returns:
+            List[Optional[str]]: 与jobs顺序一致的MinerU_process目录，转换失败为None
+        """
+        results: List[Optional[str]] = [None] * len(jobs)
+        timings = []
+        batch_size = max(1, self.config.MINERU_BATCH_SIZE)
+
+        for batch_start in range(0, len(jobs), batch_size):
+            batch = list(enumerate(jobs))[batch_start:batch_start + batch_size]
+            work_dir = tempfile.mkdtemp(prefix='mineru_batch_', dir=self.config.DATA_DIR)
+            input_dir = os.path.join(work_dir, 'input')
+            output_dir = os.path.join(work_dir, 'output')
+            os.makedirs(input_dir)
 
-            if not subdirs:
-                return
+            try:
+                # 1. 暂存输入：硬链接（跨磁盘时复制），文件名重复时加序号
+                staged = {}
+                for i, (pdf_path, paper_dir) in batch:
+                    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+                    if stem in staged:
+                        stem = f"{stem}_{i}"
+                    staged_path = os.path.join(input_dir, f"{stem}.pdf")
+                    try:
+                        os.link(pdf_path, staged_path)
+                    except OSError:
+                        shutil.copy2(pdf_path, staged_path)
+                    staged[stem] = i
+
+                # 2. 一次启动转换整个目录
+                logger.info(f"批量转换 {len(batch)} 篇PDF（第 {batch_start // batch_size + 1} 批，解析方式 {method}）")
+                start = time.perf_counter()
+                with track_call("pdf_convert_batch", papers=len(batch), method=method) as call:
+                    run = run_streaming(self._mineru_command(["-p", input_dir, "-o", output_dir, "-m", method]),
+                                        env=self._mineru_process_env(),
+                                        timeout=self.config.MINERU_TIMEOUT * len(batch),
+                                        on_progress=print_progress)
+                    print()
+                    if run["timed_out"]:
+                        call.set(status="timeout")
+                    elif run["returncode"] != 0:
+                        call.set(status="failed")
+                        logger.error(f"批量转换返回码 {run['returncode']}: {' | '.join(run['tail'][-5:])}")
+                elapsed = time.perf_counter() - start
+
+                # 3. 分发输出到各论文目录（返回码非0时仍收集已完成的论文）
+                pages = {stem: self._pdf_page_count(os.path.join(input_dir, f"{stem}.pdf")) or 1 for stem in staged}
+                total_pages = sum(pages.values())
+                for stem, i in staged.items():
+                    pdf_path, paper_dir = jobs[i]
+                    mineru_dir = os.path.join(paper_dir, 'MinerU_process')
+                    source = os.path.join(output_dir, stem)
+                    success = False
+                    if os.path.isdir(source):
+                        os.makedirs(mineru_dir, exist_ok=True)
+                        original_stem = os.path.splitext(os.path.basename(pdf_path))[0]
+                        target = os.path.join(mineru_dir, original_stem)
+                        if os.path.exists(target):
+                            shutil.rmtree(target)
+                        shutil.move(source, target)
+                        if stem != original_stem:
+                            self._rename_output_files(target, stem, original_stem)
+                        success = self._check_conversion_output(mineru_dir, pdf_path) is not None
+                    if success:
+                        results[i] = mineru_dir
+                    timings.append({
+                        "pdf_path": pdf_path,
+                        "success": success,
+                        "pages": pages[stem],
+                        "estimated_seconds": round(elapsed * pages[stem] / total_pages, 1),
+                        "batch_seconds": round(elapsed, 1),
+                        "batch_size": len(batch)
+                    })
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
 
-            # MinerU_process下只会有一个文件夹
-            subdir = subdirs[0]
-            auto_dir = os.path.join(mineru_dir, subdir, 'auto')
+        for timing in timings:
+            logger.info(f"{'✅' if timing['success'] else '❌'} {os.path.basename(timing['pdf_path'])}: "
+                        f"{timing['pages']} 页，约 {timing['estimated_seconds']}s（本批共 {timing['batch_seconds']}s）")
+        self._save_batch_timings(timings)
+        return results
 
-            if not os.path.exists(auto_dir):
-                return
+    @staticmethod
+    def _rename_output_files(output_root: str, old_stem: str, new_stem: str):
+        """把MinerU以暂存文件名命名的输出文件（<暂存名>.md、<暂存名>_content_list.json等）改回PDF文件名"""
+        for root, _, files in os.walk(output_root):
+            for name in files:
+                if name.startswith(old_stem):
+                    os.replace(os.path.join(root, name), os.path.join(root, new_stem + name[len(old_stem):]))
+
+    def _convert_with_cli(self, pdf_path: str, paper_dir: str, env: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """直接运行mineru命令行转换单个PDF（并行转换池中使用），env为额外的环境变量"""
+        mineru_dir = os.path.join(paper_dir, 'MinerU_process')
+        os.makedirs(mineru_dir, exist_ok=True)
+        paper_id = os.path.splitext(os.path.basename(pdf_path))[0]
+
+        with telemetry_context(paper_id=paper_id), track_call("pdf_convert", parallel=True) as call:
+            run = run_streaming(self._mineru_command(["-p", pdf_path, "-o", mineru_dir,
+                                                      "-m", self._parse_method(pdf_path)]),
+                                env=self._mineru_process_env(env),
+                                timeout=self.config.MINERU_TIMEOUT)
+            if run["timed_out"]:
+                logger.error(f"转换超时: {pdf_path}")
+                call.set(status="timeout")
+                return None
+            if run["returncode"] != 0:
+                logger.error(f"转换失败 {pdf_path}: {' | '.join(run['tail'][-5:])}")
+                call.set(status="failed")
+                return None
 
-            # 检查auto目录下的md文件和images文件夹
-            md_files = [f for f in os.listdir(auto_dir)
-                        if f.lower().endswith('.md')]
-            images_dir = os.path.join(auto_dir, 'images')
+            if not self._check_conversion_output(mineru_dir, pdf_path):
+                call.set(status="failed")
+                return None
+            return mineru_dir
+
+    def convert_pdfs(self, jobs: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        转换多个PDF：先查转换缓存，未命中的在批量模式下一次启动MinerU，并行模式下使用多进程转换池
+
+        两种模式都未开启（或只有一篇）时未命中的返回None，由调用方逐篇转换；
+        并行模式下MinerU转换失败的论文在转换池中直接使用PyMuPDF备用方法（进程数按并行数分摊CPU核心），
+        其余返回None的论文（转换失败）由调用方逐篇重试（含备用方法）。
+
+        Args:
+            jobs: [(PDF路径, 论文目录)]
+
+        Returns:
+            List[Optional[str]]: 与jobs顺序一致的MinerU_process目录
+        """
+        results = [self._cached_conversion(pdf_path, paper_dir) for pdf_path, paper_dir in jobs]
+        pending = [i for i, mineru_path in enumerate(results) if not mineru_path]
+        if len(pending) < len(jobs):
+            logger.info(f"转换缓存命中 {len(jobs) - len(pending)}/{len(jobs)} 篇")
+        if not pending:
+            return results
+
+        pending_jobs = [jobs[i] for i in pending]
+        converted = [None] * len(pending_jobs)
+        fallback_converted = set()
+        if self.config.MINERU_BATCH_MODE:
+            # 同一批的PDF使用相同的解析方式，按解析方式分组
+            groups: Dict[str, List[int]] = {}
+            for k, (pdf_path, _) in enumerate(pending_jobs):
+                groups.setdefault(self._parse_method(pdf_path), []).append(k)
+            for method, members in groups.items():
+                for k, mineru_path in zip(members, self.convert_pdfs_batch([pending_jobs[k] for k in members], method)):
+                    converted[k] = mineru_path
+        elif self.config.MINERU_POOL_WORKERS != 1 and len(pending_jobs) > 1:
+            workers = plan_workers(self.config.MINERU_POOL_WORKERS, self.config.MINERU_WORKER_THREADS,
+                                   self.config.MINERU_WORKER_MEMORY_GB)
+            if workers > 1:
+                fallback_workers = self._fallback_workers(workers)
+
+                def convert(pdf_path: str, paper_dir: str, env: Dict[str, str]) -> Optional[str]:
+                    mineru_path = self._convert_with_cli(pdf_path, paper_dir, env)
+                    if mineru_path:
+                        return mineru_path
+                    logger.info(f"MinerU转换失败，使用备用方法（{fallback_workers} 个进程）: {pdf_path}")
+                    mineru_path = self.convert_pdf_to_markdown_fallback(pdf_path, paper_dir, fallback_workers)
+                    if mineru_path:
+                        fallback_converted.add(pdf_path)
+                    return mineru_path
+
+                pool = ConversionPool(convert, workers, self.config.MINERU_WORKER_THREADS)
+                converted = [result["mineru_path"] for result in pool.map(pending_jobs)]
+
+        for i, mineru_path in zip(pending, converted):
+            # 备用方法的输出不存入转换缓存（缓存键为MinerU版本）
+            if mineru_path and jobs[i][0] not in fallback_converted:
+                self._store_conversion(jobs[i][0], mineru_path)
+            results[i] = mineru_path
+        return results
 
-            if md_files and os.path.exists(images_dir):
-                md_file = os.path.join(auto_dir, md_files[0])
+    def _fallback_workers(self, concurrent: int = 1) -> int:
+        """
+        PyMuPDF备用转换的进程数
+
+        Args:
+            concurrent: 同时进行的转换数（并行转换池中为池的并行数），CPU核心按其分摊
+
+        Returns:
+            int: 进程数，FALLBACK_WORKERS大于0时不超过该值
+        """
+        workers = max(1, (os.cpu_count() or 1) // max(1, concurrent))
+        if self.config.FALLBACK_WORKERS > 0:
+            workers = min(workers, self.config.FALLBACK_WORKERS)
+        return workers
+
+    def _parse_method(self, pdf_path: str) -> str:
+        """
+        根据文本层检测结果选择MinerU解析方式（每个PDF只检测一次）
+
+        文本层完整的PDF（绝大多数arXiv论文）使用txt方式，跳过版面OCR；扫描版使用ocr；混合文档使用auto。
+        """
+        if not self.config.TEXT_LAYER_DETECTION:
+            return "auto"
+        key = os.path.abspath(pdf_path)
+        if key not in self._parse_methods:
+            report = inspect_text_layer(pdf_path, self.config.TEXT_LAYER_MIN_CHARS, self.config.TEXT_LAYER_TXT_RATIO)
+            self._parse_methods[key] = report["method"] if report else "auto"
+            if report:
+                ocr_pages = ', '.join(str(i + 1) for i in report["ocr_pages"][:10])
+                logger.info(f"文本层检测: {report['pages']} 页，有效文本层 {report['text_pages']} 页，"
+                            f"需要OCR {len(report['ocr_pages'])} 页{f'（第 {ocr_pages} 页）' if ocr_pages else ''}，"
+                            f"解析方式 {report['method']}（{report['seconds']}s）: {os.path.basename(pdf_path)}")
+        return self._parse_methods[key]
+
+    def _conversion_version(self, method: str) -> Optional[str]:
+        """转换器版本（转换缓存键的一部分，含解析方式），MinerU不可用时返回None"""
+        environment = self._mineru_environment()
+        if environment is None:
+            return None
+        return f"mineru{environment.version}-{self.config.MINERU_BACKEND}-{self.config.MINERU_LANG}-{method}"
 
-                # 检查md文件大小
-                if os.path.getsize(md_file) > 1000:  # 至少1KB
-                    conversion_status['completed'] = True
-                    conversion_status['success'] = True
-                    conversion_status['md_file'] = md_file
-                    conversion_status['images_dir'] = images_dir
+    def _cached_conversion(self, pdf_path: str, paper_dir: str) -> Optional[str]:
+        """
+        从转换缓存恢复输出，命中时返回MinerU_process目录
 
-                    logger.info(f"转换完成！找到文件: {md_file}")
+        未命中且将用MinerU重新转换时，如果论文目录中旧的输出子目录含有指向缓存的硬链接则先删除，
+        否则MinerU覆盖写入会破坏缓存条目；MinerU不可用（无法确定版本）时不删除已有输出。
+        """
+        if self.conversion_cache is None:
+            return None
+        mineru_dir = os.path.join(paper_dir, 'MinerU_process')
+        version = self._conversion_version(self._parse_method(pdf_path))
+        if not version:
+            return None
+        if self.conversion_cache.restore(pdf_path, mineru_dir, version) \
+                and self._check_conversion_output(mineru_dir, pdf_path):
+            return mineru_dir
 
+        stale = os.path.join(mineru_dir, os.path.splitext(os.path.basename(pdf_path))[0])
+        if os.path.isdir(stale) and has_hardlinks(stale):
+            shutil.rmtree(stale, ignore_errors=True)
+        return None
+
+    def _store_conversion(self, pdf_path: str, mineru_dir: str):
+        """MinerU转换成功后把输出存入转换缓存"""
+        if self.conversion_cache is None:
+            return
+        version = self._conversion_version(self._parse_method(pdf_path))
+        if version:
+            self.conversion_cache.store(pdf_path, mineru_dir, version)
+
+    def _save_batch_timings(self, timings: List[Dict]):
+        report_path = os.path.join(self.config.DATA_DIR, 'mineru_batch_report.json')
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump({"created": time.strftime('%Y-%m-%d %H:%M:%S'), "papers": timings}, f,
+                          ensure_ascii=False, indent=2)
         except Exception as e:
-            logger.error(f"手动检查转换结果时出错: {e}")
+            logger.error(f"保存批量转换报告失败: {e}")
+
+    def close(self):
+        """关闭常驻转换服务与下载连接池"""
+        if self._mineru_worker is not None:
+            self._mineru_worker.stop()
+        self.downloader.close()
 
     def get_mineru_images_dir(self, mineru_dir: str) -> Optional[str]:
         """获取MinerU输出的images目录路径"""
@@ -370,10 +585,10 @@ class PaperProcessor:
                 return None
 
             # MinerU_process下只会有一个文件夹
-            subdir = subdirs[0]
-            images_dir = os.path.join(mineru_dir, subdir, 'auto', 'images')
+            method_dir = find_method_dir(os.path.join(mineru_dir, subdirs[0]))
+            images_dir = os.path.join(method_dir, 'images') if method_dir else ""
 
-            if os.path.exists(images_dir):
+            if images_dir and os.path.exists(images_dir):
                 return images_dir
 
             return None
@@ -409,8 +624,8 @@ class PaperProcessor:
             subdir = subdirs[0]
             info["subdir_name"] = subdir
 
-            auto_dir = os.path.join(mineru_dir, subdir, 'auto')
-            if not os.path.exists(auto_dir):
+            auto_dir = find_method_dir(os.path.join(mineru_dir, subdir))
+            if not auto_dir:
                 info["status"] = "no_auto_directory"
                 return info
 
@@ -458,13 +673,13 @@ class PaperProcessor:
                        if os.path.isdir(os.path.join(mineru_dir, d))]
 
             if not subdirs:
-                return None
+                # 旧版备用方法直接输出在MinerU_process下的<论文ID>_fallback.md
+                legacy = [f for f in os.listdir(mineru_dir) if f.endswith('_fallback.md')]
+                return os.path.join(mineru_dir, legacy[0]) if legacy else None
 
             # MinerU_process下只会有一个文件夹
-            subdir = subdirs[0]
-            auto_dir = os.path.join(mineru_dir, subdir, 'auto')
-
-            if not os.path.exists(auto_dir):
+            auto_dir = find_method_dir(os.path.join(mineru_dir, subdirs[0]))
+            if not auto_dir:
                 return None
 
             # 查找markdown文件
@@ -479,26 +694,25 @@ class PaperProcessor:
         except Exception as e:
             logger.error(f"查找主markdown文件时出错: {e}")
             return None
-    def _check_mineru_env(self) -> bool:
-        """检查MinerU conda环境是否存在"""
-        try:
-            conda_executable = self._get_conda_executable()
-            result = subprocess.run(
-                [conda_executable, "env", "list"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
 
-            if result.returncode == 0:
-                return self.config.MINERU_CONDA_ENV in result.stdout
-            else:
-                logger.error(f"检查conda环境失败: {result.stderr}")
-                return False
+    def _mineru_environment(self) -> Optional[MinerUEnvironment]:
+        """MinerU运行环境（进程内只解析一次，结果缓存在DATA_DIR/.mineru_env.json）"""
+        return resolve_mineru(self.config.MINERU_CONDA_ENV, self._get_conda_executable(),
+                              self.config.MINERU_EXECUTABLE, os.path.join(self.config.DATA_DIR, '.mineru_env.json'))
 
-        except Exception as e:
-            logger.error(f"检查MinerU环境时出错: {e}")
-            return False
+    def _check_mineru_env(self) -> bool:
+        """检查MinerU环境是否可用（使用缓存的解析结果，不再每篇调用conda env list）"""
+        return self._mineru_environment() is not None
+
+    def _mineru_process_env(self, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """直接运行MinerU时的环境变量：环境的PATH与CONDA_PREFIX（代替conda activate）、模型下载镜像及额外变量"""
+        environment = self._mineru_environment()
+        return {
+            **(environment.env() if environment else {}),
+            "HF_ENDPOINT": os.environ.get("HF_ENDPOINT", "https://hf-mirror.com"),
+            "HF_HUB_DISABLE_SYMLINKS_WARNING": "1",
+            **(extra or {})
+        }
 
     def _get_conda_executable(self) -> str:
         """获取conda可执行文件路径"""
@@ -526,53 +740,44 @@ class PaperProcessor:
 
         return conda_executable
 
-    def convert_pdf_to_markdown_fallback(self, pdf_path: str, paper_dir: str) -> Optional[str]:
-        """备用PDF转换方法：使用PyMuPDF，输出到MinerU_process目录"""
+    @traced("fallback_convert")
+    def convert_pdf_to_markdown_fallback(self, pdf_path: str, paper_dir: str,
+                                         workers: Optional[int] = None) -> Optional[str]:
+        """
+        备用PDF转换方法：PyMuPDF多进程提取文本、标题与图片，输出布局与MinerU相同
+
+        Args:
+            pdf_path: PDF路径
+            paper_dir: 论文目录
+            workers: 进程数，为空时按_fallback_workers使用全部CPU核心（不超过FALLBACK_WORKERS）
+        """
         try:
-            import fitz  # PyMuPDF
-        except ImportError:
-            logger.error("PyMuPDF未安装，无法使用备用转换方法")
-            return None
-
-        try:
-            # 输出到MinerU_process目录
-            paper_id = os.path.splitext(os.path.basename(pdf_path))[0]
             mineru_dir = os.path.join(paper_dir, 'MinerU_process')
-            output_file = os.path.join(mineru_dir, f"{paper_id}_fallback.md")
-
-            # 打开PDF文档
-            doc = fitz.open(pdf_path)
-
-            # 提取文本
-            text_content = []
-            text_content.append(f"# {paper_id}\n")
-            text_content.append("*注：此文件由备用方法生成，可能缺少图片和格式信息*\n\n")
-
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text = page.get_text()
-                if text.strip():  # 只添加非空页面
-                    text_content.append(f"## 第 {page_num + 1} 页\n\n{text}\n\n")
-
-            # 保存为markdown文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(text_content))
-
-            doc.close()
-            logger.info(f"备用方法转换完成: {output_file}")
-            return mineru_dir
+            if convert_pdf(pdf_path, mineru_dir, workers=workers or self._fallback_workers()):
+                return mineru_dir
+            return None
 
         except Exception as e:
             logger.error(f"备用转换方法失败: {e}")
             return None
 
+    @profiled("convert")
     def convert_pdf_to_markdown(self, pdf_path: str, paper_dir: str) -> Optional[str]:
         """主要的PDF转换方法"""
-        # 优先使用MinerU
-        result = self.convert_pdf_to_markdown_with_mineru(pdf_path, paper_dir)
-
-        # 如果MinerU失败，使用备用方法
-        if not result:
+        # 相同内容的PDF已转换过时直接使用缓存的输出
+        result = self._cached_conversion(pdf_path, paper_dir)
+        if result:
+            return result
+
+        # 优先使用MinerU（开启常驻服务时提交给服务进程，否则每篇启动一次命令行）
+        if self.config.MINERU_USE_WORKER:
+            result = self.convert_pdf_to_markdown_with_worker(pdf_path, paper_dir)
+        else:
+            result = self.convert_pdf_to_markdown_with_mineru(pdf_path, paper_dir)
+
+        if result:
+            self._store_conversion(pdf_path, result)
+        else:
             logger.info("MinerU转换失败，尝试备用方法")
             result = self.convert_pdf_to_markdown_fallback(pdf_path, paper_dir)
 
@@ -627,8 +832,16 @@ class PaperProcessor:
         except Exception as e:
             logger.error(f"保存元数据失败: {e}")
 
-    def process_paper(self, paper: Dict) -> Dict:
-        """处理单篇论文"""
+    @traced("process_paper")
+    def process_paper(self, paper: Dict, downloaded: Optional[Dict] = None, mineru_path: Optional[str] = None) -> Dict:
+        """
+        处理单篇论文
+
+        Args:
+            paper: 论文信息
+            downloaded: 已完成的下载结果（批量处理时由download_pdfs并行下载），为空时在此下载
+            mineru_path: 已完成的转换结果（批量转换时），为空时在此转换
+        """
         paper_id = paper.get('id', 'unknown')
         logger.info(f"开始处理论文: {paper_id}")
 
@@ -653,16 +866,28 @@ class PaperProcessor:
             result['result_dir'] = os.path.join(paper_dir, 'result')
 
             # 2. 下载PDF
-            pdf_path = self.download_pdf(paper, paper_dir)
-            if not pdf_path:
+            if downloaded is not None:
+                pdf_path = downloaded["path"]
+            else:
+                pdf_path = self.download_pdf(paper, paper_dir)
+
+            # 3. 单篇处理时优先从arXiv LaTeX源码转换（批量处理时已在process_papers中尝试）
+            if not mineru_path and downloaded is None and self.config.LATEX_SOURCE_ENABLED:
+                mineru_path = self.convert_latex_sources([paper], [paper_dir])[0]
+
+            if not pdf_path and not mineru_path:
                 result['error'] = "PDF下载失败"
                 self.save_paper_metadata(paper, paper_dir, result)
                 return result
 
             result['pdf_path'] = pdf_path
 
-            # 3. 转换PDF（MinerU处理）
-            mineru_path = self.convert_pdf_to_markdown(pdf_path, paper_dir)
+            # 4. 转换PDF（MinerU处理）
+            if not mineru_path:
+                with track_call("pdf_convert") as call:
+                    mineru_path = self.convert_pdf_to_markdown(pdf_path, paper_dir)
+                    if not mineru_path:
+                        call.set(status="failed")
             if not mineru_path:
                 result['error'] = "PDF转换失败"
                 self.save_paper_metadata(paper, paper_dir, result)
@@ -670,14 +895,14 @@ class PaperProcessor:
 
             result['mineru_path'] = mineru_path
 
-            # 4. 查找主要的markdown文件
+            # 5. 查找主要的markdown文件
             main_md = self._find_main_markdown_file(mineru_path)
             if main_md:
                 result['main_md_file'] = main_md
 
             result['success'] = True
 
-            # 5. 保存处理结果和元数据
+            # 6. 保存处理结果和元数据
             self.save_paper_metadata(paper, paper_dir, result)
 
             logger.info(f"论文处理完成: {paper_id}")
@@ -692,13 +917,29 @@ class PaperProcessor:
 
         return result
 
+    @profiled("process")
     def process_papers(self, papers: List[Dict]) -> List[Dict]:
         """批量处理论文"""
         logger.info(f"开始处理 {len(papers)} 篇论文")
 
+        # 先并行下载全部PDF，再依次转换
+        paper_dirs = [self.create_paper_directory(paper) for paper in papers]
+        downloads = self.download_pdfs(papers, paper_dirs)
+
+        # arXiv论文优先从LaTeX源码转换
+        converted: List[Optional[str]] = [None] * len(papers)
+        if self.config.LATEX_SOURCE_ENABLED:
+            converted = self.convert_latex_sources(papers, paper_dirs)
+
+        # 批量或并行转换其余下载成功的PDF，失败的在逐篇处理时单独重试
+        indexes = [i for i, downloaded in enumerate(downloads) if downloaded["path"] and not converted[i]]
+        for i, mineru_path in zip(indexes, self.convert_pdfs([(downloads[i]["path"], paper_dirs[i]) for i in indexes])):
+            converted[i] = mineru_path
+
         results = []
-        for paper in papers:
-            result = self.process_paper(paper)
+        for paper, downloaded, mineru_path in zip(papers, downloads, converted):
+            with telemetry_context(paper_id=paper.get('id', 'unknown')):
+                result = self.process_paper(paper, downloaded=downloaded, mineru_path=mineru_path)
             results.append(result)
 
         # 统计处理结果
@@ -710,6 +951,10 @@ class PaperProcessor:
 
         return results
 
+    def estimate_papers(self, papers: List[Dict], analyzer=None) -> Dict:
+        """预估批量处理（下载、转换，以及可选的分析）所需的时间与费用（dry-run，不下载、不调用API）"""
+        return estimate_processing(self, papers, analyzer=analyzer)
+
     def generate_batch_report(self, results: List[Dict]):
         """生成批量处理报告"""
         report_path = os.path.join(self.config.DATA_DIR, 'batch_processing_report.json')
@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import threading
+import functools
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Set
+
+from utils import logger
+
+
+# 需要剖析的阶段，逗号分隔（search、process、convert、analyze等，all表示全部），优先于Config.PROFILE_STAGES
+PROFILE_ENV = 'LIT_PROFILE'
+# 剖析方式：cprofile（确定性，仅当前线程）或sampling（定时采样所有线程）
+PROFILE_MODE_ENV = 'LIT_PROFILE_MODE'
+# 设置为1时同时记录tracemalloc内存快照
+PROFILE_MEMORY_ENV = 'LIT_PROFILE_MEMORY'
+PROFILE_DIR_NAME = 'profiles'
+
+# 同一进程同时只能有一个cProfile生效，嵌套的阶段计入外层阶段
+_active_lock = threading.Lock()
+_active_stage: Optional[str] = None
+_stage_counts: Counter = Counter()
+
+
+def enabled_stages() -> Set[str]:
+    from config import config
+    value = os.environ.get(PROFILE_ENV, config.PROFILE_STAGES) or ""
+    return {stage.strip() for stage in value.split(',') if stage.strip()}
+
+
+def is_stage_enabled(stage: str) -> bool:
+    stages = enabled_stages()
+    return 'all' in stages or stage in stages
+
+
+def _profile_mode() -> str:
+    from config import config
+    return os.environ.get(PROFILE_MODE_ENV, config.PROFILE_MODE)
+
+
+def _memory_enabled() -> bool:
+    from config import config
+    return config.PROFILE_MEMORY or os.environ.get(PROFILE_MEMORY_ENV) == '1'
+
+
+def _output_prefix(stage: str) -> str:
+    """输出文件前缀：DATA_DIR/profiles/<运行ID>_<阶段>_<序号>"""
+    from config import config
+    from tracing import current_run_id
+
+    profile_dir = os.path.join(config.DATA_DIR, PROFILE_DIR_NAME)
+    os.makedirs(profile_dir, exist_ok=True)
+    _stage_counts[stage] += 1
+    return os.path.join(profile_dir, f"{current_run_id()}_{stage}_{_stage_counts[stage]}")
+
+
+class SamplingProfiler:
+    """
+    定时采样所有线程调用栈的轻量剖析器
+
+    cProfile只能看到启动它的线程；采样方式覆盖本进程的全部线程（如PDF并行下载、并行转换池的线程），
+    开销也与调用次数无关。问答与视觉模型调用在主线程中依次执行；图片预处理在独立进程中执行，
+    MinerU与PyMuPDF备用转换也在子进程中运行，这些子进程中的耗时采样不到，只表现为主线程的等待。
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def hotspots(self, top_n: int) -> List[Dict[str, Any]]:
+        """按自身耗时（栈顶）与累计耗时（出现在栈中）统计采样次数"""
+        own = Counter()
+        cumulative = Counter()
+        total = sum(self.stacks.values()) or 1
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                cumulative[function] += count
+        return [{"function": function, "self": count, "self_pct": count / total,
+                 "cumulative": cumulative[function], "cumulative_pct": cumulative[function] / total}
+                for function, count in own.most_common(top_n)]
+
+    def write(self, prefix: str, top_n: int) -> str:
+        """写入折叠栈文件（可用flamegraph.pl或speedscope查看）与热点摘要"""
+        with open(prefix + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(';'.join(stack) + f" {count}\n")
+
+        lines = [f"采样次数: {self.samples}，采样间隔: {self.interval * 1000:.1f}ms",
+                 f"{'自身%':>8}{'累计%':>8}  函数"]
+        for item in self.hotspots(top_n):
+            lines.append(f"{item['self_pct']:>8.1%}{item['cumulative_pct']:>8.1%}  {item['function']}")
+        return '\n'.join(lines)
+
+
+def _cprofile_summary(profile, prefix: str, top_n: int) -> str:
+    import io
+    import pstats
+
+    profile.dump_stats(prefix + '.prof')
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream).strip_dirs()
+    stats.sort_stats('cumulative').print_stats(top_n)
+    stats.sort_stats('tottime').print_stats(top_n)
+    return stream.getvalue()
+
+
+def _memory_summary(start_snapshot, prefix: str, top_n: int) -> str:
+    import tracemalloc
+
+    snapshot = tracemalloc.take_snapshot()
+    snapshot.dump(prefix + '.tracemalloc')
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"当前内存: {current / 1024 / 1024:.1f}MB，峰值: {peak / 1024 / 1024:.1f}MB", "",
+             f"新增内存最多的前{top_n}处:"]
+    for stat in snapshot.compare_to(start_snapshot, 'lineno')[:top_n]:
+        lines.append(str(stat))
+    return '\n'.join(lines)
+
+
+@contextmanager
+def profile_stage(stage: str):
+    """
+    剖析一个阶段，结果写入DATA_DIR/profiles
+
+    只有在PROFILE_STAGES（或环境变量LIT_PROFILE）中列出的阶段才会剖析。
+    cprofile模式输出.prof文件（可用snakeviz查看），sampling模式输出.folded折叠栈，
+    两种模式都输出前N个热点的.txt摘要；开启内存剖析时另外输出tracemalloc快照与新增内存排行。
+
+    Args:
+        stage: 阶段名称
+    """
+    global _active_stage
+    if not is_stage_enabled(stage):
+        yield
+        return
+
+    with _active_lock:
+        if _active_stage is not None:
+            logger.debug(f"阶段 {stage} 嵌套在 {_active_stage} 中，计入外层剖析结果")
+            nested = True
+        else:
+            _active_stage = stage
+            nested = False
+    if nested:
+        yield
+        return
+
+    from config import config
+
+    mode = _profile_mode()
+    memory = _memory_enabled()
+    profiler = None
+    start_snapshot = None
+    started_tracemalloc = False
+    try:
+        if memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(config.PROFILE_MEMORY_FRAMES)
+                started_tracemalloc = True
+            start_snapshot = tracemalloc.take_snapshot()
+
+        if mode == 'sampling':
+            profiler = SamplingProfiler(config.PROFILE_SAMPLE_INTERVAL)
+            profiler.start()
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except Exception as e:
+        logger.warning(f"启动阶段 {stage} 的剖析失败: {e}")
+        profiler = None
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        try:
+            if profiler is not None:
+                if mode == 'sampling':
+                    profiler.stop()
+                else:
+                    profiler.disable()
+            prefix = _output_prefix(stage)
+            sections = [f"阶段: {stage}，模式: {mode}，耗时: {elapsed:.2f}s"]
+            if profiler is not None:
+                if mode == 'sampling':
+                    sections.append(profiler.write(prefix, config.PROFILE_TOP_N))
+                else:
+                    sections.append(_cprofile_summary(profiler, prefix, config.PROFILE_TOP_N))
+            if start_snapshot is not None:
+                sections.append(_memory_summary(start_snapshot, prefix, config.PROFILE_TOP_N))
+            with open(prefix + '.txt', 'w', encoding='utf-8') as f:
+                f.write('\n\n'.join(sections))
+            logger.info(f"阶段 {stage} 剖析结果已保存: {prefix}.txt")
+        except Exception as e:
+            logger.warning(f"保存阶段 {stage} 的剖析结果失败: {e}\n{traceback.format_exc()}")
+        finally:
+            if started_tracemalloc:
+                import tracemalloc
+                tracemalloc.stop()
+            with _active_lock:
+                _active_stage = None
+
+
+def profiled(stage: str):
+    """将整个函数调用作为一个剖析阶段的装饰器"""
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,226 @@
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+
+from utils import logger, sha256_text
+from local_extractors import FIELD_LABELS
+
+
+# 问答提示词模板，文献内容位于问题之前，便于不同问题共享同一前缀
+QA_PROMPT_TEMPLATE = """请基于以下文献内容回答问题：
+
+文献内容：
+{content}
+
+问题：{question}
+
+请提供详细和准确的回答。如果文献中没有相关信息，请明确说明。"""
+
+QA_PROMPT_VERSION = sha256_text(QA_PROMPT_TEMPLATE, 8)
+
+# 问题标题末尾的字段标记，如"代码链接[字段:links]"：问题只针对该字段，本地候选置信度足够高时直接作答
+FIELD_TAG_PATTERN = re.compile(r'\s*[\[【]\s*(?:字段|field)\s*[:：]\s*(\w+)\s*[\]】]$', re.IGNORECASE)
+
+# 预拆分模板：渲染时只需拼接文献内容，问题部分在编译时已经填好
+_PROMPT_PREFIX, _PROMPT_SUFFIX_TEMPLATE = QA_PROMPT_TEMPLATE.split('{content}')
+
+
+@dataclass(frozen=True)
+class CompiledQuestion:
+    """编译后的问题：包含完整问题文本、预渲染的提示词后缀与稳定的版本哈希"""
+    index: int
+    title: str
+    content: str
+    full_question: str
+    question_hash: str
+    prompt_version: str
+    version_hash: str
+    prompt_suffix: str
+    field: str = ""
+
+    @property
+    def key(self) -> str:
+        """结果中使用的问题键（question_1, question_2, ...）"""
+        return f"question_{self.index}"
+
+    def render(self, document: str) -> str:
+        """将文献内容填入提示词"""
+        return _PROMPT_PREFIX + document + self.prompt_suffix
+
+    def to_dict(self) -> Dict[str, str]:
+        question = {"title": self.title, "content": self.content}
+        if self.field:
+            question["field"] = self.field
+        return question
+
+
+def parse_question_text(text: str) -> List[Dict[str, str]]:
+    """
+    解析问题文件内容
+
+    问题之间使用===分隔，每个问题的第一行作为问题标题，其余内容作为问题详情；
+    标题末尾可以用[字段:<字段名>]标记问题只针对的字段（字段名见local_extractors.FIELD_LABELS）
+
+    Args:
+        text: 问题文件内容
+
+    Returns:
+        List[Dict]: 解析后的问题列表
+    """
+    parsed_questions = []
+    for block in text.split('==='):
+        block = block.strip()
+        if not block:
+            continue
+
+        # 提取问题标题（第一行）和内容（剩余行）
+        lines = block.split('\n')
+        title = lines[0].strip().rstrip('：:')
+        content = '\n'.join(lines[1:]).strip() if len(lines) > 1 else ""
+
+        question = {"title": title, "content": content}
+        tag = FIELD_TAG_PATTERN.search(title)
+        if tag:
+            question["title"] = title[:tag.start()].strip().rstrip('：:')
+            question["field"] = tag.group(1)
+        parsed_questions.append(question)
+
+    return parsed_questions
+
+
+def compile_question(index: int, title: str, content: str, field: str = "") -> CompiledQuestion:
+    """将单个问题编译为提示词模板"""
+    full_question = title
+    if content:
+        full_question += "\n" + content
+
+    question_hash = sha256_text(full_question)
+    return CompiledQuestion(
+        index=index,
+        title=title,
+        content=content,
+        full_question=full_question,
+        question_hash=question_hash,
+        prompt_version=QA_PROMPT_VERSION,
+        # 字段标记决定是否由本地规则直接作答，计入版本；未标记的问题版本不变
+        version_hash=sha256_text(f"{question_hash}:{QA_PROMPT_VERSION}" + (f":{field}" if field else "")),
+        prompt_suffix=_PROMPT_SUFFIX_TEMPLATE.format(question=full_question),
+        field=field
+    )
+
+
+def validate_questions(questions: List[Dict[str, str]], file_path: str) -> List[Dict[str, str]]:
+    """
+    校验问题列表：标题不能为空，重复标题追加序号区分（标题用于结果匹配）
+
+    Args:
+        questions: 解析后的问题列表
+        file_path: 问题文件路径（用于日志）
+
+    Returns:
+        List[Dict]: 校验后的问题列表
+    """
+    valid_questions = []
+    seen_titles = {}
+    for i, question in enumerate(questions, 1):
+        title = question["title"]
+        if not title:
+            logger.warning(f"问题文件 {file_path} 第 {i} 个问题标题为空，已跳过")
+            continue
+
+        if title in seen_titles:
+            seen_titles[title] += 1
+            new_title = f"{title}（{seen_titles[title]}）"
+            logger.warning(f"问题文件 {file_path} 中标题重复: {title}，已重命名为 {new_title}")
+            title = new_title
+        else:
+            seen_titles[title] = 1
+
+        if not question["content"]:
+            logger.warning(f"问题 {title} 没有详细内容，仅使用标题提问")
+
+        field = question.get("field", "")
+        if field and field not in FIELD_LABELS:
+            logger.warning(f"问题 {title} 标记的字段 {field} 不存在（可用字段: {', '.join(FIELD_LABELS)}），已忽略")
+            field = ""
+
+        valid_questions.append({"title": title, "content": question["content"], "field": field})
+
+    return valid_questions
+
+
+class QuestionRegistry:
+    """
+    问题注册表
+
+    问题文件只在首次使用或修改时间变化时重新读取与解析，
+    解析结果编译为CompiledQuestion并按文件路径缓存，可在多篇论文、多个线程间共享。
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[Tuple[int, int], List[CompiledQuestion]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_signature(file_path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(file_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def get_questions(self, file_path: str) -> List[CompiledQuestion]:
+        """
+        获取编译后的问题列表，文件未变化时直接返回缓存
+
+        Args:
+            file_path: 问题文件路径
+
+        Returns:
+            List[CompiledQuestion]: 编译后的问题列表
+        """
+        cache_key = os.path.abspath(file_path)
+        signature = self._file_signature(file_path)
+        if signature is None:
+            logger.error(f"问题文件 {file_path} 不存在")
+            return []
+
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except Exception as e:
+                logger.error(f"读取问题文件时出错: {e}")
+                return []
+
+            questions = validate_questions(parse_question_text(text), file_path)
+            compiled = [compile_question(i, q["title"], q["content"], q["field"]) for i, q in enumerate(questions, 1)]
+            self._cache[cache_key] = (signature, compiled)
+
+            logger.info(f"解析了 {len(compiled)} 个问题: {file_path}")
+            return compiled
+
+    def read_question_file(self, file_path: str) -> List[Dict[str, str]]:
+        """以字典列表形式返回问题（兼容原有接口）"""
+        return [question.to_dict() for question in self.get_questions(file_path)]
+
+    def question_set_version(self, file_path: str) -> str:
+        """问题集整体版本哈希"""
+        return sha256_text(','.join(q.version_hash for q in self.get_questions(file_path)))
+
+    def invalidate(self, file_path: Optional[str] = None):
+        """清除缓存"""
+        with self._lock:
+            if file_path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(os.path.abspath(file_path), None)
+
+
+question_registry = QuestionRegistry()
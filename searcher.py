@@ -388,6 +388,9 @@ import shutil
 import hashlib
 from typing import List, Dict, Optional
 from utils import logger, call_api, load_excluded_papers
+from telemetry import track_call
+from tracing import span, traced
+from profiler import profiled
 from collections import defaultdict
 from config import config  # Import the config
 
@@ -917,24 +920,26 @@ class ArxivSearcher:
             logger.info(f"直接搜索关键词: {keyword}")
 
             try:
-                search = arxiv.Search(
-                    query=keyword,
-                    max_results=max_results // min(len(keywords), 3),
-                    sort_by=arxiv.SortCriterion.SubmittedDate
-                )
-
-                papers = []
-                for result in search.results():
-                    paper = {
-                        "id": result.get_short_id(),
-                        "title": result.title,
-                        "summary": result.summary,
-                        "authors": [author.name for author in result.authors],
-                        "published": result.published.isoformat() if result.published else "",
-                        "pdf_url": result.pdf_url,
-                        "arxiv_url": result.entry_id
-                    }
-                    papers.append(paper)
+                with track_call("arxiv_query", query=keyword) as call:
+                    search = arxiv.Search(
+                        query=keyword,
+                        max_results=max_results // min(len(keywords), 3),
+                        sort_by=arxiv.SortCriterion.SubmittedDate
+                    )
+
+                    papers = []
+                    for result in search.results():
+                        paper = {
+                            "id": result.get_short_id(),
+                            "title": result.title,
+                            "summary": result.summary,
+                            "authors": [author.name for author in result.authors],
+                            "published": result.published.isoformat() if result.published else "",
+                            "pdf_url": result.pdf_url,
+                            "arxiv_url": result.entry_id
+                        }
+                        papers.append(paper)
+                    call.set(results=len(papers))
 
                 all_papers.extend(papers)
                 logger.info(f"直接搜索找到 {len(papers)} 篇论文")
@@ -1032,12 +1037,15 @@ class ArxivSearcher:
             logger.error(f"解析筛选结果时出错: {e}")
             return papers[:self.config.MAX_SELECTED]
 
+    @profiled("search")
+    @traced("search")
     def search_and_select(self, user_query: str) -> List[Dict]:
         """完整的搜索和筛选流程"""
         logger.info(f"开始搜索: {user_query}")
 
         # 1. 扩充关键词
-        keywords = self.expand_keywords(user_query)
+        with span("keyword_expansion"):
+            keywords = self.expand_keywords(user_query)
 
         # 2. 搜索论文（优先使用MCP）
         papers = self.search_arxiv(keywords, self.config.MAX_RESULTS)
@@ -0,0 +1,309 @@
+import os
+import re
+import json
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils import logger, sha256_text
+
+
+# 摘要类别及其显示名称
+DIGEST_CATEGORIES = {
+    "methods": "模型与方法",
+    "data": "实验数据",
+    "preprocessing": "数据预处理",
+    "training": "训练方法",
+    "results": "实验结果与结论"
+}
+
+# 章节标题关键词 -> 摘要类别（一个章节可以属于多个类别）
+SECTION_HEADING_KEYWORDS = {
+    "methods": ["method", "approach", "model", "architecture", "framework", "proposed", "preliminar",
+                "formulation", "方法", "模型", "框架"],
+    "data": ["dataset", "data", "cohort", "material", "patient", "数据"],
+    "preprocessing": ["preprocess", "pre-process", "patch", "tiling", "normaliz", "annotation", "预处理", "标注"],
+    "training": ["training", "implementation", "optimization", "loss", "experimental setup", "setting",
+                 "训练", "实现"],
+    "results": ["result", "experiment", "evaluation", "ablation", "discussion", "conclusion", "performance",
+                "comparison", "结果", "实验", "结论", "讨论"]
+}
+
+# 正文关键词：章节正文中命中较多时同样归入该类别（预处理等信息常写在数据或实现细节章节中）
+SECTION_BODY_KEYWORDS = {
+    "data": ["dataset", "cohort", "slides", "patients", "github", "zenodo"],
+    "preprocessing": ["patch", "magnification", "μm", "macenko", "reinhard", "vahadane", "otsu",
+                      "stain normalization", "annotat", "tissue segmentation"],
+    "training": ["learning rate", "epoch", "optimizer", "batch size", "adam", "loss", "pretrain",
+                 "self-supervised", "distillation"]
+}
+BODY_KEYWORD_THRESHOLD = 3
+
+# 不参与摘要的章节
+SKIP_HEADING_KEYWORDS = ["reference", "bibliograph", "acknowledg", "related work", "introduction",
+                         "参考文献", "致谢", "相关工作", "引言"]
+# 作为共享导语的章节
+LEAD_HEADING_KEYWORDS = ["abstract", "摘要"]
+
+# 问题文本关键词 -> 需要的摘要类别
+QUESTION_CATEGORY_KEYWORDS = {
+    "methods": ["模型", "方法", "架构", "模块", "创新", "聚合", "框架", "MIL", "Graph", "model"],
+    "data": ["数据", "数据集", "样本", "患者", "医院", "染色", "类别", "链接", "github", "dataset"],
+    "preprocessing": ["预处理", "图像块", "patch", "分辨率", "标准化", "标注", "放大"],
+    "training": ["训练", "损失", "自监督", "半监督", "蒸馏", "弱监督", "loss"],
+    "results": ["结果", "结论", "性能", "指标", "效果", "评估"]
+}
+
+DIGEST_PROMPT_TEMPLATE = """以下是一篇学术文献中与「{label}」相关的章节内容：
+
+{content}
+
+请为这些章节整理一份要点摘要，供后续回答关于该文献的各类问题使用。要求：
+1. 保留所有具体信息：数据集与模型名称、样本数量、类别、数值参数、染色方法、分辨率、损失函数、评估结果、网页链接等；
+2. 只依据原文，不添加任何推测；原文未涉及的内容不要写；
+3. 使用条目形式，语言凝练，总长度控制在{max_chars}字以内。"""
+
+DIGEST_QA_PROMPT_TEMPLATE = """请基于以下文献的摘要、分章节要点与相关原文片段回答问题：
+
+文献摘要：
+{lead}
+
+分章节要点：
+{digests}
+
+相关原文片段：
+{excerpts}
+
+问题：{question}
+
+请提供详细和准确的回答。如果以上内容中没有相关信息，请明确说明。"""
+
+DIGEST_PROMPT_VERSION = sha256_text(DIGEST_PROMPT_TEMPLATE + DIGEST_QA_PROMPT_TEMPLATE, 8)
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+SECTION_NUMBER_PATTERN = re.compile(r'^(\d+)(?:\.\d+)*\.?\s')
+TERM_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9&\-/+]*[A-Za-z0-9&]|μm/px|\d+[xX]\b')
+STOP_TERMS = {"the", "and", "or", "of", "in", "for", "to", "as", "is", "are", "with", "xx", "xxx", "http"}
+
+
+def split_sections(md_content: str) -> List[Tuple[str, str]]:
+    """
+    按markdown标题拆分章节
+
+    Args:
+        md_content: markdown内容
+
+    Returns:
+        List[Tuple[str, str]]: (章节标题, 章节正文) 列表，第一个标题之前的内容标题为空
+    """
+    sections = []
+    heading = ""
+    lines = []
+    for line in md_content.splitlines():
+        match = HEADING_PATTERN.match(line.strip())
+        if match:
+            if heading or ''.join(lines).strip():
+                sections.append((heading, '\n'.join(lines).strip()))
+            heading = match.group(2).strip()
+            lines = []
+        else:
+            lines.append(line)
+    if heading or ''.join(lines).strip():
+        sections.append((heading, '\n'.join(lines).strip()))
+    return sections
+
+
+def _matches(text: str, keywords: List[str]) -> bool:
+    text = text.lower()
+    return any(keyword.lower() in text for keyword in keywords)
+
+
+def group_sections(md_content: str) -> Dict[str, Any]:
+    """
+    将章节归入摘要类别
+
+    标题无法识别的小节沿用同一编号下上级章节的类别（如"3.2"沿用"3. Methodology"）。
+    参考文献、引言等章节不参与摘要，摘要（Abstract）作为所有问题共享的导语。
+
+    Args:
+        md_content: markdown内容
+
+    Returns:
+        Dict: lead（导语）、categories（类别 -> 章节文本）与paragraphs（可用于摘录的原文段落）
+    """
+    lead_parts = []
+    categories: Dict[str, List[str]] = {category: [] for category in DIGEST_CATEGORIES}
+    paragraphs = []
+    number_categories: Dict[str, List[str]] = {}
+    last_categories: List[str] = []
+    skipping = False
+
+    for heading, body in split_sections(md_content):
+        number_match = SECTION_NUMBER_PATTERN.match(heading)
+        number = number_match.group(1) if number_match else None
+
+        if _matches(heading, LEAD_HEADING_KEYWORDS):
+            lead_parts.append(body)
+            continue
+        if _matches(heading, SKIP_HEADING_KEYWORDS):
+            skipping = True
+            if number:
+                number_categories[number] = []
+            continue
+
+        matched = [category for category, keywords in SECTION_HEADING_KEYWORDS.items() if _matches(heading, keywords)]
+        if not matched:
+            if number and number in number_categories:
+                matched = list(number_categories[number])
+            elif not number and skipping:
+                # 参考文献之后无编号的内容（如补充材料中的小标题）仍然跳过，直到出现可识别的标题
+                continue
+            else:
+                matched = list(last_categories)
+
+        if not matched:
+            continue
+
+        skipping = False
+        body_lower = body.lower()
+        for category, keywords in SECTION_BODY_KEYWORDS.items():
+            if category not in matched and sum(body_lower.count(k) for k in keywords) >= BODY_KEYWORD_THRESHOLD:
+                matched.append(category)
+
+        if number and number_match.group(0).strip().rstrip('.') == number:
+            number_categories[number] = matched
+        last_categories = matched
+
+        section_text = f"## {heading}\n{body}" if heading else body
+        for category in matched:
+            categories[category].append(section_text)
+        paragraphs.extend(p.strip() for p in re.split(r'\n\s*\n', body) if p.strip())
+
+    return {
+        "lead": '\n\n'.join(part for part in lead_parts if part),
+        "categories": {category: '\n\n'.join(texts) for category, texts in categories.items() if texts},
+        "paragraphs": paragraphs
+    }
+
+
+def question_categories(question: str) -> List[str]:
+    """根据问题文本选择需要的摘要类别，无法判断时使用全部类别"""
+    question_lower = question.lower()
+    scores = {category: sum(question_lower.count(k.lower()) for k in keywords)
+              for category, keywords in QUESTION_CATEGORY_KEYWORDS.items()}
+    top = max(scores.values())
+    if top == 0:
+        return list(DIGEST_CATEGORIES)
+    return [category for category, score in scores.items() if score >= max(1, top / 3)]
+
+
+def question_terms(question: str) -> List[str]:
+    """提取问题中的英文术语（H&E、Macenko、patch、μm/px等），用于定位原文片段"""
+    terms = []
+    for term in TERM_PATTERN.findall(question):
+        term = term.lower()
+        if term not in STOP_TERMS and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def select_excerpts(paragraphs: List[str], question: str, max_chars: int) -> List[str]:
+    """
+    选择与问题术语重合最多的原文段落
+
+    Args:
+        paragraphs: 原文段落
+        question: 问题文本
+        max_chars: 摘录总长度上限
+
+    Returns:
+        List[str]: 按原文顺序排列的段落
+    """
+    terms = question_terms(question)
+    if not terms or max_chars <= 0:
+        return []
+
+    scored = []
+    for index, paragraph in enumerate(paragraphs):
+        paragraph_lower = paragraph.lower()
+        score = sum(1 for term in terms if term in paragraph_lower)
+        if score:
+            scored.append((score, index))
+
+    selected = []
+    total = 0
+    for score, index in sorted(scored, key=lambda item: (-item[0], item[1])):
+        paragraph = paragraphs[index]
+        if total + len(paragraph) > max_chars:
+            continue
+        selected.append(index)
+        total += len(paragraph)
+    return [paragraphs[index] for index in sorted(selected)]
+
+
+def render_digest_prompt(question: str, digest: Dict[str, Any], excerpt_max_chars: int) -> str:
+    """
+    使用分章节摘要与原文片段渲染问答提示词
+
+    Args:
+        question: 完整问题文本
+        digest: PaperAnalyzer.build_section_digests的返回结果
+        excerpt_max_chars: 原文片段总长度上限
+
+    Returns:
+        str: 提示词
+    """
+    digests = digest.get("digests", {})
+    categories = [c for c in question_categories(question) if c in digests] or list(digests)
+    digest_text = '\n\n'.join(f"【{DIGEST_CATEGORIES[c]}】\n{digests[c]}" for c in categories) or "无"
+    excerpts = select_excerpts(digest.get("paragraphs", []), question, excerpt_max_chars)
+
+    return DIGEST_QA_PROMPT_TEMPLATE.format(
+        lead=digest.get("lead") or "无",
+        digests=digest_text,
+        excerpts='\n\n'.join(excerpts) or "无",
+        question=question
+    )
+
+
+class SectionDigestCache:
+    """
+    分章节摘要缓存
+
+    保存在论文result目录下的section_digests.json中，每个类别以章节文本、模型与提示词版本的哈希为键，
+    章节内容未变化时直接复用，新增问题无需重新生成摘要。
+    """
+
+    FILE_NAME = 'section_digests.json'
+
+    def __init__(self, result_dir: str):
+        self.path = os.path.join(result_dir, self.FILE_NAME)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"读取章节摘要缓存失败 {self.path}: {e}")
+        return self.entries
+
+    def get(self, category: str, section_hash: str) -> Optional[str]:
+        """获取哈希一致的摘要，不存在时返回None"""
+        entry = self.entries.get(category)
+        if entry and entry.get("section_hash") == section_hash:
+            return entry.get("digest")
+        return None
+
+    def put(self, category: str, section_hash: str, digest: str):
+        self.entries[category] = {"section_hash": section_hash, "digest": digest}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.error(f"保存章节摘要缓存失败 {self.path}: {e}")
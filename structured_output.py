@@ -0,0 +1,196 @@
+import re
+import json
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils import logger
+
+
+# 数据集信息字段定义：字段名 -> (类型, 说明)
+DATASET_INFO_SCHEMA = {
+    "datasets_used": ("list", "使用的数据集名称列表"),
+    "dataset_sources": ("list", "数据集来源或链接列表"),
+    "dataset_sizes": ("list", "数据集大小描述列表"),
+    "data_preprocessing": ("str", "数据预处理方法描述"),
+    "evaluation_metrics": ("list", "评估指标列表"),
+    "experimental_setup": ("str", "实验设置描述")
+}
+
+# 追问提示词：文献内容之前的部分与首次提取的提示词完全相同（可命中服务端前缀缓存），
+# 需要重新提取的字段说明放在文献内容之后
+FIELDS_REASK_PROMPT_TEMPLATE = """请从以下文献内容中提取数据集相关信息，以JSON格式返回：
+
+文献内容：
+{content}
+
+上一次提取的结果中以下字段缺失或格式无效，请只重新提取这些字段（如果文献中没有相关信息，对应字段返回null）：
+{fields}
+
+只返回JSON格式的结果，不要其他解释。"""
+
+CODE_FENCE_PATTERN = re.compile(r'```(?:json|JSON)?\s*\n?(.*?)(?:\n?```|$)', re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+LINE_COMMENT_PATTERN = re.compile(r'^\s*//.*$', re.MULTILINE)
+PYTHON_LITERALS = {"None": "null", "True": "true", "False": "false"}
+
+
+def _close_truncated(text: str) -> str:
+    """补全被截断的JSON：闭合未结束的字符串与括号"""
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(',').rstrip(':')
+    # 对象中键后缺少值时去掉悬空的键
+    if stack and stack[-1] == '}':
+        text = re.sub(r',\s*"[^"]*"\s*$', '', text)
+    return text + ''.join(reversed(stack))
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """
+    宽松解析模型返回的JSON
+
+    依次尝试：原文、去掉代码块标记、截取最外层花括号、去掉注释与尾逗号、
+    替换中文引号与Python字面量、补全截断的括号。
+
+    Args:
+        text: 模型返回的文本
+
+    Returns:
+        解析结果，无法修复时返回None
+    """
+    if not text:
+        return None
+    text = text.strip()
+
+    candidates = [text]
+    fenced = CODE_FENCE_PATTERN.search(text)
+    if fenced:
+        candidates.append(fenced.group(1).strip())
+    start = text.find('{')
+    if start != -1:
+        end = text.rfind('}')
+        candidates.append(text[start:end + 1] if end > start else text[start:])
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            pass
+
+    # 逐步修复常见格式问题
+    candidate = candidates[-1]
+    candidate = LINE_COMMENT_PATTERN.sub('', candidate)
+    candidate = candidate.replace('“', '"').replace('”', '"')
+    candidate = re.sub(r'\b(None|True|False)\b', lambda m: PYTHON_LITERALS[m.group(1)], candidate)
+    if '"' not in candidate:
+        candidate = candidate.replace("'", '"')
+    candidate = TRAILING_COMMA_PATTERN.sub(r'\1', candidate)
+    for repaired in (candidate, _close_truncated(candidate)):
+        try:
+            return json.loads(TRAILING_COMMA_PATTERN.sub(r'\1', repaired))
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def _coerce(value: Any, expected: str) -> Tuple[bool, Any]:
+    """按字段类型校验并规整取值，返回(是否有效, 规整后的值)"""
+    if value is None:
+        return True, None
+    if isinstance(value, str) and value.strip().lower() in ("", "null", "none", "n/a"):
+        return True, None
+
+    if expected == "list":
+        if isinstance(value, str):
+            return True, [value.strip()]
+        if isinstance(value, list):
+            items = []
+            for item in value:
+                if item is None:
+                    continue
+                if isinstance(item, (dict, list)):
+                    item = json.dumps(item, ensure_ascii=False)
+                items.append(str(item).strip())
+            return True, items or None
+        return False, value
+
+    if expected == "str":
+        if isinstance(value, str):
+            return True, value.strip()
+        if isinstance(value, (int, float)):
+            return True, str(value)
+        if isinstance(value, list) and all(isinstance(item, (str, int, float)) for item in value):
+            return True, '；'.join(str(item) for item in value)
+        return False, value
+
+    return True, value
+
+
+def validate_object(data: Any, schema: Dict[str, Tuple[str, str]]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    按字段定义校验JSON对象
+
+    Args:
+        data: 解析后的JSON
+        schema: 字段定义
+
+    Returns:
+        Tuple: (规整后的对象, 缺失或无效的字段列表)
+    """
+    if not isinstance(data, dict):
+        return {}, list(schema)
+
+    cleaned = {}
+    invalid = []
+    for field, (expected, _) in schema.items():
+        if field not in data:
+            invalid.append(field)
+            continue
+        valid, value = _coerce(data[field], expected)
+        if valid:
+            cleaned[field] = value
+        else:
+            invalid.append(field)
+    return cleaned, invalid
+
+
+def build_fields_reask_prompt(fields: List[str], schema: Dict[str, Tuple[str, str]], content: str) -> str:
+    """构造一次追问所有缺失或无效字段的提示词"""
+    lines = []
+    for field in fields:
+        expected, description = schema[field]
+        lines.append(f'    "{field}": ' + (f'["{description}"]' if expected == "list" else f'"{description}"'))
+    return FIELDS_REASK_PROMPT_TEMPLATE.format(content=content, fields="{\n" + ",\n".join(lines) + "\n}")
+
+
+def parse_fields_answer(text: str, fields: List[str], schema: Dict[str, Tuple[str, str]]) -> Dict[str, Any]:
+    """解析追问的回答，无法解析或仍然无效的字段取None"""
+    data = repair_json(text)
+    if not isinstance(data, dict):
+        logger.warning(f"字段 {', '.join(fields)} 追问结果无法解析")
+        return {field: None for field in fields}
+
+    answers = {}
+    for field in fields:
+        valid, value = _coerce(data.get(field), schema[field][0])
+        if not valid:
+            logger.warning(f"字段 {field} 追问结果仍然无效")
+        answers[field] = value if valid else None
+    return answers
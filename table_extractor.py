@@ -0,0 +1,252 @@
+import os
+import re
+import csv
+import json
+from html.parser import HTMLParser
+from typing import List, Dict, Any, Optional
+
+from utils import logger
+
+
+# MinerU在markdown中内嵌的表格HTML块
+TABLE_HTML_PATTERN = re.compile(r'<html>\s*<body>\s*<table>.*?</table>\s*</body>\s*</html>|<table>.*?</table>',
+                                re.DOTALL | re.IGNORECASE)
+
+
+class _TableHTMLParser(HTMLParser):
+    """将MinerU输出的table_body HTML解析为单元格列表（保留rowspan/colspan）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[Dict[str, Any]]] = []
+        self._current_row: Optional[List[Dict[str, Any]]] = None
+        self._current_cell: Optional[Dict[str, Any]] = None
+
+    def handle_starttag(self, tag, attrs):
+        tag = tag.lower()
+        if tag == 'tr':
+            self._current_row = []
+        elif tag in ('td', 'th') and self._current_row is not None:
+            attrs = dict(attrs)
+            self._current_cell = {
+                "text": [],
+                "rowspan": self._parse_span(attrs.get('rowspan')),
+                "colspan": self._parse_span(attrs.get('colspan'))
+            }
+        elif tag == 'br' and self._current_cell is not None:
+            self._current_cell["text"].append(' ')
+
+    def handle_endtag(self, tag):
+        tag = tag.lower()
+        if tag in ('td', 'th') and self._current_cell is not None:
+            self._current_row.append(self._current_cell)
+            self._current_cell = None
+        elif tag == 'tr' and self._current_row is not None:
+            self.rows.append(self._current_row)
+            self._current_row = None
+
+    def handle_data(self, data):
+        if self._current_cell is not None:
+            self._current_cell["text"].append(data)
+
+    @staticmethod
+    def _parse_span(value) -> int:
+        try:
+            return max(1, int(value))
+        except (TypeError, ValueError):
+            return 1
+
+
+def parse_table_html(html: str) -> List[List[str]]:
+    """
+    将表格HTML解析为二维行列结构
+
+    rowspan/colspan合并的单元格会在其覆盖的每个位置重复填充文本，
+    保证每一行的列数一致，便于导出CSV。
+
+    Args:
+        html: 表格HTML字符串
+
+    Returns:
+        List[List[str]]: 行列数据
+    """
+    parser = _TableHTMLParser()
+    parser.feed(html)
+    parser.close()
+
+    grid: Dict[int, Dict[int, str]] = {}
+    for row_idx, row in enumerate(parser.rows):
+        col_idx = 0
+        for cell in row:
+            # 跳过被上方rowspan占用的位置
+            while col_idx in grid.get(row_idx, {}):
+                col_idx += 1
+
+            text = re.sub(r'\s+', ' ', ''.join(cell["text"])).strip()
+            for dr in range(cell["rowspan"]):
+                for dc in range(cell["colspan"]):
+                    grid.setdefault(row_idx + dr, {})[col_idx + dc] = text
+            col_idx += cell["colspan"]
+
+    if not grid:
+        return []
+
+    n_rows = max(grid.keys()) + 1
+    n_cols = max(max(cols.keys()) for cols in grid.values()) + 1
+    return [[grid.get(r, {}).get(c, '') for c in range(n_cols)] for r in range(n_rows)]
+
+
+def table_to_text(rows: List[List[str]], caption: str = "", max_chars: int = 3000) -> str:
+    """
+    将表格转换为紧凑的文本形式，供问答提示词使用
+
+    Args:
+        rows: 行列数据
+        caption: 表格标题
+        max_chars: 文本最大长度，超出部分截断
+
+    Returns:
+        str: 紧凑文本
+    """
+    lines = []
+    if caption:
+        lines.append(f"[表格] {caption}")
+    for row in rows:
+        # 合并单元格展开后会产生连续重复的内容，这里只保留一次
+        cells = []
+        for cell in row:
+            if not cells or cell != cells[-1]:
+                cells.append(cell)
+        if any(cells):
+            lines.append(' | '.join(cells))
+
+    text = '\n'.join(lines)
+    if len(text) > max_chars:
+        text = text[:max_chars] + "\n...(表格已截断)"
+    return text
+
+
+def find_content_list_file(md_file_path: str) -> Optional[str]:
+    """查找与主markdown文件同目录的MinerU content_list.json"""
+    if not md_file_path:
+        return None
+
+    auto_dir = os.path.dirname(md_file_path)
+    if not os.path.isdir(auto_dir):
+        return None
+
+    for file in os.listdir(auto_dir):
+        if file.endswith('_content_list.json'):
+            return os.path.join(auto_dir, file)
+
+    return None
+
+
+def extract_tables(md_file_path: str) -> List[Dict[str, Any]]:
+    """
+    从MinerU的content_list.json中提取表格
+
+    Args:
+        md_file_path: 主markdown文件路径（content_list.json与其同目录）
+
+    Returns:
+        List[Dict]: 表格列表，每个表格包含caption、rows、image_path等；
+                    没有可解析table_body的表格rows为空，需要视觉模型兜底
+    """
+    content_list_file = find_content_list_file(md_file_path)
+    if not content_list_file:
+        logger.info("未找到content_list.json，跳过表格提取")
+        return []
+
+    try:
+        with open(content_list_file, 'r', encoding='utf-8') as f:
+            content_list = json.load(f)
+    except Exception as e:
+        logger.error(f"读取content_list.json失败 {content_list_file}: {e}")
+        return []
+
+    auto_dir = os.path.dirname(content_list_file)
+    tables = []
+    for item in content_list:
+        if item.get('type') != 'table':
+            continue
+
+        caption = ' '.join(item.get('table_caption') or []).strip()
+        footnote = ' '.join(item.get('table_footnote') or []).strip()
+        table_body = item.get('table_body') or ''
+
+        rows = []
+        if table_body:
+            try:
+                rows = parse_table_html(table_body)
+            except Exception as e:
+                logger.warning(f"解析表格HTML失败: {e}")
+
+        img_path = item.get('img_path', '')
+        tables.append({
+            "table_id": f"table_{len(tables) + 1}",
+            "caption": caption,
+            "footnote": footnote,
+            "page_idx": item.get('page_idx'),
+            "image_path": os.path.normpath(os.path.join(auto_dir, img_path)) if img_path else "",
+            "rows": rows,
+            "parsed": bool(rows)
+        })
+
+    parsed_count = sum(1 for t in tables if t["parsed"])
+    logger.info(f"提取到 {len(tables)} 个表格，本地解析成功 {parsed_count} 个")
+    return tables
+
+
+def save_tables(tables: List[Dict[str, Any]], result_dir: str):
+    """
+    保存表格为JSON与CSV文件
+
+    Args:
+        tables: extract_tables返回的表格列表
+        result_dir: 论文result目录
+    """
+    if not tables:
+        return
+
+    try:
+        os.makedirs(result_dir, exist_ok=True)
+        tables_dir = os.path.join(result_dir, 'tables')
+        os.makedirs(tables_dir, exist_ok=True)
+
+        for table in tables:
+            if not table["parsed"]:
+                continue
+            csv_file = os.path.join(tables_dir, f"{table['table_id']}.csv")
+            with open(csv_file, 'w', encoding='utf-8-sig', newline='') as f:
+                csv.writer(f).writerows(table["rows"])
+
+        with open(os.path.join(result_dir, 'tables.json'), 'w', encoding='utf-8') as f:
+            json.dump(tables, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"表格数据已保存到: {tables_dir}")
+    except Exception as e:
+        logger.error(f"保存表格数据失败: {e}")
+
+
+def compact_tables_in_markdown(md_content: str, max_chars: int = 3000) -> str:
+    """
+    将markdown中内嵌的表格HTML替换为紧凑文本，减少问答提示词长度
+
+    Args:
+        md_content: markdown内容
+        max_chars: 单个表格文本最大长度
+
+    Returns:
+        str: 替换后的markdown内容
+    """
+    def _replace(match):
+        try:
+            rows = parse_table_html(match.group(0))
+        except Exception:
+            return match.group(0)
+        if not rows:
+            return match.group(0)
+        return table_to_text(rows, max_chars=max_chars)
+
+    return TABLE_HTML_PATTERN.sub(_replace, md_content)
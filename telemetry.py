@@ -0,0 +1,268 @@
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import defaultdict
+from logging.handlers import RotatingFileHandler
+from typing import List, Dict, Any, Optional, Iterator
+
+from utils import logger
+
+
+# 当前调用的上下文（论文ID、问题ID等），在线程内自动传递给所有调用事件
+_context: ContextVar[Dict[str, Any]] = ContextVar('telemetry_context', default={})
+
+_writer: Optional[logging.Logger] = None
+_writer_lock = threading.Lock()
+
+TELEMETRY_DIR_NAME = 'telemetry'
+TELEMETRY_FILE_NAME = 'calls.jsonl'
+
+
+def _get_writer() -> Optional[logging.Logger]:
+    """调用事件写入器：DATA_DIR/telemetry/calls.jsonl，按大小轮转"""
+    global _writer
+    from config import config
+
+    if not config.ENABLE_TELEMETRY:
+        return None
+    if _writer is not None:
+        return _writer
+
+    with _writer_lock:
+        if _writer is None:
+            try:
+                telemetry_dir = os.path.join(config.DATA_DIR, TELEMETRY_DIR_NAME)
+                os.makedirs(telemetry_dir, exist_ok=True)
+                handler = RotatingFileHandler(os.path.join(telemetry_dir, TELEMETRY_FILE_NAME),
+                                              maxBytes=int(config.TELEMETRY_MAX_MB * 1024 * 1024),
+                                              backupCount=config.TELEMETRY_BACKUP_COUNT, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                writer = logging.getLogger('telemetry')
+                writer.handlers = [handler]
+                writer.setLevel(logging.INFO)
+                writer.propagate = False
+                _writer = writer
+            except Exception as e:
+                logger.warning(f"初始化调用记录失败: {e}")
+                config.ENABLE_TELEMETRY = False
+                return None
+    return _writer
+
+
+@contextmanager
+def telemetry_context(**fields):
+    """
+    设置调用上下文，块内产生的调用事件都带上这些字段
+
+    Example:
+        with telemetry_context(paper_id="2507.08711v1"):
+            ...
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> Dict[str, Any]:
+    """当前调用上下文的副本"""
+    return dict(_context.get())
+
+
+def emit(event: Dict[str, Any]):
+    """写入一条调用事件"""
+    writer = _get_writer()
+    if writer is None:
+        return
+    try:
+        writer.info(json.dumps(event, ensure_ascii=False, default=str))
+    except Exception as e:
+        logger.warning(f"写入调用记录失败: {e}")
+
+
+class CallRecord:
+    """一次调用的记录，由track_call创建，调用方在块内补充token用量与状态"""
+
+    def __init__(self, stage: str, model: Optional[str] = None, **fields):
+        self.event: Dict[str, Any] = {
+            "time": time.time(),
+            "stage": stage,
+            **_context.get(),
+            "model": model,
+            "latency": None,
+            "ttft": None,
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "cached_tokens": None,
+            "status": "ok",
+            **fields
+        }
+
+    def set(self, **fields):
+        self.event.update(fields)
+
+    def set_response(self, response):
+        """
+        从HTTP响应中记录状态码与首字节时间
+
+        非流式请求无法得到真正的首token时间，这里以响应头到达的耗时（response.elapsed）近似。
+        """
+        self.event["http_status"] = response.status_code
+        if response.status_code != 200:
+            self.event["status"] = f"http_{response.status_code}"
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed is not None:
+            self.event["ttft"] = round(elapsed.total_seconds(), 3)
+
+    def set_usage(self, result: Dict[str, Any]):
+        """从API返回中记录token用量（兼容DeepSeek的缓存命中字段与OpenAI的cached_tokens）"""
+        usage = result.get("usage") or {}
+        cached = usage.get("prompt_cache_hit_tokens")
+        if cached is None:
+            cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        self.event.update({
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "cached_tokens": cached
+        })
+        choices = result.get("choices") or [{}]
+        if choices[0].get("finish_reason"):
+            self.event["finish_reason"] = choices[0]["finish_reason"]
+
+
+@contextmanager
+def track_call(stage: str, model: Optional[str] = None, **fields) -> Iterator[CallRecord]:
+    """
+    记录一次外部调用（LLM、视觉模型、arXiv查询、PDF下载）的耗时与状态
+
+    块内抛出异常时状态记为error并继续抛出。调用同时记录为追踪span。
+
+    Args:
+        stage: 调用阶段（qa、dataset_info、image、arxiv_query、pdf_download等）
+        model: 模型名称
+        **fields: 其他字段
+    """
+    from tracing import span
+
+    record = CallRecord(stage, model, **fields)
+    start = time.perf_counter()
+    try:
+        with span(stage, model=model, **fields):
+            yield record
+    except Exception as e:
+        record.set(status="error", error=str(e)[:200])
+        raise
+    finally:
+        record.event["latency"] = round(time.perf_counter() - start, 3)
+        emit(record.event)
+
+
+def load_events(data_dir: str) -> List[Dict[str, Any]]:
+    """读取调用记录（包括已轮转的文件）"""
+    events = []
+    pattern = os.path.join(data_dir, TELEMETRY_DIR_NAME, TELEMETRY_FILE_NAME + '*')
+    for path in sorted(glob.glob(pattern), reverse=True):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except Exception as e:
+            logger.warning(f"读取调用记录失败 {path}: {e}")
+    return events
+
+
+def _percentile(values: List[float], q: float) -> float:
+    from token_budget import percentile
+    return round(percentile(values, q), 3)
+
+
+def event_cost(event: Dict[str, Any]) -> float:
+    """按模型价格表计算单次调用费用（元），缓存命中的输入按缓存价格计算"""
+    from config import AVAILABLE_MODELS
+
+    prices = AVAILABLE_MODELS.get(event.get("model") or "", {}).get("price_per_million")
+    if not prices:
+        return 0.0
+    prompt = event.get("prompt_tokens") or 0
+    cached = event.get("cached_tokens") or 0
+    completion = event.get("completion_tokens") or 0
+    return ((prompt - cached) * prices.get("input", 0) + cached * prices.get("cached_input", prices.get("input", 0))
+            + completion * prices.get("output", 0)) / 1_000_000
+
+
+def summarize(events: List[Dict[str, Any]], group_by: str = "stage") -> Dict[str, Dict[str, Any]]:
+    """
+    按阶段或问题汇总调用记录
+
+    Args:
+        events: 调用事件
+        group_by: 分组字段（stage、question_id、paper_id）
+
+    Returns:
+        Dict: 分组 -> 调用次数、失败次数、耗时百分位、token合计、缓存命中率与费用
+    """
+    groups = defaultdict(list)
+    for event in events:
+        key = event.get(group_by)
+        if key is not None:
+            groups[key].append(event)
+
+    summary = {}
+    for key, group in groups.items():
+        latencies = [e["latency"] for e in group if e.get("latency") is not None]
+        ttfts = [e["ttft"] for e in group if e.get("ttft") is not None]
+        prompt_tokens = sum(e.get("prompt_tokens") or 0 for e in group)
+        cached_tokens = sum(e.get("cached_tokens") or 0 for e in group)
+        summary[key] = {
+            "calls": len(group),
+            "errors": sum(1 for e in group if e.get("status") != "ok"),
+            "p50": _percentile(latencies, 0.5),
+            "p90": _percentile(latencies, 0.9),
+            "p99": _percentile(latencies, 0.99),
+            "ttft_p50": _percentile(ttfts, 0.5),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(e.get("completion_tokens") or 0 for e in group),
+            "cache_hit_rate": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+            "cost": round(sum(event_cost(e) for e in group), 4)
+        }
+    return summary
+
+
+def print_summary(data_dir: str):
+    """打印各阶段与各问题的耗时百分位、token用量与费用"""
+    events = load_events(data_dir)
+    if not events:
+        print("没有调用记录")
+        return
+
+    header = f"{'':<28}{'次数':>6}{'失败':>6}{'P50(s)':>9}{'P90(s)':>9}{'P99(s)':>9}{'首字节P50':>10}" \
+             f"{'输入token':>11}{'输出token':>11}{'缓存命中':>9}{'费用(元)':>10}"
+    for title, group_by in (("按阶段", "stage"), ("按问题", "question_id")):
+        summary = summarize(events, group_by)
+        if not summary:
+            continue
+        print(f"\n=== {title}统计 ===")
+        print(header)
+        for key, info in sorted(summary.items(), key=lambda item: -item[1]["cost"]):
+            print(f"{str(key)[:26]:<28}{info['calls']:>6}{info['errors']:>6}{info['p50']:>9.2f}{info['p90']:>9.2f}"
+                  f"{info['p99']:>9.2f}{info['ttft_p50']:>10.2f}{info['prompt_tokens']:>11}"
+                  f"{info['completion_tokens']:>11}{info['cache_hit_rate']:>9.0%}{info['cost']:>10.4f}")
+
+    total_cost = sum(event_cost(e) for e in events)
+    print(f"\n共 {len(events)} 次调用，总费用约 {total_cost:.4f} 元")
+
+
+if __name__ == "__main__":
+    from config import config
+
+    print_summary(sys.argv[1] if len(sys.argv) > 1 else config.DATA_DIR)
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """把DATA_DIR指向临时目录，避免调用记录、追踪等运行时文件写入项目的data目录"""
+    from config import Config, config
+
+    path = tmp_path / "data"
+    path.mkdir()
+    monkeypatch.setattr(config, "DATA_DIR", str(path))
+    # PaperAnalyzer直接使用Config类的属性
+    monkeypatch.setattr(Config, "DATA_DIR", str(path))
+    return path
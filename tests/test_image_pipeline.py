@@ -0,0 +1,135 @@
+import os
+import json
+import tracemalloc
+
+import pytest
+from PIL import Image
+
+from image_pipeline import ImagePreparePool, IMAGE_URL_PLACEHOLDER, build_vision_request_body, prepare_image
+
+# 每张合成图片的边长（随机像素无法压缩，PNG约1MB，低于重新编码阈值）
+IMAGE_SIDE = 600
+IMAGE_COUNT = 16
+WINDOW_MB = 3
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for i in range(IMAGE_COUNT):
+        path = tmp_path / f"image_{i}.png"
+        Image.frombytes("RGB", (IMAGE_SIDE, IMAGE_SIDE), os.urandom(IMAGE_SIDE * IMAGE_SIDE * 3)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def _single_peak(path):
+    """单张图片预处理过程中的内存峰值（读取的原始数据与Base64结果同时存在）"""
+    tracemalloc.start()
+    try:
+        prepare_image(path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _run(pool, paths):
+    """逐张消费预处理结果，返回(成功数, Base64总字节数, 内存峰值)"""
+    succeeded = total = 0
+    tracemalloc.start()
+    try:
+        for prepared in pool.imap(paths):
+            succeeded += prepared["success"]
+            total += len(prepared["image_base64"])
+            del prepared
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return succeeded, total, peak
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_peak_memory_stays_within_window(data_dir, images, workers):
+    largest = max(ImagePreparePool._estimate_memory(path) for path in images)
+    in_flight = _single_peak(images[0])
+    with ImagePreparePool(max_workers=workers, max_pending=IMAGE_COUNT, max_pending_mb=WINDOW_MB) as pool:
+        succeeded, total, peak = _run(pool, images)
+
+    assert succeeded == IMAGE_COUNT
+    # 已完成的结果最多超出窗口一张图片，另外加上正在处理的一张图片：
+    # 主进程中预处理时为原始数据与Base64，使用工作进程时为接收结果的缓冲区、其副本与反序列化后的对象
+    limit = pool.max_pending_bytes + largest + (in_flight if workers == 1 else max(in_flight, 3 * largest))
+    assert peak < limit, f"峰值 {peak} 字节超过窗口 {limit} 字节"
+    # 所有图片的编码结果远大于窗口，说明结果没有被一次性全部持有
+    assert total > 2 * limit
+
+
+def test_results_keep_input_order(data_dir, images):
+    with ImagePreparePool(max_workers=1, max_pending=2, max_pending_mb=WINDOW_MB) as pool:
+        assert [prepared["image_path"] for prepared in pool.imap(images)] == images
+
+
+class _Response:
+    status_code = 200
+    text = ""
+
+    @staticmethod
+    def json():
+        return {"choices": [{"message": {"content": "图片分析结果"}}], "usage": {}}
+
+
+@pytest.fixture
+def large_image(tmp_path):
+    # 约4MB的随机像素PNG（低于重新编码阈值，按原样Base64编码）
+    path = tmp_path / "large.png"
+    Image.frombytes("RGB", (1150, 1150), os.urandom(1150 * 1150 * 3)).save(path)
+    return str(path)
+
+
+def test_request_body_has_single_image_copy(large_image):
+    prepared = prepare_image(large_image)
+    size = len(prepared["image_base64"])
+    data = {"messages": [{"content": [{"type": "image_url", "image_url": {"url": IMAGE_URL_PLACEHOLDER}}]}]}
+
+    tracemalloc.start()
+    try:
+        body = build_vision_request_body(data, prepared["mime_type"], prepared["image_base64"])
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert size > 4 * 1024 * 1024
+    # 请求体本身就是一份Base64大小，没有data URL字符串或JSON字符串的额外副本
+    assert peak < 1.2 * size
+    url = json.loads(body)["messages"][0]["content"][0]["image_url"]["url"]
+    assert url == "data:image/png;base64," + prepared["image_base64"].decode("ascii")
+
+
+def test_vision_call_peak_memory(data_dir, monkeypatch, large_image):
+    import analyzer
+    from config import config
+
+    sent = []
+
+    def post(url, headers=None, data=None, timeout=None):
+        sent.append(len(data))
+        return _Response()
+
+    monkeypatch.setattr(analyzer.requests, "post", post)
+    paper_analyzer = analyzer.PaperAnalyzer(config)
+    monkeypatch.setattr(paper_analyzer.config, "IMAGE_MODEL", "deepseek-chat")
+    prepared = prepare_image(large_image)
+    size = len(prepared["image_base64"])
+
+    tracemalloc.start()
+    try:
+        answer = paper_analyzer.call_vision_model(large_image, prepared=prepared)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert answer == "图片分析结果"
+    assert sent and sent[0] > size
+    # 调用过程中只新增请求体一份副本（Base64数据在拼接后释放）
+    assert peak < 1.5 * size
+    assert prepared["image_base64"] == b""
@@ -0,0 +1,183 @@
+import io
+import gzip
+import json
+import tarfile
+
+import pytest
+from PIL import Image
+
+from latex_source import convert_latex_source
+
+STEM = "2401.00001v1"
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut "
+         "aliquip ex ea commodo consequat.")
+
+MAIN_TEX = r"""\documentclass{article}
+\usepackage{graphicx}
+\graphicspath{{figs/}}
+\newcommand{\method}{FooNet}
+\title{A Study of \method{} for Things}
+\begin{document}
+\maketitle
+\begin{abstract}
+We propose \method. % 注释不应出现在输出中
+\end{abstract}
+\input{sections/intro}
+\section{Method}\label{sec:method}
+As shown in Figure~\ref{fig:arch}, we follow prior work~\cite{smith2020,doe2019}.
+\begin{figure}[t]
+\includegraphics[width=0.5\linewidth]{arch}
+\caption{The \method{} architecture.}
+\label{fig:arch}
+\end{figure}
+\subsection{Results}
+\begin{table}[h]
+\caption{Main results.}\label{tab:main}
+\begin{tabular}{l|cc}
+\toprule
+Model & Acc & F1 \\
+\midrule
+\method & 90.1 & 88.0 \\
+\bottomrule
+\end{tabular}
+\end{table}
+See Table~\ref{tab:main} and Section~\ref{sec:method}.
+\bibliography{refs}
+\end{document}
+"""
+
+INTRO_TEX = r"""\section{Introduction}
+Deep learning~\citep{doe2019} is popular. """ + LOREM + "\n"
+
+MAIN_BBL = r"""\begin{thebibliography}{2}
+\bibitem[Smith et~al.(2020)]{smith2020}
+J.~Smith.
+\newblock A paper.
+\bibitem{doe2019}
+J.~Doe.
+\newblock Another paper.
+\end{thebibliography}
+"""
+
+SINGLE_TEX = r"""\documentclass{article}
+\begin{document}
+\section{Overview}
+""" + LOREM + r"""
+\subsection{Data}
+We use the data of~\cite{lee2021}. """ + LOREM + r"""
+\begin{thebibliography}{1}
+\bibitem{lee2021} K.~Lee. A dataset.
+\end{thebibliography}
+\end{document}
+"""
+
+
+def _png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def tar_eprint(tmp_path):
+    path = tmp_path / f"{STEM}.eprint"
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in (("main.tex", MAIN_TEX.encode()), ("sections/intro.tex", INTRO_TEX.encode()),
+                           ("main.bbl", MAIN_BBL.encode()), ("figs/arch.png", _png_bytes())):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+@pytest.fixture
+def gzip_eprint(tmp_path):
+    path = tmp_path / f"{STEM}.eprint"
+    with gzip.open(path, "wb") as f:
+        f.write(SINGLE_TEX.encode())
+    return str(path)
+
+
+def _convert(archive, tmp_path):
+    output_dir = tmp_path / "MinerU_process"
+    md_file = convert_latex_source(archive, str(output_dir), STEM, str(tmp_path / "work"))
+    return output_dir, md_file
+
+
+def _read_output(md_file):
+    with open(md_file, encoding="utf-8") as f:
+        markdown = f.read()
+    with open(md_file.replace(".md", "_content_list.json"), encoding="utf-8") as f:
+        content_list = json.load(f)
+    return markdown, content_list
+
+
+def test_tar_eprint(data_dir, tmp_path, tar_eprint):
+    output_dir, md_file = _convert(tar_eprint, tmp_path)
+
+    assert md_file == str(output_dir / STEM / "auto" / f"{STEM}.md")
+    markdown, content_list = _read_output(md_file)
+    headings = [item["text"] for item in content_list if item.get("text_level")]
+    assert headings[0] == "A Study of FooNet for Things"
+    assert "1 Introduction" in headings and "2 Method" in headings and "2.1 Results" in headings
+    # \input展开的章节内容
+    assert "Deep learning [2] is popular." in markdown
+    assert "注释" not in markdown
+    # .bbl中的参考文献与正文引用编号
+    assert "we follow prior work [1, 2]." in markdown
+    assert "[1] J. Smith. A paper." in markdown and "[2] J. Doe. Another paper." in markdown
+    assert "See Table 1 and Section 2." in markdown
+
+    tables = [item for item in content_list if item["type"] == "table"]
+    assert len(tables) == 1
+    assert tables[0]["table_caption"] == ["Table 1: Main results."]
+    assert "<td>FooNet</td><td>90.1</td><td>88.0</td>" in tables[0]["table_body"]
+
+    images = [item for item in content_list if item["type"] == "image"]
+    assert images[0]["img_caption"] == ["Figure 1: The FooNet architecture."]
+    assert (output_dir / STEM / "auto" / images[0]["img_path"]).is_file()
+    assert not (tmp_path / "work").exists()
+
+
+def test_gzip_single_file_eprint(data_dir, tmp_path, gzip_eprint):
+    _, md_file = _convert(gzip_eprint, tmp_path)
+
+    markdown, content_list = _read_output(md_file)
+    assert [item["text"] for item in content_list if item.get("text_level")][:2] == ["1 Overview", "1.1 Data"]
+    assert "We use the data of [1]." in markdown
+    assert "[1] K. Lee. A dataset." in markdown
+
+
+def test_failed_conversion_keeps_existing_output(data_dir, tmp_path):
+    existing = tmp_path / "MinerU_process" / STEM / "auto" / f"{STEM}.md"
+    existing.parent.mkdir(parents=True)
+    existing.write_text("# 已有的转换结果\n", encoding="utf-8")
+    archive = tmp_path / "short.eprint"
+    with gzip.open(archive, "wb") as f:
+        f.write(rb"\documentclass{article}\begin{document}Too short.\end{document}")
+
+    output_dir, md_file = _convert(str(archive), tmp_path)
+
+    assert md_file is None
+    assert existing.read_text(encoding="utf-8") == "# 已有的转换结果\n"
+    assert sorted(p.name for p in output_dir.iterdir()) == [STEM]
+
+
+def test_successful_conversion_replaces_existing_output(data_dir, tmp_path, gzip_eprint):
+    stale = tmp_path / "MinerU_process" / STEM / "auto" / "stale.md"
+    stale.parent.mkdir(parents=True)
+    stale.write_text("旧文件", encoding="utf-8")
+
+    output_dir, md_file = _convert(gzip_eprint, tmp_path)
+
+    assert md_file is not None
+    assert not stale.exists()
+    assert sorted(p.name for p in output_dir.iterdir()) == [STEM]
+
+
+def test_pdf_only_eprint(data_dir, tmp_path):
+    archive = tmp_path / "pdf.eprint"
+    archive.write_bytes(b"%PDF-1.5\n" + b"0" * 200)
+
+    assert _convert(str(archive), tmp_path)[1] is None
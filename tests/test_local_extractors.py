@@ -0,0 +1,35 @@
+from local_extractors import extract_candidates, direct_answer
+from question_registry import parse_question_text, validate_questions, compile_question
+
+RELEASED = "Our code is available at https://github.com/lab/foonet for reproduction."
+CITED = "We build on the stain normalization of prior work (https://github.com/other/stainlib)."
+
+
+def _links(text):
+    return {entry["value"]: entry["confidence"] for entry in extract_candidates(text).get("links", [])}
+
+
+def test_link_confidence_requires_release_wording():
+    links = _links(f"{RELEASED}\n\n{CITED}")
+    assert links["https://github.com/lab/foonet"] >= 0.9
+    assert links["https://github.com/other/stainlib"] < 0.9
+
+
+def test_single_cited_link_is_not_answered_directly():
+    assert direct_answer("数据来源", extract_candidates(CITED), 0.9, "links") is None
+    assert direct_answer("数据来源", extract_candidates(RELEASED), 0.9, "links") == "https://github.com/lab/foonet"
+
+
+def test_field_tag_in_question_file():
+    text = "代码链接[字段:links]：\n请列出代码地址\n===\n实验数据：\n数据来源与染色方法\n===\n放大【field：zoom】\n放大倍数"
+    questions = validate_questions(parse_question_text(text), "question.txt")
+
+    assert [(q["title"], q["field"]) for q in questions] == [("代码链接", "links"), ("实验数据", ""), ("放大", "")]
+    tagged, untagged = compile_question(1, "代码链接", "请列出代码地址", "links"), compile_question(1, "代码链接", "请列出代码地址")
+    assert tagged.field == "links" and tagged.question_hash == untagged.question_hash
+    assert tagged.version_hash != untagged.version_hash
+
+
+def test_untagged_broad_question_is_not_answered_directly():
+    candidates = extract_candidates(RELEASED + " Slides were stained with H&E and scanned at 40x magnification.")
+    assert direct_answer("实验数据", candidates, 0.5) is None
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from pdf_fallback import convert_pdf
+
+fitz = pytest.importorskip("fitz")
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "paper" / "paper.pdf"
+    path.parent.mkdir()
+    with fitz.open() as doc:
+        for index in range(2):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"1 Introduction {index}", fontsize=16)
+            page.insert_textbox(fitz.Rect(72, 100, 520, 700), "Body text of the paper. " * 40, fontsize=10)
+        doc.save(str(path))
+    return path
+
+
+def test_fallback_replaces_hardlinked_output_without_touching_cache(tmp_path, pdf):
+    # 模拟从转换缓存恢复的输出：论文目录中的文件是缓存文件的硬链接
+    cached = tmp_path / "cache" / "paper.md"
+    cached.parent.mkdir()
+    cached.write_text("# cached MinerU output\n", encoding="utf-8")
+    output = pdf.parent / "MinerU_process" / "paper" / "auto"
+    (output / "images").mkdir(parents=True)
+    os.link(cached, output / "paper.md")
+    (output / "paper_middle.json").write_text("{}", encoding="utf-8")
+
+    md_file = convert_pdf(str(pdf), str(pdf.parent / "MinerU_process"), workers=1)
+
+    assert md_file == str(output / "paper.md")
+    assert "Body text of the paper." in (output / "paper.md").read_text(encoding="utf-8")
+    assert cached.read_text(encoding="utf-8") == "# cached MinerU output\n"
+    assert not (output / "paper_middle.json").exists()
+    assert sorted(os.listdir(pdf.parent / "MinerU_process")) == ["paper"]
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from config import config
+from processor import PaperProcessor
+
+
+@pytest.fixture
+def processor(data_dir):
+    paper_processor = PaperProcessor(config)
+    yield paper_processor
+    paper_processor.close()
+
+
+def _write_output(mineru_dir, stem, method, mtime=None):
+    method_dir = mineru_dir / stem / method
+    (method_dir / "images").mkdir(parents=True)
+    md_file = method_dir / f"{stem}.md"
+    md_file.write_text(f"# {method}\n", encoding="utf-8")
+    (method_dir / f"{stem}_content_list.json").write_text("[]", encoding="utf-8")
+    if mtime is not None:
+        os.utime(md_file, (mtime, mtime))
+    return method_dir
+
+
+@pytest.mark.parametrize("method", ["txt", "ocr", "auto"])
+def test_method_output_layout(processor, tmp_path, method):
+    mineru_dir = tmp_path / "paper" / "MinerU_process"
+    method_dir = _write_output(mineru_dir, "2401.00001v1", method)
+
+    output = processor._check_conversion_output(str(mineru_dir), str(tmp_path / "paper" / "2401.00001v1.pdf"))
+
+    assert output == {"md_file": str(method_dir / "2401.00001v1.md"), "images_dir": str(method_dir / "images"),
+                      "content_list": str(method_dir / "2401.00001v1_content_list.json")}
+    assert processor._find_main_markdown_file(str(mineru_dir)) == str(method_dir / "2401.00001v1.md")
+    assert processor.get_mineru_images_dir(str(mineru_dir)) == str(method_dir / "images")
+
+
+def test_newest_method_output_wins(processor, tmp_path):
+    mineru_dir = tmp_path / "paper" / "MinerU_process"
+    _write_output(mineru_dir, "paper", "auto", mtime=1_000_000)
+    txt_dir = _write_output(mineru_dir, "paper", "txt", mtime=2_000_000)
+
+    assert processor._find_main_markdown_file(str(mineru_dir)) == str(txt_dir / "paper.md")
+
+
+def test_missing_output(processor, tmp_path):
+    mineru_dir = tmp_path / "paper" / "MinerU_process"
+    (mineru_dir / "paper" / "txt").mkdir(parents=True)
+
+    assert processor._check_conversion_output(str(mineru_dir), str(tmp_path / "paper.pdf")) is None
+    assert processor._find_main_markdown_file(str(mineru_dir)) is None
@@ -0,0 +1,39 @@
+import pytest
+
+from text_layer import inspect_text_layer
+
+fitz = pytest.importorskip("fitz")
+
+BODY = "Born-digital text layer with enough characters on every page. " * 10
+
+
+def _make_pdf(path, scanned_pages=()):
+    from PIL import Image
+
+    image = path.parent / "scan.png"
+    Image.new("RGB", (400, 560), (240, 240, 240)).save(image)
+    with fitz.open() as doc:
+        for index in range(20):
+            page = doc.new_page()
+            if index in scanned_pages:
+                page.insert_image(page.rect, filename=str(image))
+            else:
+                page.insert_textbox(page.rect + (36, 36, -36, -36), BODY, fontsize=10)
+        doc.save(str(path))
+    return str(path)
+
+
+def test_born_digital_pdf_uses_txt(tmp_path):
+    report = inspect_text_layer(_make_pdf(tmp_path / "digital.pdf"))
+    assert report["method"] == "txt" and report["ocr_pages"] == []
+
+
+def test_single_scanned_page_keeps_ocr(tmp_path):
+    report = inspect_text_layer(_make_pdf(tmp_path / "mixed.pdf", scanned_pages={7}))
+    assert report["ocr_pages"] == [7]
+    assert report["method"] == "auto"
+
+
+def test_mostly_scanned_pdf_uses_ocr(tmp_path):
+    report = inspect_text_layer(_make_pdf(tmp_path / "scanned.pdf", scanned_pages=set(range(15))))
+    assert report["method"] == "ocr"
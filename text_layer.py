@@ -0,0 +1,92 @@
+import time
+from typing import List, Dict, Any, Optional
+
+from utils import logger
+
+
+# 无法解码的字符（替换字符与私用区字符），占比过高说明字体编码损坏，文本层不可用
+GARBAGE_RATIO = 0.1
+# 页面中图片覆盖面积超过该比例且文字很少时视为扫描页
+SCANNED_IMAGE_COVERAGE = 0.5
+
+
+def _is_garbage(char: str) -> bool:
+    return char == '\ufffd' or '\ue000' <= char <= '\uf8ff'
+
+
+def inspect_page(page, min_chars: int = 200) -> str:
+    """
+    判断单页的文本层情况
+
+    Args:
+        page: PyMuPDF页面
+        min_chars: 视为有效文本层的最少字符数（不含空白）
+
+    Returns:
+        str: text（文本层完整）、blank（空白页，无需OCR）、scanned（扫描页）、broken（文本层损坏）
+    """
+    chars = [c for c in page.get_text("text") if not c.isspace()]
+    if chars and sum(1 for c in chars if _is_garbage(c)) / len(chars) > GARBAGE_RATIO:
+        return "broken"
+    if len(chars) >= min_chars:
+        return "text"
+
+    page_area = abs(page.rect) or 1
+    image_area = 0.0
+    for image in page.get_image_info():
+        bbox = page.rect & image["bbox"]
+        if not bbox.is_empty:
+            image_area += abs(bbox)
+    if image_area / page_area > SCANNED_IMAGE_COVERAGE:
+        return "scanned"
+    return "text" if chars else "blank"
+
+
+def inspect_text_layer(pdf_path: str, min_chars: int = 200, txt_ratio: float = 1.0) -> Optional[Dict[str, Any]]:
+    """
+    用PyMuPDF检查PDF每页的文本层，决定MinerU的解析方式
+
+    - 需要OCR的页（扫描页、文本层损坏的页）为0，或有效页占比不低于txt_ratio：txt（直接使用文本层，跳过OCR；
+      txt_ratio小于1时需要OCR的页不会被识别，其内容丢失）
+    - 需要OCR的页超过一半：ocr
+    - 其余（混合文档）：auto，由MinerU自行判断
+
+    Args:
+        pdf_path: PDF路径
+        min_chars: 视为有效文本层的每页最少字符数
+        txt_ratio: 使用txt方式所需的有效页占比，默认1.0（只有全部页都有文本层时才跳过OCR）
+
+    Returns:
+        Optional[Dict]: {"pages", "text_pages", "ocr_pages": 需要OCR的页码（从0开始）, "method", "seconds"}，
+        PyMuPDF未安装或PDF无法打开时返回None
+    """
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        logger.warning("PyMuPDF未安装，跳过文本层检测")
+        return None
+
+    start = time.perf_counter()
+    try:
+        with fitz.open(pdf_path) as doc:
+            kinds = [inspect_page(page, min_chars) for page in doc]
+    except Exception as e:
+        logger.warning(f"文本层检测失败，使用自动解析: {e}")
+        return None
+
+    ocr_pages: List[int] = [i for i, kind in enumerate(kinds) if kind in ("scanned", "broken")]
+    total = len(kinds) or 1
+    if not ocr_pages or (total - len(ocr_pages)) / total >= txt_ratio:
+        method = "txt"
+    elif len(ocr_pages) / total > 0.5:
+        method = "ocr"
+    else:
+        method = "auto"
+
+    return {
+        "pages": len(kinds),
+        "text_pages": sum(1 for kind in kinds if kind == "text"),
+        "ocr_pages": ocr_pages,
+        "method": method,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
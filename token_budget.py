@@ -0,0 +1,205 @@
+import os
+import re
+import json
+import glob
+import threading
+from typing import List, Dict, Any, Optional
+
+from utils import logger, sha256_text, estimate_tokens
+
+
+# 每个条目保留的最近调用记录数
+MAX_SAMPLES = 50
+# 问题中"80字以内"、"200字以内"等长度要求
+LENGTH_HINT_PATTERN = re.compile(r'(\d+)\s*字(?:以内|之内|左右)')
+
+# 提前停止序列：数据集信息的JSON代码块结束后模型常继续输出解释说明
+STOP_SEQUENCES = {
+    "dataset_info": ["\n```\n\n"]
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """线性插值百分位数"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class TokenBudget:
+    """
+    按问题自适应的输出token预算
+
+    记录每个问题（按问题哈希）历次回答的输出token数、耗时与是否被截断，
+    预算取历史输出的P95乘以余量，并限制在[最小值, 上限]之间；
+    历史不足时按问题中的字数要求估算，仍无法估算则使用上限。
+    推理模型的输出token包含推理过程，只使用推理模型实际调用的记录，记录不足时直接使用上限。
+    统计保存在DATA_DIR下的token_budget_stats.json中，首次使用时从已有分析结果中回填。
+    """
+
+    FILE_NAME = 'token_budget_stats.json'
+
+    def __init__(self, data_dir: str, margin: float = 1.3, min_tokens: int = 256, min_samples: int = 3):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, self.FILE_NAME)
+        self.margin = margin
+        self.min_tokens = min_tokens
+        self.min_samples = min_samples
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+                return
+            except Exception as e:
+                logger.warning(f"读取输出预算统计失败 {self.path}: {e}")
+        self.bootstrap_from_results()
+
+    def bootstrap_from_results(self) -> int:
+        """
+        从已有分析结果回填各问题的历史输出长度
+
+        Returns:
+            int: 回填的回答数
+        """
+        count = 0
+        for qa_file in glob.glob(os.path.join(self.data_dir, '*', 'result', 'qa_results.json')):
+            try:
+                with open(qa_file, 'r', encoding='utf-8') as f:
+                    qa_results = json.load(f)
+            except Exception:
+                continue
+            for entry in qa_results.values():
+                answer = entry.get("answer", "") if isinstance(entry, dict) else ""
+                if not answer or entry.get("source") == "local_rules":
+                    continue
+                question_hash = entry.get("fingerprint", {}).get("question_hash")
+                if not question_hash:
+                    full_question = entry.get("title", "")
+                    if entry.get("content"):
+                        full_question += "\n" + entry["content"]
+                    question_hash = sha256_text(full_question)
+                self._append(f"qa:{question_hash}", {"tokens": estimate_tokens(answer)})
+                count += 1
+
+        if count:
+            logger.info(f"从已有分析结果回填了 {count} 条回答长度记录")
+        return count
+
+    def _append(self, key: str, sample: Dict[str, Any]):
+        entry = self.stats.setdefault(key, {"samples": [], "calls": 0, "truncated": 0})
+        entry["samples"] = (entry["samples"] + [sample])[-MAX_SAMPLES:]
+        if "latency" in sample:
+            entry["calls"] += 1
+            entry["truncated"] += int(sample.get("truncated", False))
+
+    @staticmethod
+    def hint_tokens(question: str) -> int:
+        """根据问题中的字数要求估算回答长度（多处要求时累加），没有要求时返回0"""
+        chars = sum(int(n) for n in LENGTH_HINT_PATTERN.findall(question or ""))
+        return estimate_tokens("字" * chars) if chars else 0
+
+    def budget(self, key: str, cap: int, question: str = "", reasoning: bool = False) -> int:
+        """
+        计算输出token预算
+
+        Args:
+            key: 统计键（qa:<问题哈希>、dataset_info等）
+            cap: 预算上限
+            question: 问题文本（历史不足时用于估算）
+            reasoning: 是否为推理模型
+
+        Returns:
+            int: max_tokens
+        """
+        with self._lock:
+            self._load()
+            # 推理模型与普通模型的输出长度分开统计（回填的记录只有回答长度，属于后者）
+            history = [s for s in self.stats.get(key, {}).get("samples", []) if bool(s.get("reasoning")) == reasoning]
+            samples = [s["tokens"] for s in history if not s.get("truncated")]
+            # 近期被截断过的预算至少翻倍，避免反复截断重试
+            truncated_budget = max((s.get("budget", 0) for s in history[-10:] if s.get("truncated")), default=0)
+
+        if len(samples) >= self.min_samples:
+            estimated = percentile(samples, 0.95) * self.margin
+        elif reasoning:
+            # 推理过程的长度无法从字数要求估算
+            return cap
+        else:
+            # 字数要求只约束最终回答，估算时留出较大余量
+            estimated = self.hint_tokens(question) * self.margin * 2
+            if not estimated and not truncated_budget:
+                return cap
+        return int(min(cap, max(self.min_tokens, estimated, truncated_budget * 2)))
+
+    def expected_tokens(self, key: str) -> Optional[int]:
+        """历史回答输出token数的中位数（用于dry-run预估），历史不足时返回None"""
+        with self._lock:
+            self._load()
+            samples = [s["tokens"] for s in self.stats.get(key, {}).get("samples", []) if not s.get("truncated")]
+        if len(samples) < self.min_samples:
+            return None
+        return int(percentile(samples, 0.5))
+
+    def record(self, key: str, completion_tokens: int, max_tokens: int, latency: float, truncated: bool,
+               reasoning: bool = False):
+        """记录一次调用的输出长度、预算、耗时与是否截断，并写入统计文件"""
+        sample = {"tokens": completion_tokens, "budget": max_tokens, "latency": round(latency, 3),
+                  "truncated": truncated}
+        if reasoning:
+            sample["reasoning"] = True
+        with self._lock:
+            self._load()
+            self._append(key, sample)
+            self._save()
+
+    def _save(self):
+        try:
+            os.makedirs(self.data_dir, exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.error(f"保存输出预算统计失败 {self.path}: {e}")
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        汇总各条目的预算、耗时与截断率并写入日志
+
+        Returns:
+            Dict: 统计键 -> 调用次数、平均预算、平均输出、平均/P95耗时与截断率
+        """
+        summary = {}
+        with self._lock:
+            self._load()
+            for key, entry in self.stats.items():
+                calls = [s for s in entry["samples"] if "latency" in s]
+                if not calls:
+                    continue
+                latencies = [s["latency"] for s in calls]
+                summary[key] = {
+                    "calls": entry["calls"],
+                    "mean_budget": round(sum(s["budget"] for s in calls) / len(calls), 1),
+                    "mean_tokens": round(sum(s["tokens"] for s in calls) / len(calls), 1),
+                    "mean_latency": round(sum(latencies) / len(latencies), 3),
+                    "p95_latency": round(percentile(latencies, 0.95), 3),
+                    "truncation_rate": round(entry["truncated"] / entry["calls"], 3) if entry["calls"] else 0.0
+                }
+
+        if summary:
+            total_calls = sum(s["calls"] for s in summary.values())
+            truncated = sum(self.stats[k]["truncated"] for k in summary)
+            logger.info(f"输出预算统计: {len(summary)} 类调用共 {total_calls} 次，截断 {truncated} 次")
+        return summary
@@ -0,0 +1,193 @@
+import os
+import sys
+import glob
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import List, Dict, Any, Optional, Callable
+
+from utils import logger
+
+
+# 运行ID通过环境变量传给子进程，同一次运行的所有进程写入同一组轨迹文件
+TRACE_RUN_ENV = 'LIT_TRACE_RUN_ID'
+# 设置为1时开启追踪（也可以通过Config.ENABLE_TRACING开启）
+TRACE_ENABLE_ENV = 'LIT_TRACE'
+TRACE_DIR_NAME = 'traces'
+
+# 当前所在的span，子span记录父span，跨线程时通过copy_context传递
+_current_span: ContextVar[Optional[str]] = ContextVar('current_span', default=None)
+
+_file = None
+_file_pid = None
+_file_lock = threading.Lock()
+_span_counter = 0
+
+
+def is_enabled() -> bool:
+    from config import config
+    return config.ENABLE_TRACING or os.environ.get(TRACE_ENABLE_ENV) == '1'
+
+
+def _trace_dir() -> str:
+    from config import config
+    return os.path.join(config.DATA_DIR, TRACE_DIR_NAME)
+
+
+def current_run_id() -> str:
+    """当前运行ID，首次调用时生成并写入环境变量"""
+    run_id = os.environ.get(TRACE_RUN_ENV)
+    if not run_id:
+        run_id = time.strftime('%Y%m%d_%H%M%S')
+        os.environ[TRACE_RUN_ENV] = run_id
+    return run_id
+
+
+def _write(event: Dict[str, Any]):
+    """每个进程写入独立的轨迹文件（fork出的子进程重新打开）"""
+    global _file, _file_pid
+    with _file_lock:
+        try:
+            if _file is None or _file_pid != os.getpid():
+                os.makedirs(_trace_dir(), exist_ok=True)
+                path = os.path.join(_trace_dir(), f"trace_{current_run_id()}_{os.getpid()}.jsonl")
+                _file = open(path, 'a', encoding='utf-8')
+                _file_pid = os.getpid()
+            _file.write(json.dumps(event, ensure_ascii=False, default=str) + '\n')
+            _file.flush()
+        except Exception as e:
+            logger.warning(f"写入追踪记录失败: {e}")
+
+
+def _next_span_id() -> str:
+    global _span_counter
+    with _file_lock:
+        _span_counter += 1
+        return f"{os.getpid()}-{_span_counter}"
+
+
+@contextmanager
+def span(name: str, **args):
+    """
+    记录一个阶段的起止时间
+
+    span自动带上当前调用上下文中的paper_id等字段，并记录父span，
+    导出为Chrome trace后可以按论文查看各阶段的耗时与重叠情况。
+
+    Args:
+        name: 阶段名称
+        **args: 附加字段
+    """
+    if not is_enabled():
+        yield
+        return
+
+    from telemetry import current_context
+
+    span_id = _next_span_id()
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    start_us = time.time_ns() // 1000
+    start = time.perf_counter_ns()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        _write({
+            "name": name,
+            "cat": name.split('.')[0],
+            "ph": "X",
+            "ts": start_us,
+            "dur": (time.perf_counter_ns() - start) // 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {**current_context(), **args, "span_id": span_id, "parent": parent, "status": status}
+        })
+
+
+def traced(name: Optional[str] = None):
+    """将整个函数调用记录为一个span的装饰器"""
+    def decorator(func: Callable):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def with_context(func: Callable) -> Callable:
+    """捕获当前上下文（论文ID、父span），使提交到线程池的任务仍然关联到同一篇论文"""
+    context = copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def export_chrome_trace(run_id: Optional[str] = None) -> Optional[str]:
+    """
+    合并同一次运行所有进程的轨迹文件，导出为Chrome trace-event JSON
+
+    导出的文件可以在chrome://tracing或Perfetto中打开，以时间线或火焰图方式查看。
+
+    Args:
+        run_id: 运行ID，为空时使用当前运行（没有当前运行时使用最近一次）
+
+    Returns:
+        Optional[str]: 导出的文件路径
+    """
+    trace_dir = _trace_dir()
+    if run_id is None:
+        run_id = os.environ.get(TRACE_RUN_ENV)
+    if run_id is None:
+        files = sorted(glob.glob(os.path.join(trace_dir, 'trace_*.jsonl')), key=os.path.getmtime)
+        if not files:
+            logger.warning("没有追踪记录")
+            return None
+        run_id = '_'.join(os.path.basename(files[-1]).split('_')[1:3])
+
+    with _file_lock:
+        if _file is not None:
+            _file.flush()
+
+    events = []
+    pids = set()
+    for path in glob.glob(os.path.join(trace_dir, f"trace_{run_id}_*.jsonl")):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                events.append(event)
+                pids.add(event["pid"])
+
+    if not events:
+        logger.warning(f"运行 {run_id} 没有追踪记录")
+        return None
+
+    main_pid = min(pids, key=lambda pid: min(e["ts"] for e in events if e["pid"] == pid))
+    for pid in pids:
+        events.append({"name": "process_name", "ph": "M", "pid": pid,
+                       "args": {"name": "main" if pid == main_pid else f"worker-{pid}"}})
+
+    output = os.path.join(trace_dir, f"{run_id}.trace.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    logger.info(f"追踪记录已导出: {output}（{len(events)} 个事件，可在chrome://tracing或Perfetto中打开）")
+    return output
+
+
+if __name__ == "__main__":
+    export_chrome_trace(sys.argv[1] if len(sys.argv) > 1 else None)
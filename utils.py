@@ -1,6 +1,8 @@
 import os
+import re
 import json
 import csv
+import hashlib
 import logging
 import requests
 from typing import List, Dict, Optional, Any
@@ -83,23 +85,28 @@ def call_api(model_name: str, messages: List[Dict], config, **kwargs) -> Optiona
         "stream": False  # 添加stream参数
     }
 
+    from telemetry import track_call
+
     try:
         logger.info(f"调用API: {model_name} - {model_config['endpoint']}")
-        response = requests.post(
-            model_config["endpoint"],
-            headers=headers,
-            json=data,
-            timeout=60
-        )
-
-        logger.info(f"API响应状态: {response.status_code}")
-        if response.status_code != 200:
-            logger.error(f"API调用失败: {response.status_code} - {response.text}")
-            return None
-
-        response.raise_for_status()
-
-        result = response.json()
+        with track_call(kwargs.get("stage", "search_llm"), model_name) as call:
+            response = requests.post(
+                model_config["endpoint"],
+                headers=headers,
+                json=data,
+                timeout=60
+            )
+            call.set_response(response)
+
+            logger.info(f"API响应状态: {response.status_code}")
+            if response.status_code != 200:
+                logger.error(f"API调用失败: {response.status_code} - {response.text}")
+                return None
+
+            response.raise_for_status()
+
+            result = response.json()
+            call.set_usage(result)
         return result["choices"][0]["message"]["content"]
 
     except Exception as e:
@@ -108,40 +115,9 @@ def call_api(model_name: str, messages: List[Dict], config, **kwargs) -> Optiona
 
 
 def read_question_file(file_path: str) -> List[Dict[str, str]]:
-    """读取问题文件，解析为问题列表"""
-    if not os.path.exists(file_path):
-        logger.error(f"问题文件 {file_path} 不存在")
-        return []
-
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # 按===分割问题
-        questions = content.split('===')
-        parsed_questions = []
-
-        for question in questions:
-            question = question.strip()
-            if not question:
-                continue
-
-            # 提取问题标题（第一行）
-            lines = question.split('\n')
-            title = lines[0].strip().rstrip('：:')
-            content = '\n'.join(lines[1:]).strip()
-
-            parsed_questions.append({
-                "title": title,
-                "content": content
-            })
-
-        logger.info(f"解析了 {len(parsed_questions)} 个问题")
-        return parsed_questions
-
-    except Exception as e:
-        logger.error(f"读取问题文件时出错: {e}")
-        return []
+    """读取问题文件，解析为问题列表（由问题注册表统一解析与缓存）"""
+    from question_registry import question_registry
+    return question_registry.read_question_file(file_path)
 
 
 def save_analysis_result(paper_id: str, results: Dict[str, Any], config):
@@ -188,3 +164,50 @@ def clean_filename(filename: str) -> str:
     if len(filename) > 100:
         filename = filename[:100]
     return filename
+
+
+def sha256_text(text: str, length: int = 16) -> str:
+    """计算文本的SHA-256摘要（截取前length位），用于结果指纹与缓存键"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:length]
+
+
+def sha256_file(file_path: str, length: int = 16) -> str:
+    """计算文件内容的SHA-256摘要（截取前length位）"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数（中文约0.6 token/字，其他字符约0.3 token/字符）"""
+    if not text:
+        return 0
+    cjk_count = len(re.findall(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]', text))
+    return int(cjk_count * 0.6 + (len(text) - cjk_count) * 0.3) + 1
+
+
+def find_method_dir(output_root: str) -> Optional[str]:
+    """
+    在单篇PDF的输出目录（<MinerU_process>/<文件名>）中找到解析方式子目录
+
+    MinerU按解析方式输出到auto/、txt/、ocr/（vlm后端为vlm/）子目录，备用方法与LaTeX源码转换输出到auto/。
+    有多个子目录含markdown时（换了解析方式重新转换）取markdown最新的一个。
+
+    Returns:
+        Optional[str]: 子目录路径，没有含markdown的子目录时返回None
+    """
+    try:
+        candidates = []
+        for name in os.listdir(output_root):
+            method_dir = os.path.join(output_root, name)
+            if not os.path.isdir(method_dir):
+                continue
+            md_times = [os.path.getmtime(os.path.join(method_dir, f)) for f in os.listdir(method_dir)
+                        if f.lower().endswith('.md')]
+            if md_times:
+                candidates.append((max(md_times), name == 'auto', method_dir))
+    except OSError:
+        return None
+    return max(candidates)[2] if candidates else None